@@ -0,0 +1,53 @@
+"""
+Throughput of BatchEncoder for a store-wide push, by number of worker processes.
+
+Every label is a price text and a 400x300 colored EntityImage. The labels are encoded once in a single process with
+encode_payload, and then with BatchEncoder for 1, 2, 4, ... processes up to the number of CPUs.
+
+Run from the repository root: python benchmarks/batch.py [labels]
+"""
+import os
+import sys
+import time
+
+from PIL import Image, ImageDraw
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from esllib.batch import BatchEncoder
+from esllib.Package import EntityImage, EntityText
+from esllib.payload import encode_payload
+
+
+def make_label(number: int) -> list:
+	image = Image.new('RGB', (400, 300), "white")
+	draw = ImageDraw.Draw(image)
+	draw.text((10, 10), f'Article {number}', fill=(0, 0, 0))
+	draw.rectangle((20, 60, 200 + number % 150, 120), fill=(0, 0, 0))
+	draw.rectangle((220, 150, 380, 280 - number % 100), fill=(255, 0, 0))
+	for y in range(130, 290, 6):
+		draw.line((10, y, 200, y + number % 40), fill=(0, 0, 0))
+	return [EntityText(vertical=1, horizontal=1, font_style=2, text=f'{number % 100}.90'),
+			EntityImage(image=image, colored_image=True)]
+
+
+def main():
+	label_total = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+	labels = [make_label(number) for number in range(label_total)]
+	start = time.perf_counter()
+	expected = [encode_payload(label) for label in labels]
+	single = time.perf_counter() - start
+	print(f'{label_total} labels, single process: {label_total / single:.0f} labels/s')
+	processes = 1
+	while processes <= (os.cpu_count() or 1):
+		with BatchEncoder(processes=processes) as encoder:
+			start = time.perf_counter()
+			payloads = list(encoder.encode(labels))
+			elapsed = time.perf_counter() - start
+		if payloads != expected:
+			raise Exception(f'Payloads from {processes} processes differ from the single process')
+		print(f'{processes:3d} processes: {label_total / elapsed:8.0f} labels/s, speedup {single / elapsed:.2f}')
+		processes *= 2
+
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,128 @@
+"""
+Micro-benchmark of int_to_hexstring and hexstring_to_int against the previous loop based implementations.
+
+Besides timing the functions per width, a full 400x300 colored EntityImage package is assembled field by field and
+token by token through int_to_hexstring, the way the hexadecimal encoder used to build it, once with the previous
+implementation and once with the table driven one.
+
+Run from the repository root: python benchmarks/hexstring.py
+"""
+import os
+import sys
+import timeit
+
+from PIL import Image, ImageDraw
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from esllib.conversion import int_to_hexstring, hexstring_to_int, image_to_black_and_colored_pixel_planes, \
+	compress_pixel_bytes
+
+
+def legacy_int_to_hexstring(number: int, little_endian: bool, number_of_hex_digits: int) -> str:
+	hex_string = '%X' % number
+	if len(hex_string) > number_of_hex_digits:
+		raise Exception(f'Number {number} 0x{hex_string} cant fit in {number_of_hex_digits} hexadecimal digits.')
+	hex_string = hex_string.rjust(number_of_hex_digits, '0')
+	if little_endian:
+		hex_string_reversed = ""
+		for i in range(number_of_hex_digits, 0, -2):
+			hex_string_reversed += hex_string[max(0, i - 2):i]
+		return hex_string_reversed
+	else:
+		return hex_string
+
+
+def legacy_hexstring_to_int(inputstring: str, little_endian: bool) -> int:
+	hexstring = ""
+	if little_endian:
+		for i in range(0, len(inputstring), 2):
+			hexstring = inputstring[i:i+2] + hexstring
+	else:
+		hexstring = inputstring
+	return int(hexstring, base=16)
+
+
+def compressed_to_hexstring(compressed: bytes, to_hex) -> str:
+	"""
+	Emit every RLE token of compressed pixels through to_hex, like the hexadecimal encoder did
+	"""
+	out = []
+	i = 0
+	while i < len(compressed):
+		token = compressed[i]
+		out.append(to_hex(token, little_endian=False, number_of_hex_digits=2))
+		if token & 0x80 == 0 and token & 0x3F == 1:
+			out.append(to_hex(compressed[i+1], little_endian=False, number_of_hex_digits=2))
+			i += 2
+		elif token & 0x80 == 0 and token & 0x3F == 0:
+			out.append(to_hex(compressed[i+1] | compressed[i+2] << 8, little_endian=True, number_of_hex_digits=4))
+			i += 3
+		else:
+			i += 1
+	return ''.join(out)
+
+
+def image_package_to_hexstring(black: bytes, color: bytes, width: int, height: int, to_hex) -> str:
+	out = to_hex(0xFC, little_endian=False, number_of_hex_digits=2)
+	out += to_hex(0, little_endian=False, number_of_hex_digits=4)
+	out += to_hex(0, little_endian=False, number_of_hex_digits=4)
+	out += to_hex(height - 1, little_endian=False, number_of_hex_digits=4)
+	out += to_hex(width - 1, little_endian=False, number_of_hex_digits=4)
+	out += to_hex(len(black), little_endian=False, number_of_hex_digits=8)
+	out += compressed_to_hexstring(black, to_hex)
+	out += to_hex(0xFC, little_endian=False, number_of_hex_digits=2)
+	out += '8' + to_hex(0, little_endian=False, number_of_hex_digits=3)
+	out += to_hex(0, little_endian=False, number_of_hex_digits=4)
+	out += '8' + to_hex(height - 1, little_endian=False, number_of_hex_digits=3)
+	out += to_hex(width - 1, little_endian=False, number_of_hex_digits=4)
+	out += to_hex(len(color), little_endian=False, number_of_hex_digits=8)
+	out += compressed_to_hexstring(color, to_hex)
+	return out
+
+
+def test_image(width: int, height: int) -> Image:
+	image = Image.new('RGB', (width, height), 'white')
+	draw = ImageDraw.Draw(image)
+	for i in range(0, width, 7):
+		draw.line((i, 0, width - i, height), fill='black')
+	draw.rectangle((20, 20, 120, 60), fill='red')
+	draw.text((150, 150), 'Price 12.50', fill='black')
+	return image
+
+
+def best_of(statement, number: int) -> float:
+	return min(timeit.repeat(statement, number=number, repeat=5)) / number
+
+
+def main():
+	print('%-28s %12s %12s %8s' % ('Function', 'Legacy us', 'Table us', 'Speedup'))
+	for digits in (2, 3, 4, 8):
+		for little_endian in (False, True):
+			number = (1 << digits * 4) - 3
+			legacy = best_of(lambda: legacy_int_to_hexstring(number, little_endian, digits), 100000)
+			table = best_of(lambda: int_to_hexstring(number, little_endian, digits), 100000)
+			name = 'int_to_hexstring %d %s' % (digits, 'little' if little_endian else 'big')
+			print('%-28s %12.3f %12.3f %7.1fx' % (name, legacy * 1e6, table * 1e6, legacy / table))
+			hex_string = int_to_hexstring(number, little_endian, digits)
+			legacy = best_of(lambda: legacy_hexstring_to_int(hex_string, little_endian), 100000)
+			table = best_of(lambda: hexstring_to_int(hex_string, little_endian), 100000)
+			name = 'hexstring_to_int %d %s' % (digits, 'little' if little_endian else 'big')
+			print('%-28s %12.3f %12.3f %7.1fx' % (name, legacy * 1e6, table * 1e6, legacy / table))
+
+	width, height = 400, 300
+	black_plane, color_plane = image_to_black_and_colored_pixel_planes(test_image(width, height))
+	black = bytes(compress_pixel_bytes(black_plane))
+	color = bytes(compress_pixel_bytes(color_plane))
+	legacy_package = image_package_to_hexstring(black, color, width, height, legacy_int_to_hexstring)
+	table_package = image_package_to_hexstring(black, color, width, height, int_to_hexstring)
+	if legacy_package != table_package:
+		raise Exception('Table driven package differs from legacy package')
+	legacy = best_of(lambda: image_package_to_hexstring(black, color, width, height, legacy_int_to_hexstring), 20)
+	table = best_of(lambda: image_package_to_hexstring(black, color, width, height, int_to_hexstring), 20)
+	print()
+	print('Full %dx%d EntityImage package, %d hexadecimal digits' % (width, height, len(table_package)))
+	print('%-28s %12.3f %12.3f %7.1fx' % ('hexadecimal encode ms', legacy * 1e3, table * 1e3, legacy / table))
+
+
+if __name__ == '__main__':
+	main()
@@ -1,10 +1,120 @@
+import struct
+import zlib
+
 from PIL import Image
 from esllib.barcode import validate_barcode128b_characters, validate_ean13_characters, \
 	calculate_barcode128b_check_digit, calculate_ean13_check_digit
-from esllib.conversion import int_to_hexstring, hexstring_to_int, utf8_to_utf16hexstring, utf16hexstring_to_utf8, \
-	image_to_black_and_colored_pixel_strings, compress_pixel_array, uncompress_pixel_array, pixel_string_to_image
+from esllib.bitplane import BitPlane
+from esllib.conversion import int_to_hexstring, utf8_to_utf16hexstring, utf8_to_utf16bytes, utf16bytes_to_utf8, \
+	position_to_bytes, bytes_to_position, image_to_black_and_colored_bit_planes, compress_pixel_planes, \
+	estimate_compressed_size, uncompress_pixel_plane, bit_planes_to_image, IncrementalPixelEncoder
 from esllib.enums import AnswerTagStatus, DrawStyles, FontStyles, FontStylesInv
 
+# Binary layouts of the packages, the 3 byte string is the shared vertical and horizontal position
+_ENTITY_HEADER = struct.Struct('>B3sBB')  # DataLength, Vertical/Horizontal, DrawStyle, FontStyle
+_RECTANGLE = struct.Struct('>B3sBBHHH')  # DataLength, Vertical/Horizontal, FontStyle, DrawStyle, Height, Width, Border
+_LINE = struct.Struct('>B3sBBH')  # DataLength, Vertical/Horizontal, DrawStyle, FontStyle, Border
+_LED_DATA = struct.Struct('>BBHHH')  # DataLength, FlashColor, ServiceCode, Hardcoded, FlashTimes
+_IMAGE_HEADER = struct.Struct('>BHHHHI')  # ImageType, X, Y, Height, Width, Size
+_ANSWER = struct.Struct('>cHH3sBBBB')  # Start, Length, ServiceCode, Display Tag ID, RSSI, TagStatus, Volt, Temperature
+
+
+def _raw_to_buffer(raw) -> memoryview:
+	"""
+	Packages can be parsed both from a hexadecimal string and from binary data
+	:param raw: str hexadecimal string, or bytes, bytearray or memoryview
+	:return: memoryview of binary package
+	"""
+	if isinstance(raw, str):
+		return memoryview(bytes.fromhex(raw))
+	return memoryview(raw)
+
+
+_IMAGE_TYPES = (FontStylesInv['ImageCompress'], FontStylesInv['ImageX2'], FontStylesInv['Image'])
+_X2_THRESHOLD = [0] * 128 + [255] * 128  # A half size pixel is filled if at least half of its 2x2 pixels are
+
+
+def _count_filled(value: int) -> int:
+	"""
+	:param value: int packed pixels
+	:return: int number of set bits
+	"""
+	return bin(value).count('1')
+
+
+def _half_plane(plane: BitPlane) -> BitPlane:
+	"""
+	Scale a plane to half the width and height, for ImageX2
+	"""
+	half = plane.to_mask().convert('L').reduce(2).point(_X2_THRESHOLD, '1')
+	return BitPlane(half.width, half.height, half.tobytes())
+
+
+def _double_plane(plane: BitPlane) -> BitPlane:
+	"""
+	Scale a plane to twice the width and height, like the display tag shows ImageX2
+	"""
+	doubled = plane.to_mask().resize((plane.width*2, plane.height*2), Image.NEAREST)
+	return BitPlane(doubled.width, doubled.height, doubled.tobytes())
+
+
+def _x2_error(plane: BitPlane, half: BitPlane) -> float:
+	"""
+	:return: float part of the pixels that differ when the half size plane is shown as ImageX2
+	"""
+	doubled = _double_plane(half).crop((0, 0, plane.width, plane.height))
+	differing = _count_filled(int.from_bytes(plane.data, 'big') ^ int.from_bytes(doubled.data, 'big'))
+	return differing / (plane.width * plane.height)
+
+
+def _x2_possible(plane: BitPlane) -> bool:
+	"""
+	:return: bool True if the plane can be sent as ImageX2, the display shows it at twice the half size so the width and
+	height must be even
+	"""
+	return plane.width % 2 == 0 and plane.height % 2 == 0
+
+
+def _rows_doubled(plane: BitPlane) -> bool:
+	"""
+	:return: bool True if every even row is repeated in the row after it, a quick test before _x2_error for images
+	that must be scaled up without loss
+	"""
+	data, stride = plane.data, plane.stride
+	return all(data[y*stride:(y+1)*stride] == data[(y+1)*stride:(y+2)*stride] for y in range(0, plane.height, 2))
+
+
+def _encode_image_data(image_type: int, planes: list, optimal_compression: bool, parallel_compression: bool) -> list:
+	"""
+	:return: list of bytes image data for every plane, packed pixels for Image, otherwise RLE compressed pixels
+	"""
+	if image_type == FontStylesInv['Image']:
+		return [bytes(plane.data) for plane in planes]
+	return [bytes(data) for data in compress_pixel_planes(planes, optimal_compression, parallel_compression)]
+
+
+def _decode_image_data(image_type: int, data, width: int, height: int) -> BitPlane:
+	"""
+	:return: BitPlane of the pixels as shown on the display, ImageX2 is scaled to twice the size of the header
+	"""
+	if image_type == FontStylesInv['Image']:
+		if len(data) != (width + 7) // 8 * height:
+			raise Exception(f'Expected {(width + 7) // 8 * height} bytes of pixels for a {width}x{height} image, got {len(data)}')
+		return BitPlane(width, height, data)
+	plane = uncompress_pixel_plane(data, width, height)
+	if image_type == FontStylesInv['ImageX2']:
+		plane = _double_plane(plane)
+	return plane
+
+
+def _decode_image(image_mode: str, image_type: int, black_data, color_data, width: int, height: int) -> Image:
+	"""
+	:return: Pillow Image of the black and the optional color part as shown on the display
+	"""
+	image_black_raw = _decode_image_data(image_type, black_data, width, height)
+	image_color_raw = None if color_data is None else _decode_image_data(image_type, color_data, width, height)
+	return bit_planes_to_image(image_black_raw, image_color_raw, image_mode)
+
 
 class EntityText:
 	"""
@@ -21,14 +131,13 @@ class EntityText:
 	def __init__(self, raw="", vertical=0, horizontal=0, draw_style=0, font_style=0, text=""):
 		if len(raw) > 0:
 			self._raw = raw
-			self.length = hexstring_to_int(self._raw[0:2], little_endian=False)*2
-			if len(self._raw) != self.length+2:
-				raise Exception(f'Answer package is always a 23 byte string, this string is {len(self._raw)} Packet: {self._raw}')
-			self.vertical = hexstring_to_int(self._raw[2:5], little_endian=True)
-			self.horizontal = hexstring_to_int(self._raw[5:8], little_endian=False)
-			self.draw_style = hexstring_to_int(self._raw[8:10], little_endian=False)
-			self.font_style = hexstring_to_int(self._raw[10:12], little_endian=False)
-			self.text = utf16hexstring_to_utf8(self._raw[12:])
+			buffer = _raw_to_buffer(raw)
+			length, position, self.draw_style, self.font_style = _ENTITY_HEADER.unpack_from(buffer)
+			self.length = length*2
+			if len(buffer) != length+1:
+				raise Exception(f'Text packet length field does not match up with actual size, this packet is {len(buffer)} bytes')
+			self.vertical, self.horizontal = bytes_to_position(position)
+			self.text = utf16bytes_to_utf8(buffer[_ENTITY_HEADER.size:])
 		else:
 			self.length = 0
 			self.vertical = vertical
@@ -37,21 +146,30 @@ class EntityText:
 			self.font_style = font_style
 			self.text = text
 
+	@classmethod
+	def from_bytes(cls, buffer):
+		"""
+		Parse a binary text entity package
+		:param buffer: bytes, bytearray or memoryview
+		:return: EntityText
+		"""
+		return cls(raw=buffer)
+
+	def to_bytes(self) -> bytes:
+		"""
+		Build and return a binary text entity package
+		:return: bytes representing entity
+		"""
+		text = utf8_to_utf16bytes(self.text)
+		return _ENTITY_HEADER.pack(_ENTITY_HEADER.size - 1 + len(text), position_to_bytes(self.vertical, self.horizontal),
+									self.draw_style, self.font_style) + text
+
 	def __repr__(self):
 		"""
 		Build and return a text entity package
 		:return: str representing entity
 		"""
-		# Start with packet, then add length of packet
-		out = ""
-		out += int_to_hexstring(self.vertical, little_endian=True, number_of_hex_digits=3)
-		out += int_to_hexstring(self.horizontal, little_endian=False, number_of_hex_digits=3)
-		out += int_to_hexstring(self.draw_style, little_endian=False, number_of_hex_digits=2)
-		out += int_to_hexstring(self.font_style, little_endian=False, number_of_hex_digits=2)
-		out += utf8_to_utf16hexstring(self.text)
-		length = int_to_hexstring(int(len(out)/2), little_endian=False, number_of_hex_digits=2)
-		out = length + out
-		return out
+		return self.to_bytes().hex().upper()
 
 	def __str__(self):
 		"""
@@ -95,21 +213,20 @@ class EntityBarcode:
 		self.supported_barcodes = [FontStylesInv['Barcode EAN13'], FontStylesInv['Barcode 128'], FontStylesInv['Barcode EAN13 Double Size'], FontStylesInv['Barcode 128 Double Size']]
 		if len(raw) > 0:
 			self._raw = raw
-			self.length = hexstring_to_int(self._raw[0:2], little_endian=False)*2
-			if len(self._raw) != self.length+2:
-				raise Exception(f'Barcode packet length field does not match up with actual size, this string is {len(self._raw)} Packet: {self._raw}')
-			self.vertical = hexstring_to_int(self._raw[2:5], little_endian=True)
-			self.horizontal = hexstring_to_int(self._raw[5:8], little_endian=False)
-			self.draw_style = hexstring_to_int(self._raw[8:10], little_endian=False)
-			self.font_style = hexstring_to_int(self._raw[10:12], little_endian=False)
-			rawtext = self._raw[12:]
+			buffer = _raw_to_buffer(raw)
+			length, position, self.draw_style, self.font_style = _ENTITY_HEADER.unpack_from(buffer)
+			self.length = length*2
+			if len(buffer) != length+1:
+				raise Exception(f'Barcode packet length field does not match up with actual size, this packet is {len(buffer)} bytes')
+			self.vertical, self.horizontal = bytes_to_position(position)
+			rawtext = buffer[_ENTITY_HEADER.size:]
 			if self.font_style in [FontStylesInv['Barcode 128'], FontStylesInv['Barcode 128 Double Size']]:
-				self.text = rawtext[4:-8]  # Skip first start code, and last check digit and stop
+				self.text = rawtext[2:-4]  # Skip first start code, and last check digit and stop
 			if self.font_style in [FontStylesInv['Barcode EAN13'], FontStylesInv['Barcode EAN13 Double Size']]:
-				if len(rawtext) != (1*4)+(13*4)+(2*4):
+				if len(rawtext) != (1*2)+(13*2)+(2*2):
 					raise Exception("Can't read EAN 13, expected length to be 1 start + 13 digits + 2 stop.")
-				self.text = rawtext[4:-12]  # Skip first start code, and last check digit and stop
-			self.text = utf16hexstring_to_utf8(self.text)
+				self.text = rawtext[2:-6]  # Skip first start code, and last check digit and stop
+			self.text = utf16bytes_to_utf8(self.text)
 		else:
 			self.length = 0
 			self.vertical = vertical
@@ -138,23 +255,30 @@ class EntityBarcode:
 			self.suffix += "003D"  # Hardcoded for EAN13?
 			self.suffix += "008A"  # Stop 008A(UTF-16 VTS)
 
+	@classmethod
+	def from_bytes(cls, buffer):
+		"""
+		Parse a binary barcode entity package
+		:param buffer: bytes, bytearray or memoryview
+		:return: EntityBarcode
+		"""
+		return cls(raw=buffer)
+
+	def to_bytes(self) -> bytes:
+		"""
+		Build and return a binary barcode entity package
+		:return: bytes representing entity
+		"""
+		text = bytes.fromhex(self.prefix) + utf8_to_utf16bytes(self.text) + bytes.fromhex(self.suffix)
+		return _ENTITY_HEADER.pack(_ENTITY_HEADER.size - 1 + len(text), position_to_bytes(self.vertical, self.horizontal),
+									self.draw_style, self.font_style) + text
+
 	def __repr__(self):
 		"""
 		Build and return a barcode entity package
 		:return: str representing entity
 		"""
-		# Start with packet, then add length of packet
-		out = ""
-		out += int_to_hexstring(self.vertical, little_endian=True, number_of_hex_digits=3)
-		out += int_to_hexstring(self.horizontal, little_endian=False, number_of_hex_digits=3)
-		out += int_to_hexstring(self.draw_style, little_endian=False, number_of_hex_digits=2)
-		out += int_to_hexstring(self.font_style, little_endian=False, number_of_hex_digits=2)
-		out += self.prefix
-		out += utf8_to_utf16hexstring(self.text)
-		out += self.suffix
-		length = int_to_hexstring(int(len(out)/2), little_endian=False, number_of_hex_digits=2)
-		out = length + out
-		return out
+		return self.to_bytes().hex().upper()
 
 	def __str__(self):
 		"""
@@ -198,18 +322,15 @@ class EntityRectangle:
 	def __init__(self, raw="", vertical=0, horizontal=0, draw_style=0, height=0, width=0, border=0):
 		if len(raw) > 0:
 			self._raw = raw
-			self.length = hexstring_to_int(self._raw[0:2], little_endian=False)*2
-			if self.length != 22:
+			buffer = _raw_to_buffer(raw)
+			self.length = buffer[0]*2
+			if self.length != 22 or len(buffer) != _RECTANGLE.size:
 				raise Exception(f'Rectangle package is always 2+22 byte.')
-			self.vertical = hexstring_to_int(self._raw[2:5], little_endian=True)
-			self.horizontal = hexstring_to_int(self._raw[5:8], little_endian=False)
-			self.font_style = hexstring_to_int(self._raw[8:10], little_endian=False)
+			length, position, self.font_style, self.draw_style, self.height, self.width, self.border = \
+				_RECTANGLE.unpack(buffer)
+			self.vertical, self.horizontal = bytes_to_position(position)
 			if self.font_style != FontStylesInv['Rectangle']:
 				raise Exception(f'Font style must be 0x64(Rectangle) in a Rectangle package.')
-			self.draw_style = hexstring_to_int(self._raw[10:12], little_endian=False)
-			self.height = hexstring_to_int(self._raw[12:16], little_endian=False)
-			self.width = hexstring_to_int(self._raw[16:20], little_endian=False)
-			self.border = hexstring_to_int(self._raw[20:24], little_endian=False)
 		else:
 			self.length = 0
 			self.vertical = vertical
@@ -220,23 +341,29 @@ class EntityRectangle:
 			self.width = width
 			self.border = border
 
+	@classmethod
+	def from_bytes(cls, buffer):
+		"""
+		Parse a binary rectangle entity package
+		:param buffer: bytes, bytearray or memoryview
+		:return: EntityRectangle
+		"""
+		return cls(raw=buffer)
+
+	def to_bytes(self) -> bytes:
+		"""
+		Build and return a binary rectangle entity package
+		:return: bytes representing entity
+		"""
+		return _RECTANGLE.pack(_RECTANGLE.size - 1, position_to_bytes(self.vertical, self.horizontal), self.font_style,
+								self.draw_style, self.height, self.width, self.border)
+
 	def __repr__(self):
 		"""
 		Build and return a rectangle entity package
 		:return: str representing entity
 		"""
-		# Start with packet, then add length of packet
-		out = ""
-		out += int_to_hexstring(self.vertical, little_endian=True, number_of_hex_digits=3)
-		out += int_to_hexstring(self.horizontal, little_endian=False, number_of_hex_digits=3)
-		out += int_to_hexstring(self.font_style, little_endian=False, number_of_hex_digits=2)
-		out += int_to_hexstring(self.draw_style, little_endian=False, number_of_hex_digits=2)
-		out += int_to_hexstring(self.height, little_endian=False, number_of_hex_digits=4)
-		out += int_to_hexstring(self.width, little_endian=False, number_of_hex_digits=4)
-		out += int_to_hexstring(self.border, little_endian=False, number_of_hex_digits=4)
-		length = int_to_hexstring(int(len(out)/2), little_endian=False, number_of_hex_digits=2)
-		out = length + out
-		return out
+		return self.to_bytes().hex().upper()
 
 	def __str__(self):
 		"""
@@ -280,14 +407,12 @@ class EntityLine:
 	def __init__(self, raw="", vertical=0, horizontal=0, draw_style=0, font_style=0, border=0):
 		if len(raw) > 0:
 			self._raw = raw
-			self.length = hexstring_to_int(self._raw[0:2], little_endian=False)*2
-			if self.length != 14:
-				raise Exception(f'Rectangle package is always 2+14 byte.')
-			self.vertical = hexstring_to_int(self._raw[2:5], little_endian=True)
-			self.horizontal = hexstring_to_int(self._raw[5:8], little_endian=False)
-			self.draw_style = hexstring_to_int(self._raw[8:10], little_endian=False)
-			self.font_style = hexstring_to_int(self._raw[10:12], little_endian=False)
-			self.border = hexstring_to_int(self._raw[12:16], little_endian=False)
+			buffer = _raw_to_buffer(raw)
+			self.length = buffer[0]*2
+			if self.length != 14 or len(buffer) != _LINE.size:
+				raise Exception(f'Line package is always 2+14 byte.')
+			length, position, self.draw_style, self.font_style, self.border = _LINE.unpack(buffer)
+			self.vertical, self.horizontal = bytes_to_position(position)
 		else:
 			self.length = 0
 			self.vertical = vertical
@@ -298,21 +423,29 @@ class EntityLine:
 		if self.font_style not in [FontStylesInv["Horizontal Line"], FontStylesInv["Vertical Line"]]:
 			raise Exception("Draw style for line must be %02X (Horizontal Line) or %02X (Vertical Line)." % (FontStylesInv["Horizontal Line"], FontStylesInv["Vertical Line"]))
 
+	@classmethod
+	def from_bytes(cls, buffer):
+		"""
+		Parse a binary line entity package
+		:param buffer: bytes, bytearray or memoryview
+		:return: EntityLine
+		"""
+		return cls(raw=buffer)
+
+	def to_bytes(self) -> bytes:
+		"""
+		Build and return a binary line entity package
+		:return: bytes representing entity
+		"""
+		return _LINE.pack(_LINE.size - 1, position_to_bytes(self.vertical, self.horizontal), self.draw_style,
+							self.font_style, self.border)
+
 	def __repr__(self):
 		"""
 		Build and return a line entity package
 		:return: str representing entity
 		"""
-		# Start with packet, then add length of packet
-		out = ""
-		out += int_to_hexstring(self.vertical, little_endian=True, number_of_hex_digits=3)
-		out += int_to_hexstring(self.horizontal, little_endian=False, number_of_hex_digits=3)
-		out += int_to_hexstring(self.draw_style, little_endian=False, number_of_hex_digits=2)
-		out += int_to_hexstring(self.font_style, little_endian=False, number_of_hex_digits=2)
-		out += int_to_hexstring(self.border, little_endian=False, number_of_hex_digits=4)
-		length = int_to_hexstring(int(len(out)/2), little_endian=False, number_of_hex_digits=2)
-		out = length + out
-		return out
+		return self.to_bytes().hex().upper()
 
 	def __str__(self):
 		"""
@@ -352,10 +485,10 @@ class EntityLEDData:
 	def __init__(self, raw="", color_red=False, color_green=True, color_blue=False, service_code=0, flash_times=1):
 		if len(raw) > 0:
 			self._raw = raw
-			if len(self._raw) != 16:
-				raise Exception(f'LED Data package is always a 16 byte string, this string is {len(self._raw)} Packet: {self._raw}')
-			self.length = hexstring_to_int(self._raw[0:2], little_endian=False)
-			flash_color = hexstring_to_int(self._raw[2:4], little_endian=False)
+			buffer = _raw_to_buffer(raw)
+			if len(buffer) != _LED_DATA.size:
+				raise Exception(f'LED Data package is always a 16 byte string (8 bytes), this packet is {len(buffer)} bytes')
+			self.length, flash_color, self.service_code, hardcoded, self.flash_times = _LED_DATA.unpack(buffer)
 			if (flash_color & 1) == 1:
 				self.color_red = True
 			else:
@@ -368,8 +501,6 @@ class EntityLEDData:
 				self.color_blue = True
 			else:
 				self.color_blue = False
-			self.service_code = hexstring_to_int(self._raw[4:8], little_endian=False)
-			self.flash_times = hexstring_to_int(self._raw[12:16], little_endian=False)
 		else:
 			self.length = 0
 			self.color_red = color_red
@@ -378,10 +509,19 @@ class EntityLEDData:
 			self.service_code = service_code
 			self.flash_times = flash_times
 
-	def __repr__(self):
+	@classmethod
+	def from_bytes(cls, buffer):
 		"""
-		Build and return a LED data package
-		:return: str representing LED flash data
+		Parse a binary LED data package
+		:param buffer: bytes, bytearray or memoryview
+		:return: EntityLEDData
+		"""
+		return cls(raw=buffer)
+
+	def to_bytes(self) -> bytes:
+		"""
+		Build and return a binary LED data package
+		:return: bytes representing LED flash data
 		"""
 		flash_color = 0
 		if self.color_red:
@@ -390,15 +530,15 @@ class EntityLEDData:
 			flash_color += 2
 		if self.color_blue:
 			flash_color += 4
-		# Start with packet, then add length of packet
-		out = ""
-		out += int_to_hexstring(flash_color, little_endian=False, number_of_hex_digits=2)
-		out += int_to_hexstring(self.service_code, little_endian=False, number_of_hex_digits=4)
-		out += "00ED"  # Hardcoded value? it always seems fixed
-		out += int_to_hexstring(self.flash_times, little_endian=False, number_of_hex_digits=4)
-		length = int_to_hexstring(int(len(out)/2), little_endian=False, number_of_hex_digits=2)
-		out = length + out
-		return out
+		# 00ED Hardcoded value? it always seems fixed
+		return _LED_DATA.pack(_LED_DATA.size - 1, flash_color, self.service_code, 0x00ED, self.flash_times)
+
+	def __repr__(self):
+		"""
+		Build and return a LED data package
+		:return: str representing LED flash data
+		"""
+		return self.to_bytes().hex().upper()
 
 	def __str__(self):
 		"""
@@ -451,107 +591,372 @@ class EntityImage:
 	Width					4		00D7(215-1=214 (should be 212-1, but Demo tool scales image incorrectly)), 0127(296-1=295 (should be 292-1, but Demo tool scales image incorrectly))), 018F(400-1=399), 027F(640-1=239)
 	Size					8		00000004()
 	ImageData
+
+	The image types share the header, and differ in image data.
+	FC(ImageCompress)	RLE compressed pixels, see compress_pixel_bytes
+	FD(ImageX2)			RLE compressed pixels of a half size image, height and width is the half size, and the display
+						tag shows every pixel as 2x2 pixels
+	FE(Image)			Packed pixels, 8 pixels per byte most significant bit first, every row padded to a whole byte
+	Only FC is confirmed by captured packages, the layout of FD and FE is assumed from FC.
 	"""
-	def __init__(self, raw="", x: int = 0, y: int = 0, image: Image = None, colored_image: bool = False):
+	def __init__(self, raw="", x: int = 0, y: int = 0, image: Image = None, colored_image: bool = False,
+				optimal_compression: bool = False, auto_crop: bool = False,
+				image_type=FontStylesInv['ImageCompress'], x2_max_error: float = 0.0, parallel_compression: bool = False,
+				image_mode: str = 'RGB', lazy: bool = False, bit_planes: tuple = None):
+		"""
+		:param optimal_compression: bool True to compress with the smallest possible RLE encoding, slower to encode
+		:param auto_crop: bool True to only encode the bounding box of non white pixels, x and y of the package is
+		moved to the box, and a empty color part is left out even if colored_image is True
+		:param image_type: int FC(ImageCompress), FD(ImageX2) or FE(Image), or 'auto' to pick the smallest package, see
+		_select_image_type. ImageX2 is shown at twice the half size, so a odd width or height is refused, after auto_crop
+		if that is set, and 'auto' never picks it for them
+		:param x2_max_error: float part of the pixels that may differ for 'auto' to pick ImageX2, 0.0 only picks
+		ImageX2 for images that are already scaled up 2 times
+		:param parallel_compression: bool True to compress the black and the color plane on worker threads, see
+		compress_pixel_planes
+		:param image_mode: str mode of the image parsed from raw or decoded from bit_planes, 'RGB', 'P' with white, black
+		and red as palette index 0, 1 and 2, or '1' for packages without a color part, see bit_planes_to_image
+		:param lazy: bool True to only parse the headers of raw, the pixels are decoded the first time image is read
+		:param bit_planes: tuple of BitPlane black and color pixels instead of image, already classified like by
+		image_to_black_and_colored_bit_planes, color may be None if colored_image is False. The package is built from
+		them without classifying the pixels again, and the image is only decoded from them the first time it is read
+		"""
+		self.optimal_compression = optimal_compression
+		self.auto_crop = auto_crop
+		self.image_type = image_type
+		self.x2_max_error = x2_max_error
+		self.parallel_compression = parallel_compression
+		self.image_mode = image_mode
+		self._bit_planes = None  # Classified pixels the image is decoded from, see bit_planes
 		if len(raw) > 0:
 			self._raw = raw
-			if self._raw[0:2] != "FC":
-				raise Exception("Expected image to start with FC")
-			self.x = hexstring_to_int(self._raw[2:6], little_endian=False)
-			self.y = hexstring_to_int(self._raw[6:10], little_endian=False)
-			self.height = hexstring_to_int(self._raw[10:14], little_endian=False) + 1
-			self.width = hexstring_to_int(self._raw[14:18], little_endian=False) + 1
-			image_black_size = hexstring_to_int(self._raw[18:26], little_endian=False)*2
-			image_black_end = 26+image_black_size
-			image_black_compressed = self._raw[26:image_black_end]
-			image_black_raw = uncompress_pixel_array(image_black_compressed)
-			self.image = Image.new('RGB', (self.width, self.height), "white")  # Init blank image
-			pixel_string_to_image(self.image, image_black_raw)
+			buffer = _raw_to_buffer(raw)
+			image_type, self.x, self.y, height, width, image_black_size = _IMAGE_HEADER.unpack_from(buffer)
+			if image_type not in _IMAGE_TYPES:
+				raise Exception("Expected image to start with FC, FD or FE")
+			self.image_type = image_type
+			height += 1
+			width += 1
+			image_black_end = _IMAGE_HEADER.size+image_black_size
+			image_black_data = buffer[_IMAGE_HEADER.size:image_black_end]
+			image_color_data = None
 			# Check if there is more data, that would inicate color data
-			if (len(self._raw)-26) > image_black_size:
-				self.colored_image = True
-				color_part = self._raw[image_black_end:]
-				if color_part[0:3] != "FC8":
-					raise Exception("Expected color image to start with FC8")
-				color_x = hexstring_to_int(color_part[3:6], little_endian=False)
-				color_y = hexstring_to_int(color_part[6:10], little_endian=False)
-				color_height = hexstring_to_int(color_part[11:14], little_endian=False) + 1
-				color_width = hexstring_to_int(color_part[14:18], little_endian=False) + 1
+			if len(buffer) > image_black_end:
+				color_part = buffer[image_black_end:]
+				color_type, color_x, color_y, color_height, color_width, image_color_size = \
+					_IMAGE_HEADER.unpack_from(color_part)
+				if color_type != image_type or color_x >> 12 != 8:
+					raise Exception(f"Expected color image to start with {image_type:02X}8")
+				color_x &= 0x0FFF  # Remove the hardcoded 8 fillers
+				color_height = (color_height & 0x0FFF) + 1
+				color_width += 1
 				if color_x != self.x:
 					raise Exception(f"Expected color x parameter to be {self.x}, but it is {color_x}")
 				if color_y != self.y:
 					raise Exception(f"Expected color y parameter to be {self.y}, but it is {color_y}")
-				if color_height != self.height:
-					raise Exception(f"Expected color height parameter to be {self.height}, but it is {color_height}")
-				if color_width != self.width:
-					raise Exception(f"Expected color width parameter to be {self.width}, but it is {color_width}")
-				image_color_size = hexstring_to_int(color_part[18:26], little_endian=False)*2
-				image_color_compressed = color_part[26:]
-				if len(image_color_compressed) != image_color_size:
-					raise Exception(f"Expected color image to be {image_color_size} long, but it is {len(image_color_compressed)}")
-				image_color_raw = uncompress_pixel_array(image_color_compressed)
-				pixel_string_to_image(self.image, image_color_raw, (255, 0, 0))
+				if color_height != height:
+					raise Exception(f"Expected color height parameter to be {height}, but it is {color_height}")
+				if color_width != width:
+					raise Exception(f"Expected color width parameter to be {width}, but it is {color_width}")
+				image_color_data = color_part[_IMAGE_HEADER.size:]
+				if len(image_color_data) != image_color_size:
+					raise Exception(f"Expected color image to be {image_color_size} bytes long, but it is {len(image_color_data)}")
+			self.colored_image = image_color_data is not None
+			self.image_black_size = len(image_black_data)
+			self.image_color_size = 0 if image_color_data is None else len(image_color_data)
+			if image_mode == '1' and self.colored_image:
+				raise Exception("Image with a color part can't be decoded in mode 1, use mode P or RGB")
+			if lazy:
+				# Copy the image data, the buffer may be reused by the caller before the image is read
+				self._undecoded = (image_type, bytes(image_black_data),
+									None if image_color_data is None else bytes(image_color_data), width, height)
+				self._image = None
+				self._encoded = None
+				self._incremental = None
+				scale = 2 if image_type == FontStylesInv['ImageX2'] else 1  # The display shows ImageX2 twice as big
+				self.width = width * scale
+				self.height = height * scale
 			else:
-				self.colored_image = False
+				self.image = _decode_image(image_mode, image_type, image_black_data, image_color_data, width, height)
 		else:
 			self.x = x
 			self.y = y
-			self.image = image
+			if bit_planes is None:
+				self.image = image
+			else:
+				black, color = bit_planes
+				if color is None:
+					color = BitPlane(black.width, black.height)
+				elif (color.width, color.height) != (black.width, black.height):
+					raise Exception(f'Planes must be the same size, {black.width}x{black.height} and {color.width}x{color.height}')
+				self._image = None
+				self._undecoded = None
+				self._encoded = None
+				self._incremental = None
+				self._bit_planes = (black, color)
+				self.width = black.width
+				self.height = black.height
 			self.colored_image = colored_image
-			self.width = self.image.width
-			self.height = self.image.height
+
+	@property
+	def image(self) -> Image:
+		if self._image is None and self._undecoded is not None:
+			self._image = _decode_image(self.image_mode, *self._undecoded)
+			self._undecoded = None
+			self._rekey_cached_package()
+		elif self._image is None and self._bit_planes is not None:
+			# From now on the image may be drawn on in place, so the package is built from the image again
+			self._image = bit_planes_to_image(self._bit_planes[0], self._bit_planes[1] if self.colored_image else None,
+											self.image_mode)
+			self._bit_planes = None
+			self._rekey_cached_package()
+		return self._image
+
+	@image.setter
+	def image(self, image: Image):
+		self._image = image
+		self._undecoded = None  # Image data of a lazily parsed package, see lazy
+		self._bit_planes = None
+		self._encoded = None
+		self._incremental = None  # Image data and IncrementalPixelEncoder of the package, see update_rows
+		self.width = image.width
+		self.height = image.height
+
+	@property
+	def payload(self) -> str:
+		"""
+		Encoded image entity package, see encode()
+		"""
+		return self.encode()
+
+	def _cache_key(self) -> tuple:
+		"""
+		Key describing everything the encoded package depends on. A Pillow image can be drawn on in place, so the image
+		content is part of the key as a CRC-32 checksum, about a seventh of the time of a encode of a 640x384 image.
+		A image that isn't decoded yet, see lazy and bit_planes, can't have been drawn on and isn't checksummed.
+		:return: tuple
+		"""
+		image = self._image
+		if image is None:
+			image_key = None
+		else:
+			checksum = zlib.crc32(image.tobytes())
+			if image.mode == 'P':
+				checksum = zlib.crc32(bytes(image.getpalette() or []), checksum)
+			image_key = (image.mode, image.size, checksum)
+		return self.x, self.y, self.colored_image, self.optimal_compression, self.auto_crop, self.image_type, self.x2_max_error, image_key
+
+	def _rekey_cached_package(self):
+		"""
+		Keep the cached package when the image is decoded, it was built from the same pixels
+		"""
+		if self._encoded is not None and self._encoded[0][-1] is None:
+			self._encoded = (self._cache_key(),) + self._encoded[1:]
+
+	def _cached_package(self) -> tuple:
+		"""
+		The package is cached, and only rebuilt when the image content or any of the parameters have changed.
+		:return: tuple of cache key, binary package and hexadecimal package
+		"""
+		cache_key = self._cache_key()
+		if self._encoded is None or self._encoded[0] != cache_key:
+			package = self._encode()
+			self._encoded = (cache_key, package, package.hex().upper())
+		return self._encoded
+
+	def encode(self) -> str:
+		"""
+		Build and return a image entity package, cached until the image or its parameters change.
+		:return: str representing entity
+		"""
+		return self._cached_package()[2]
+
+	@classmethod
+	def from_bytes(cls, buffer, image_mode: str = 'RGB', lazy: bool = False):
+		"""
+		Parse a binary image entity package
+		:param buffer: bytes, bytearray or memoryview
+		:param image_mode: str mode of the parsed image, see __init__
+		:param lazy: bool True to decode the pixels the first time image is read
+		:return: EntityImage
+		"""
+		return cls(raw=buffer, image_mode=image_mode, lazy=lazy)
+
+	def to_bytes(self) -> bytes:
+		"""
+		Build and return a binary image entity package, cached until the image or its parameters change.
+		:return: bytes representing entity
+		"""
+		return self._cached_package()[1]
 
 	def __repr__(self):
 		"""
-		Build and return a text entity package
+		Build and return a image entity package
 		:return: str representing entity
 		"""
-		out = "FC"  # Start header for compressed image
-		out += int_to_hexstring(self.x, little_endian=False, number_of_hex_digits=4)
-		out += int_to_hexstring(self.y, little_endian=False, number_of_hex_digits=4)
-		out += int_to_hexstring(self.height-1, little_endian=False, number_of_hex_digits=4)
-		out += int_to_hexstring(self.width-1, little_endian=False, number_of_hex_digits=4)
-		self.image_black_raw, self.image_color_raw = image_to_black_and_colored_pixel_strings(self.image)
-		self.image_black_compressed = compress_pixel_array(self.image_black_raw)
-		out += int_to_hexstring(int(len(self.image_black_compressed)/2), little_endian=False, number_of_hex_digits=8)
-		out += self.image_black_compressed
-		if self.colored_image:
-			out += "FC"
-			out += "8"
-			out += int_to_hexstring(self.x, little_endian=False, number_of_hex_digits=3)
-			out += int_to_hexstring(self.y, little_endian=False, number_of_hex_digits=4)
-			out += "8"
-			out += int_to_hexstring(self.height - 1, little_endian=False, number_of_hex_digits=3)
-			out += int_to_hexstring(self.width - 1, little_endian=False, number_of_hex_digits=4)
-			self.image_color_compressed = compress_pixel_array(self.image_color_raw)
-			out += int_to_hexstring(int(len(self.image_color_compressed)/2), little_endian=False, number_of_hex_digits=8)
-			out += self.image_color_compressed
+		return self.encode()
+
+	def _encode(self) -> bytes:
+		"""
+		Build a binary image entity package without using the cache
+		:return: bytes representing entity
+		"""
+		# Keep pixels packed as bit planes, unpacked pixels use 8 times more memory
+		if self._bit_planes is None:
+			self.image_black_raw, self.image_color_raw = image_to_black_and_colored_bit_planes(self.image)
+		else:
+			self.image_black_raw, self.image_color_raw = self._bit_planes
+		image_black_raw, image_color_raw = self.image_black_raw, self.image_color_raw
+		x, y, width, height = self.x, self.y, self.width, self.height
+		colored_image = self.colored_image
+		if self.auto_crop:
+			if colored_image:
+				color_box = image_color_raw.bbox()
+				colored_image = color_box is not None
+			box = (image_black_raw | image_color_raw).bbox() if colored_image else image_black_raw.bbox()
+			if box is None:
+				box = (0, 0, 1, 1)  # A image can't be empty, send a single white pixel
+			if box != (0, 0, width, height):
+				image_black_raw = image_black_raw.crop(box)
+				image_color_raw = image_color_raw.crop(box)
+				x, y, width, height = x + box[0], y + box[1], box[2] - box[0], box[3] - box[1]
+		planes = [image_black_raw, image_color_raw] if colored_image else [image_black_raw]
+		if self.image_type == 'auto':
+			image_type, planes, image_data = self._select_image_type(planes)
+		else:
+			image_type = self.image_type
+			if image_type not in _IMAGE_TYPES:
+				raise Exception(f'Image type must be FC, FD, FE or auto, not {image_type}')
+			if image_type == FontStylesInv['ImageX2']:
+				if not _x2_possible(planes[0]):
+					raise Exception(f'ImageX2 needs a even width and height, not {planes[0].width}x{planes[0].height}')
+				planes = [_half_plane(plane) for plane in planes]
+			image_data = _encode_image_data(image_type, planes, self.optimal_compression, self.parallel_compression)
+		# Keep what update_rows needs to build on this package, it only handles greedy ImageCompress of the whole image
+		incremental = image_type == FontStylesInv['ImageCompress'] and self.image_type != 'auto' and \
+			not self.optimal_compression and not self.auto_crop
+		self._incremental = [image_data, None] if incremental else None
+		return self._build_package(image_type, x, y, planes, image_data, colored_image)
+
+	def _build_package(self, image_type: int, x: int, y: int, planes: list, image_data: list, colored_image: bool) \
+			-> bytes:
+		"""
+		Build a binary image entity package from encoded image data
+		:param planes: list of BitPlane black and optionally color, as sent
+		:param image_data: list of bytes image data for every plane
+		:return: bytes representing entity
+		"""
+		width, height = planes[0].width, planes[0].height  # ImageX2 sends the half size
+		self.encoded_image_type = image_type
+		self.encoded_region = (x, y, width, height)
+		self.encoded_colored_image = colored_image
+		self.image_black_compressed = image_data[0].hex().upper()
+		# Start header for image
+		out = _IMAGE_HEADER.pack(image_type, x, y, height-1, width-1, len(image_data[0]))
+		out += image_data[0]
+		if colored_image:
+			if x > 0xFFF or height-1 > 0xFFF:
+				raise Exception(f'Color part can only fit x and height in 3 hexadecimal digits, x {x} height {height}')
+			self.image_color_compressed = image_data[1].hex().upper()
+			# X and height have a hardcoded 8 as first hexadecimal digit in color part
+			out += _IMAGE_HEADER.pack(image_type, 0x8000 | x, y, 0x8000 | (height-1), width-1, len(image_data[1]))
+			out += image_data[1]
 		return out
 
+	def update_rows(self, top: int, bottom: int) -> str:
+		"""
+		Encode the image after only the rows from top to bottom have been drawn on in place, like when a price is drawn
+		again.
+		The rows are classified again and spliced in to the planes of the previous package, and only the span of the RLE
+		compressed data from the changed rows until the tokens line up with the previous package again is compressed,
+		see IncrementalPixelEncoder. The package is the same as from encode(), as long as no other rows were changed.
+		A full encode is done if there is no previous package to build on, or if any parameter or the image size has
+		changed. Only greedy ImageCompress packages without auto_crop are built on, others are always fully encoded.
+		:param top: int first changed row
+		:param bottom: int row after the last changed row
+		:return: str representing entity
+		"""
+		cache_key = self._cache_key()
+		if self._encoded is None or self._incremental is None or self._encoded[0][:-1] != cache_key[:-1] or \
+				self._encoded[0][-1] is None or self._encoded[0][-1][:2] != cache_key[-1][:2]:
+			return self.encode()
+		if self._encoded[0] == cache_key:
+			return self._encoded[2]
+		image_data, encoders = self._incremental
+		if encoders is None:
+			encoders = [IncrementalPixelEncoder(data) for data in image_data]
+		top = max(top, 0)
+		bottom = min(bottom, self.height)
+		planes = [self.image_black_raw, self.image_color_raw]
+		if top < bottom:
+			band = image_to_black_and_colored_bit_planes(self.image.crop((0, top, self.width, bottom)))
+			planes = [BitPlane(plane.width, plane.height, plane.data[:top*plane.stride] + changed.data +
+								plane.data[bottom*plane.stride:]) for plane, changed in zip(planes, band)]
+			self.image_black_raw, self.image_color_raw = planes
+		planes = planes[:len(image_data)]
+		image_data = [encoder.update(plane, top*plane.width, bottom*plane.width)
+						for plane, encoder in zip(planes, encoders)]
+		self._incremental = [image_data, encoders]
+		package = self._build_package(FontStylesInv['ImageCompress'], self.x, self.y, planes, image_data,
+									self.colored_image)
+		self._encoded = (cache_key, package, package.hex().upper())
+		return self._encoded[2]
+
+	def _select_image_type(self, planes: list) -> tuple:
+		"""
+		Pick the image type giving the smallest package.
+		The size of Image is known without encoding. The sizes of ImageCompress and of ImageX2 are estimated from the
+		runs of the planes, see estimate_compressed_size, and only the smallest is encoded. If the encoded data turns
+		out bigger than Image, Image is sent. ImageX2 is only tried for even sizes within x2_max_error. With
+		x2_max_error 0.0 it is ruled out as soon as a pair of rows differ. Without NumPy the candidates are compressed
+		to get their sizes, which costs about one encode per candidate.
+		:param planes: list of BitPlane black and optionally color
+		:return: tuple of image type, list of planes to send and list of bytes image data
+		"""
+		packed = (FontStylesInv['Image'], planes, [bytes(plane.data) for plane in planes])
+		packed_size = sum(map(len, packed[2]))
+		candidates = [(FontStylesInv['ImageCompress'], planes)]
+		if _x2_possible(planes[0]):
+			if self.x2_max_error > 0 or all(_rows_doubled(plane) for plane in planes):
+				half_planes = [_half_plane(plane) for plane in planes]
+				if all(_x2_error(plane, half) <= self.x2_max_error for plane, half in zip(planes, half_planes)):
+					candidates.append((FontStylesInv['ImageX2'], half_planes))
+		estimates = [sum(estimate_compressed_size(plane) for plane in candidate_planes)
+					for image_type, candidate_planes in candidates]
+		image_type, candidate_planes = candidates[estimates.index(min(estimates))]  # Ties favour ImageCompress
+		if min(estimates) > packed_size:
+			return packed
+		image_data = _encode_image_data(image_type, candidate_planes, self.optimal_compression,
+										self.parallel_compression)
+		if sum(map(len, image_data)) > packed_size:
+			return packed
+		return image_type, candidate_planes, image_data
+
 	def __str__(self):
 		"""
 		Build a human readable packet
 		:return: str
 		"""
-		repr = self.__repr__()
+		self.encode()  # Make sure the compressed parts are up to date
+		x, y, width, height = self.encoded_region
 		out = "Entity Image package\n"
 		out += "Part\t\t\t\t\tLength\tData\n"
-		out += "ImageType\t\t\t\t2\t\tFC(ImageCompress)\n"
-		out += "X\t\t\t\t\t\t4\t\t%s (%d)\n" % (int_to_hexstring(self.x, little_endian=False, number_of_hex_digits=4), self.x)
-		out += "Y\t\t\t\t\t\t4\t\t%s (%d)\n" % (int_to_hexstring(self.y, little_endian=False, number_of_hex_digits=4), self.y)
-		out += "Height\t\t\t\t\t4\t\t%s (%d-1=%d)\n" % (int_to_hexstring(self.height-1, little_endian=False, number_of_hex_digits=4), self.height, self.height-1)
-		out += "Width\t\t\t\t\t4\t\t%s (%d-1=%d)\n" % (int_to_hexstring(self.width-1, little_endian=False, number_of_hex_digits=4), self.width, self.width-1)
+		out += "ImageType\t\t\t\t2\t\t%02X(%s)\n" % (self.encoded_image_type, FontStyles[self.encoded_image_type])
+		out += "X\t\t\t\t\t\t4\t\t%s (%d)\n" % (int_to_hexstring(x, little_endian=False, number_of_hex_digits=4), x)
+		out += "Y\t\t\t\t\t\t4\t\t%s (%d)\n" % (int_to_hexstring(y, little_endian=False, number_of_hex_digits=4), y)
+		out += "Height\t\t\t\t\t4\t\t%s (%d-1=%d)\n" % (int_to_hexstring(height-1, little_endian=False, number_of_hex_digits=4), height, height-1)
+		out += "Width\t\t\t\t\t4\t\t%s (%d-1=%d)\n" % (int_to_hexstring(width-1, little_endian=False, number_of_hex_digits=4), width, width-1)
 		out += "Size\t\t\t\t\t8\t\t%s (%d/2=%d)\n" % (int_to_hexstring(int(len(self.image_black_compressed)/2), little_endian=False, number_of_hex_digits=8), len(self.image_black_compressed), int(len(self.image_black_compressed)/2))
 		out += "ImageData\t\t\t\t\t\t%s\n" % self.image_black_compressed
-		if self.colored_image:
+		if self.encoded_colored_image:
 			out += "Image color part follows.\n"
-			out += "ImageType\t\t\t\t2\t\tFC(ImageCompress)\n"
+			out += "ImageType\t\t\t\t2\t\t%02X(%s)\n" % (self.encoded_image_type, FontStyles[self.encoded_image_type])
 			out += "Filler\t\t\t\t\t1\t\t8 (Hardcoded for color part)\n"
-			out += "X\t\t\t\t\t\t3\t\t%s (%d)\n" % (int_to_hexstring(self.x, little_endian=False, number_of_hex_digits=3), self.x)
-			out += "Y\t\t\t\t\t\t4\t\t%s (%d)\n" % (int_to_hexstring(self.y, little_endian=False, number_of_hex_digits=4), self.y)
+			out += "X\t\t\t\t\t\t3\t\t%s (%d)\n" % (int_to_hexstring(x, little_endian=False, number_of_hex_digits=3), x)
+			out += "Y\t\t\t\t\t\t4\t\t%s (%d)\n" % (int_to_hexstring(y, little_endian=False, number_of_hex_digits=4), y)
 			out += "Filler\t\t\t\t\t1\t\t8 (Hardcoded for color part)\n"
-			out += "Height\t\t\t\t\t3\t\t%s (%d-1=%d)\n" % (int_to_hexstring(self.height-1, little_endian=False, number_of_hex_digits=3), self.height, self.height-1)
-			out += "Width\t\t\t\t\t4\t\t%s (%d-1=%d)\n" % (int_to_hexstring(self.width-1, little_endian=False, number_of_hex_digits=4), self.width, self.width-1)
+			out += "Height\t\t\t\t\t3\t\t%s (%d-1=%d)\n" % (int_to_hexstring(height-1, little_endian=False, number_of_hex_digits=3), height, height-1)
+			out += "Width\t\t\t\t\t4\t\t%s (%d-1=%d)\n" % (int_to_hexstring(width-1, little_endian=False, number_of_hex_digits=4), width, width-1)
 			out += "Size\t\t\t\t\t8\t\t%s (%d/2=%d)\n" % (int_to_hexstring(int(len(self.image_color_compressed)/2), little_endian=False, number_of_hex_digits=8), len(self.image_color_compressed), int(len(self.image_color_compressed)/2))
 			out += "ImageData\t\t\t\t\t\t%s\n" % self.image_color_compressed
 		return out
@@ -576,15 +981,21 @@ class Answer:
 	def __init__(self, raw="", service_code=0, display_tag_id="", rssi=0, tag_status=0, volt=0.0, temperature=0):
 		if len(raw) > 0:
 			self._raw = raw
-			if len(self._raw) != 23:
-				raise Exception(f'Answer package is always a 23 byte string, this string is {len(self._raw)} Packet: {self._raw}')
-			self.length = hexstring_to_int(self._raw[1:5], little_endian=False)
-			self.service_code = hexstring_to_int(self._raw[5:9], little_endian=False)
-			self.display_tag_id = self._raw[9:15]
-			self.rssi = hexstring_to_int(self._raw[15:17], little_endian=False)-254
-			self.tag_status = hexstring_to_int(self._raw[17:19], little_endian=False)
-			self.volt = float(hexstring_to_int(self._raw[19:21], little_endian=False))/10
-			self.temperature = hexstring_to_int(self._raw[21:23], little_endian=False)
+			if isinstance(raw, str):
+				if len(self._raw) != 23:
+					raise Exception(f'Answer package is always a 23 byte string, this string is {len(self._raw)} Packet: {self._raw}')
+				buffer = raw[0].encode('ascii') + bytes.fromhex(raw[1:])
+			else:
+				buffer = memoryview(raw)
+				if len(buffer) != _ANSWER.size:
+					raise Exception(f'Binary answer package is always {_ANSWER.size} bytes, this packet is {len(buffer)} bytes')
+			start, self.length, self.service_code, display_tag_id, rssi, self.tag_status, volt, self.temperature = \
+				_ANSWER.unpack(buffer)
+			if start != b'@':
+				raise Exception('Answer package must start with @')
+			self.display_tag_id = display_tag_id.hex().upper()
+			self.rssi = rssi-254
+			self.volt = float(volt)/10
 		else:
 			self.length = 0
 			self.service_code = service_code
@@ -594,22 +1005,34 @@ class Answer:
 			self.volt = volt
 			self.temperature = temperature
 
+	@classmethod
+	def from_bytes(cls, buffer):
+		"""
+		Parse a binary answer package, that is @ followed by the package in binary instead of hexadecimal
+		:param buffer: bytes, bytearray or memoryview
+		:return: Answer
+		"""
+		return cls(raw=buffer)
+
+	def to_bytes(self) -> bytes:
+		"""
+		Build and return a binary answer package, that is @ followed by the package in binary instead of hexadecimal
+		:return: bytes representing answer package
+		"""
+		display_tag_id = bytes.fromhex(self.display_tag_id)
+		if len(display_tag_id) != 3:
+			raise Exception(f'Display Tag ID must be 6 hexadecimal digits, not {self.display_tag_id}')
+		# Length counts the hexadecimal digits after the length field
+		length = (_ANSWER.size - 3) * 2
+		return _ANSWER.pack(b'@', length, self.service_code, display_tag_id, self.rssi+254, self.tag_status,
+							int(self.volt*10), self.temperature)
+
 	def __repr__(self):
 		"""
 		Build and return a answer package
 		:return: str representing answer package
 		"""
-		# Start with packet, add start and length after
-		out = ""
-		out += int_to_hexstring(self.service_code, little_endian=False, number_of_hex_digits=4)
-		out += self.display_tag_id
-		out += int_to_hexstring(self.rssi+254, little_endian=False, number_of_hex_digits=2)
-		out += int_to_hexstring(self.tag_status, little_endian=False, number_of_hex_digits=2)
-		out += int_to_hexstring(int(self.volt*10), little_endian=False, number_of_hex_digits=2)
-		out += int_to_hexstring(self.temperature, little_endian=False, number_of_hex_digits=2)
-		length = int_to_hexstring(len(out), little_endian=False, number_of_hex_digits=4)
-		out = '@' + length + out
-		return out
+		return '@' + self.to_bytes()[1:].hex().upper()
 
 	def __str__(self):
 		"""
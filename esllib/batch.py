@@ -0,0 +1,309 @@
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from multiprocessing import shared_memory
+
+from esllib.bitplane import BitPlane
+from esllib.conversion import write_black_and_colored_bit_planes
+from esllib.Package import EntityImage
+
+# Parameters of EntityImage that the package depends on besides the image, copied to the worker process
+_IMAGE_PARAMETERS = ('x', 'y', 'colored_image', 'optimal_compression', 'auto_crop', 'image_type', 'x2_max_error')
+
+
+def _prepare_chunk(labels: list) -> tuple:
+	"""
+	Split the labels of a chunk in to entities encoded right away and images to encode in a worker process.
+	:param labels: list of labels, every label is a list of entities
+	:return: tuple of list of Pillow images, int total size of the bit planes of the images, and list of labels where
+	every part is bytes of a encoded entity, or a tuple describing where the bit planes of a image go
+	"""
+	images = []
+	offset = 0
+	jobs = []
+	for label in labels:
+		parts = []
+		for entity in label:
+			if isinstance(entity, EntityImage):
+				image = entity.image
+				parameters = tuple(getattr(entity, name) for name in _IMAGE_PARAMETERS)
+				# The color plane is only sent if it is used
+				size = (2 if entity.colored_image else 1) * ((image.width + 7) // 8) * image.height
+				parts.append((offset, image.size, parameters))
+				images.append((offset, image, entity.colored_image))
+				offset += size
+			else:
+				parts.append(entity.to_bytes())  # Other entities are cheaper to encode than to send to a worker
+		jobs.append(parts)
+	return images, offset, jobs
+
+
+def _write_planes(images: list, buffer):
+	"""
+	Classify the pixels of the images of a chunk, and write the packed bit planes straight in to the buffer
+	:param images: list of (offset, Pillow image, bool colored) from _prepare_chunk
+	:param buffer: writable buffer, like the shared memory block of the chunk
+	"""
+	for offset, image, colored in images:
+		with memoryview(buffer)[offset:] as planes:
+			write_black_and_colored_bit_planes(image, planes, colored)
+
+
+def _encode_jobs(jobs: list, buffer) -> list:
+	"""
+	Encode the labels of a chunk
+	:param jobs: list of labels from _prepare_chunk
+	:param buffer: memoryview of the bit planes of the chunk, or None if the chunk has no images
+	:return: list of bytes payload for every label
+	"""
+	payloads = []
+	for parts in jobs:
+		payload = []
+		for part in parts:
+			if isinstance(part, bytes):
+				payload.append(part)
+				continue
+			offset, (width, height), parameters = part
+			parameters = dict(zip(_IMAGE_PARAMETERS, parameters))
+			plane_size = (width + 7) // 8 * height
+			black = BitPlane(width, height, buffer[offset:offset+plane_size])
+			color = None
+			if parameters['colored_image']:
+				color = BitPlane(width, height, buffer[offset+plane_size:offset+2*plane_size])
+			payload.append(EntityImage(bit_planes=(black, color), **parameters).to_bytes())
+		payloads.append(b''.join(payload))
+	return payloads
+
+
+def _encode_chunk(block_name, jobs: list) -> list:
+	"""
+	Encode the labels of a chunk in a worker process, reading the pixels from the shared memory block
+	:param block_name: str name of shared memory block, or None if the chunk has no images
+	:param jobs: list of labels from _prepare_chunk
+	:return: list of bytes payload for every label
+	"""
+	if block_name is None:
+		return _encode_jobs(jobs, None)
+	block = shared_memory.SharedMemory(name=block_name)
+	try:
+		return _encode_jobs(jobs, block.buf)
+	finally:
+		block.close()  # The block belongs to the parent process, that reuses it for a later chunk
+
+
+class BatchEncoder:
+	"""
+	Encode the payloads of many labels on a pool of processes, like when a whole store is updated at once.
+
+	A label is a list of entities, and the result of a label is its payload, see encode_payload. Labels are taken from
+	the iterable in chunks of chunk_size labels. Every chunk is one task for the pool. The pixels of its images are
+	classified in this process and packed as bit planes straight in to a shared memory block, 1 bit per pixel instead
+	of 24 for RGB, and the workers compress them. The other entities are encoded right away since that is cheaper than
+	sending them to a worker. Blocks are reused for later chunks once a chunk is done.
+	At most max_pending_chunks chunks are in flight, so labels are only read from the iterable as fast as the pool
+	encodes them, and results that are not consumed stop new chunks from being started.
+	The package cache of the EntityImage objects is not used or updated, every image is encoded by a worker.
+
+	with BatchEncoder(processes=16) as encoder:
+		for payload in encoder.encode(labels):
+			...
+	"""
+	def __init__(self, processes: int = None, chunk_size: int = 64, max_pending_chunks: int = None, mp_context=None):
+		"""
+		:param processes: int number of worker processes, None for the number of CPUs, 0 to encode in this process
+		:param chunk_size: int number of labels per task
+		:param max_pending_chunks: int number of chunks in flight, None for twice the number of processes
+		:param mp_context: multiprocessing context of the pool, None for the default
+		"""
+		if processes is None:
+			processes = os.cpu_count() or 1
+		if chunk_size < 1:
+			raise Exception(f'Chunk size must be at least 1 label, not {chunk_size}')
+		self.processes = processes
+		self.chunk_size = chunk_size
+		self.max_pending_chunks = max_pending_chunks or 2 * max(processes, 1)
+		self.mp_context = mp_context
+		self.labels = 0
+		self.chunks = 0
+		self._pool = None
+		self._blocks = []  # Shared memory blocks of finished chunks, reused for the next chunks
+
+	def start(self):
+		"""
+		Start the worker processes, done by the first encode if not called
+		"""
+		if self._pool is None and self.processes > 0:
+			self._pool = ProcessPoolExecutor(self.processes, mp_context=self.mp_context)
+
+	def close(self):
+		"""
+		Stop the worker processes and remove the shared memory blocks
+		"""
+		if self._pool is not None:
+			self._pool.shutdown()
+			self._pool = None
+		for block in self._blocks:
+			block.close()
+			block.unlink()
+		self._blocks = []
+
+	def __enter__(self):
+		self.start()
+		return self
+
+	def __exit__(self, exc_type, exc, traceback):
+		self.close()
+
+	def _chunks(self, labels):
+		"""
+		:return: generator of (index of first label, list of labels)
+		"""
+		chunk = []
+		index = 0
+		for label in labels:
+			chunk.append(label)
+			if len(chunk) == self.chunk_size:
+				yield index, chunk
+				index += len(chunk)
+				chunk = []
+		if chunk:
+			yield index, chunk
+
+	def _submit(self, chunk: list) -> tuple:
+		"""
+		Write the bit planes of the images in a chunk to a shared memory block, so the images are not pickled
+		:return: tuple of future of the list of payloads, and the shared memory block to release when it is done
+		"""
+		images, size, jobs = _prepare_chunk(chunk)
+		self.labels += len(chunk)
+		self.chunks += 1
+		block = None
+		if size:
+			block = self._allocate(size)
+			_write_planes(images, block.buf)
+		return self._pool.submit(_encode_chunk, block.name if block else None, jobs), block
+
+	def _take(self, pending: deque) -> list:
+		"""
+		Wait for the oldest chunk in flight
+		:return: list of bytes payload
+		"""
+		future, block = pending.popleft()
+		try:
+			return future.result()
+		finally:
+			self._release(block)
+
+	def _allocate(self, size: int):
+		"""
+		:return: SharedMemory block of at least size bytes, a released block is reused if it is big enough
+		"""
+		for i, block in enumerate(self._blocks):
+			if block.size >= size:
+				return self._blocks.pop(i)
+		# Writing to a new block is slower than to a reused one, since every page of it is mapped on the first write
+		return shared_memory.SharedMemory(create=True, size=size)
+
+	def _release(self, block):
+		"""
+		Keep a block of a finished chunk for the next chunks, blocks beyond the chunks in flight are removed
+		"""
+		if block is None:
+			return
+		if len(self._blocks) < self.max_pending_chunks:
+			self._blocks.append(block)
+		else:
+			block.close()
+			block.unlink()
+
+	def encode(self, labels):
+		"""
+		Encode labels, the payloads are yielded in the same order as the labels
+		:param labels: iterable of labels, every label is a list of entities
+		:return: generator of bytes payload
+		"""
+		if self.processes == 0:
+			for index, chunk in self._chunks(labels):
+				yield from self._encode_here(chunk)
+			return
+		self.start()
+		pending = deque()
+		chunks = self._chunks(labels)
+		try:
+			for index, chunk in chunks:
+				pending.append(self._submit(chunk))
+				if len(pending) >= self.max_pending_chunks:
+					yield from self._take(pending)
+			while pending:
+				yield from self._take(pending)
+		finally:
+			self._abandon(pending)
+
+	def encode_as_completed(self, labels):
+		"""
+		Encode labels, the payloads are yielded chunk by chunk as soon as a chunk is done
+		:param labels: iterable of labels, every label is a list of entities
+		:return: generator of (int index of the label, bytes payload)
+		"""
+		if self.processes == 0:
+			for index, chunk in self._chunks(labels):
+				yield from enumerate(self._encode_here(chunk), index)
+			return
+		self.start()
+		pending = {}  # Future to (index of first label, shared memory block)
+		chunks = self._chunks(labels)
+		try:
+			exhausted = False
+			while pending or not exhausted:
+				while not exhausted and len(pending) < self.max_pending_chunks:
+					chunk = next(chunks, None)
+					if chunk is None:
+						exhausted = True
+						break
+					future, block = self._submit(chunk[1])
+					pending[future] = (chunk[0], block)
+				if not pending:
+					break
+				done, _ = wait(pending, return_when=FIRST_COMPLETED)
+				for future in done:
+					index, block = pending.pop(future)
+					self._release(block)
+					yield from enumerate(future.result(), index)
+		finally:
+			self._abandon([(future, block) for future, (index, block) in pending.items()])
+
+	def _abandon(self, pending):
+		"""
+		Cancel chunks that are still in flight when the consumer stops early or a chunk failed
+		:param pending: iterable of (future, shared memory block)
+		"""
+		for future, block in pending:
+			future.cancel()
+			try:
+				future.exception()  # Wait for a running chunk, so its block is not reused while it is read
+			except Exception:
+				pass
+			self._release(block)
+
+	def _encode_here(self, chunk: list) -> list:
+		"""
+		Encode a chunk in this process, through the same path as the workers
+		"""
+		images, size, jobs = _prepare_chunk(chunk)
+		self.labels += len(chunk)
+		self.chunks += 1
+		buffer = bytearray(size)
+		_write_planes(images, buffer)
+		return _encode_jobs(jobs, memoryview(buffer))
+
+
+def encode_labels(labels, processes: int = None, chunk_size: int = 64) -> list:
+	"""
+	Encode the payloads of many labels on a pool of processes, see BatchEncoder
+	:param labels: iterable of labels, every label is a list of entities
+	:param processes: int number of worker processes, None for the number of CPUs
+	:param chunk_size: int number of labels per task
+	:return: list of bytes payload, in the same order as the labels
+	"""
+	with BatchEncoder(processes, chunk_size) as encoder:
+		return list(encoder.encode(labels))
@@ -0,0 +1,181 @@
+from PIL import Image
+try:
+	import numpy
+except ImportError:
+	numpy = None  # Optional, used for vectorized packing and unpacking
+
+# Lookup tables between one byte per pixel and 8 pixels packed in a byte, most significant bit first
+_PACK = {bytes((value >> (7-i)) & 1 for i in range(8)): value for value in range(256)}
+_UNPACK = [bytes((value >> (7-i)) & 1 for i in range(8)) for value in range(256)]
+_INVERT = bytes(255 - value for value in range(256))
+# Single pixel indexed by pixel value
+_PIXEL_BYTE = (b'\x00', b'\x01')
+
+
+class BitPlane:
+	"""
+	Pixel plane with one bit per pixel, 1 is a filled pixel and 0 is a non filled pixel.
+	The bits are packed most significant bit first, and every row is padded to a whole byte.
+	That is the same layout as a Pillow image in mode '1', so a 640x384 plane is 30720 bytes.
+	"""
+	def __init__(self, width: int, height: int, data: bytes = None):
+		"""
+		:param width: int number of pixels in a row
+		:param height: int number of rows
+		:param data: bytes packed pixels, a blank plane is created if omitted
+		"""
+		self.width = width
+		self.height = height
+		self.stride = (width + 7) // 8  # Bytes per row
+		if data is None:
+			self.data = bytearray(self.stride * height)
+		else:
+			if len(data) != self.stride * height:
+				raise Exception(f'Expected {self.stride * height} bytes for a {width}x{height} plane, got {len(data)}')
+			self.data = bytearray(data)
+
+	@classmethod
+	def from_pixels(cls, pixels: bytes, width: int, height: int):
+		"""
+		Pack pixels with one byte per pixel in to a bit plane.
+		Missing pixels are treated as non filled, and pixels outside of the plane are dropped.
+
+		:param pixels: bytes (or list of ints) in row-major order, 0 is a non filled pixel, 1 is a filled pixel
+		:param width: int number of pixels in a row
+		:param height: int number of rows
+		:return: BitPlane
+		"""
+		pixel_total = width * height
+		pixels = bytes(pixels[:pixel_total])
+		if len(pixels) < pixel_total:
+			pixels = pixels.ljust(pixel_total, b'\x00')
+		if numpy is not None:
+			rows = numpy.frombuffer(pixels, dtype=numpy.uint8).reshape(height, width)
+			return cls(width, height, numpy.packbits(rows, axis=1).tobytes())
+		row_padding = (width + 7) // 8 * 8 - width
+		if row_padding:
+			pixels = b''.join(pixels[y*width:(y+1)*width] + bytes(row_padding) for y in range(height))
+		return cls(width, height, bytes(_PACK[pixels[i:i+8]] for i in range(0, len(pixels), 8)))
+
+	@classmethod
+	def from_image(cls, image: Image):
+		"""
+		Create a bit plane from the black pixels of a Pillow image in mode '1'.
+
+		:param image: Pillow Image in mode '1'
+		:return: BitPlane
+		"""
+		if image.mode != '1':
+			raise Exception(f'Expected a image in mode 1, got {image.mode}')
+		# Mode 1 stores white as a set bit, so invert every byte and then clear the row padding again
+		plane = cls(image.width, image.height, image.tobytes().translate(_INVERT))
+		row_padding = plane.stride * 8 - plane.width
+		if row_padding:
+			mask = (0xFF << row_padding) & 0xFF
+			for i in range(plane.stride - 1, len(plane.data), plane.stride):
+				plane.data[i] &= mask
+		return plane
+
+	def to_pixels(self) -> bytes:
+		"""
+		Unpack the plane to one byte per pixel in row-major order.
+
+		:return: bytes 0 is a non filled pixel, 1 is a filled pixel
+		"""
+		if numpy is not None:
+			rows = numpy.frombuffer(self.data, dtype=numpy.uint8).reshape(self.height, self.stride)
+			return numpy.unpackbits(rows, axis=1)[:, :self.width].tobytes()
+		pixels = b''.join(map(_UNPACK.__getitem__, self.data))
+		if self.stride * 8 != self.width:
+			row_length = self.stride * 8
+			pixels = b''.join(pixels[y*row_length:y*row_length+self.width] for y in range(self.height))
+		return pixels
+
+	def to_mask(self) -> Image:
+		"""
+		Create a Pillow image in mode '1' where filled pixels are set (white), suitable as a mask when pasting.
+
+		:return: Pillow Image in mode '1'
+		"""
+		return Image.frombytes('1', (self.width, self.height), bytes(self.data))
+
+	def to_image(self) -> Image:
+		"""
+		Create a Pillow image in mode '1' where filled pixels are black, the opposite of from_image.
+
+		:return: Pillow Image in mode '1'
+		"""
+		return Image.frombytes('1', (self.width, self.height), bytes(self.data).translate(_INVERT))
+
+	def bbox(self):
+		"""
+		Find the bounding box of the filled pixels.
+
+		:return: tuple (left, upper, right, lower) like Pillow boxes, or None if there are no filled pixels
+		"""
+		return self.to_mask().getbbox()
+
+	def crop(self, box: tuple):
+		"""
+		Create a plane from a region of this plane.
+
+		:param box: tuple (left, upper, right, lower) like Pillow boxes
+		:return: BitPlane
+		"""
+		region = self.to_mask().crop(box)
+		return BitPlane(region.width, region.height, region.tobytes())
+
+	def __or__(self, other):
+		"""
+		:return: BitPlane where pixels filled in either plane are filled
+		"""
+		if (self.width, self.height) != (other.width, other.height):
+			raise Exception(f'Planes must be the same size, {self.width}x{self.height} and {other.width}x{other.height}')
+		size = len(self.data)
+		return BitPlane(self.width, self.height,
+						(int.from_bytes(self.data, 'big') | int.from_bytes(other.data, 'big')).to_bytes(size, 'big'))
+
+	def row(self, y: int) -> bytes:
+		"""
+		Unpack one row of the plane.
+
+		:param y: int row number
+		:return: bytes one byte per pixel, 0 is a non filled pixel, 1 is a filled pixel
+		"""
+		if not 0 <= y < self.height:
+			raise IndexError(f'Row {y} is outside of plane with {self.height} rows')
+		packed = self.data[y*self.stride:(y+1)*self.stride]
+		return b''.join(map(_UNPACK.__getitem__, packed))[:self.width]
+
+	def get(self, x: int, y: int) -> int:
+		"""
+		:param x: int column
+		:param y: int row
+		:return: int 1 if pixel is filled, otherwise 0
+		"""
+		return (self.data[y*self.stride + (x >> 3)] >> (7 - (x & 7))) & 1
+
+	def runs(self):
+		"""
+		Iterate over runs of equal pixels in row-major order, runs continues across rows like the RLE compression does.
+
+		:return: generator of (pixel, length) tuples
+		"""
+		pixels = self.to_pixels()
+		pixel_total = len(pixels)
+		position = 0
+		while position < pixel_total:
+			pixel = pixels[position]
+			color_change = pixels.find(_PIXEL_BYTE[pixel ^ 1], position)
+			if color_change == -1:
+				color_change = pixel_total
+			yield pixel, color_change - position
+			position = color_change
+
+	def __len__(self):
+		return self.width * self.height
+
+	def __eq__(self, other):
+		if not isinstance(other, BitPlane):
+			return NotImplemented
+		return self.width == other.width and self.height == other.height and self.data == other.data
@@ -0,0 +1,134 @@
+import hashlib
+import threading
+from collections import OrderedDict
+
+
+class CompressedPlaneCache:
+	"""
+	LRU (Least Recently Used) cache of RLE compressed pixel planes, keyed by a hash of the plane content and dimensions.
+	Identical artwork (logos, badges, banners) shown on many display tags is then only compressed once per process.
+	The cache is limited by the total number of bytes of keys and compressed data it holds.
+	"""
+	def __init__(self, max_bytes: int = 16*1024*1024):
+		"""
+		:param max_bytes: int byte budget for keys and compressed data
+		"""
+		self.max_bytes = max_bytes
+		self.size = 0
+		self.hits = 0
+		self.misses = 0
+		self.evictions = 0
+		self._entries = OrderedDict()
+		self._lock = threading.Lock()
+
+	@staticmethod
+	def key(pixels: bytes, width: int, height: int, encoder: str = 'greedy') -> bytes:
+		"""
+		Build a cache key for a pixel plane
+
+		:param pixels: bytes content of the plane, packed or one byte per pixel
+		:param width: int width of plane
+		:param height: int height of plane
+		:param encoder: str name of the RLE encoder, different encoders give different compressed data
+		:return: bytes key
+		"""
+		digest = hashlib.sha256(b'%s:%d:%d:%d:' % (encoder.encode(), width, height, len(pixels)))
+		digest.update(pixels)
+		return digest.digest()
+
+	def get(self, key: bytes):
+		"""
+		Look up compressed data, and mark it as recently used
+
+		:param key: bytes key from CompressedPlaneCache.key()
+		:return: bytes compressed data, or None if not cached
+		"""
+		with self._lock:
+			compressed = self._entries.get(key)
+			if compressed is None:
+				self.misses += 1
+				return None
+			self._entries.move_to_end(key)
+			self.hits += 1
+			return compressed
+
+	def put(self, key: bytes, compressed: bytes):
+		"""
+		Store compressed data, least recently used entries are evicted to stay within the byte budget
+
+		:param key: bytes key from CompressedPlaneCache.key()
+		:param compressed: bytes compressed data
+		"""
+		compressed = bytes(compressed)
+		entry_size = len(key) + len(compressed)
+		if entry_size > self.max_bytes:
+			return  # Would evict everything else and still not fit
+		with self._lock:
+			previous = self._entries.pop(key, None)
+			if previous is not None:
+				self.size -= len(key) + len(previous)
+			self._entries[key] = compressed
+			self.size += entry_size
+			while self.size > self.max_bytes:
+				evicted_key, evicted = self._entries.popitem(last=False)
+				self.size -= len(evicted_key) + len(evicted)
+				self.evictions += 1
+
+	def clear(self):
+		"""
+		Remove all entries and reset statistics
+		"""
+		with self._lock:
+			self._entries.clear()
+			self.size = 0
+			self.hits = 0
+			self.misses = 0
+			self.evictions = 0
+
+	def stats(self) -> dict:
+		"""
+		:return: dict with hits, misses, evictions, entries, size and max_bytes
+		"""
+		with self._lock:
+			return {
+				'hits': self.hits,
+				'misses': self.misses,
+				'evictions': self.evictions,
+				'entries': len(self._entries),
+				'size': self.size,
+				'max_bytes': self.max_bytes
+			}
+
+	def __len__(self):
+		return len(self._entries)
+
+
+_compression_cache = None
+
+
+def enable_compression_cache(max_bytes: int = 16*1024*1024) -> CompressedPlaneCache:
+	"""
+	Enable the process wide cache of compressed pixel planes, used by compress_pixel_array and EntityImage.
+	Calling it again replaces the cache with a new empty one.
+
+	:param max_bytes: int byte budget for keys and compressed data
+	:return: CompressedPlaneCache
+	"""
+	global _compression_cache
+	_compression_cache = CompressedPlaneCache(max_bytes)
+	return _compression_cache
+
+
+def disable_compression_cache():
+	"""
+	Disable the process wide cache of compressed pixel planes
+	"""
+	global _compression_cache
+	_compression_cache = None
+
+
+def get_compression_cache():
+	"""
+	:return: CompressedPlaneCache if enabled, otherwise None
+	"""
+	return _compression_cache
@@ -1,4 +1,20 @@
+from bisect import bisect_left, bisect_right
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
 from PIL import Image
+from esllib.bitplane import BitPlane
+from esllib.cache import CompressedPlaneCache, get_compression_cache
+try:
+	import numpy
+except ImportError:
+	numpy = None  # Optional, used for vectorized image classification
+
+
+# Two digit uppercase hexadecimal string of every byte value
+_HEX_BYTE = tuple('%02X' % value for value in range(256))
+# Widths of little endian numbers in the protocol, converted through bytes instead of reversing digit pairs
+_LITTLE_ENDIAN_WIDTHS = (3, 4, 8)
 
 
 def int_to_hexstring(number: int, little_endian: bool, number_of_hex_digits: int) -> str:
@@ -9,20 +25,31 @@ def int_to_hexstring(number: int, little_endian: bool, number_of_hex_digits: int
 	:param number_of_hex_digits: int number of hexadecimal digits  in string
 	:return: hexadecimal string
 	"""
+	if not little_endian:
+		if number_of_hex_digits == 2 and 0 <= number <= 0xFF:
+			return _HEX_BYTE[number]  # Fast path for a single byte, the most common width
+		hex_string = '%X' % number
+		# Validate number of digits
+		if len(hex_string) > number_of_hex_digits:
+			raise Exception(f'Number {number} 0x{hex_string} cant fit in {number_of_hex_digits} hexadecimal digits.')
+		# Pad leading zeros
+		return hex_string.rjust(number_of_hex_digits, '0')
+	# Fast paths for the little endian widths used by the protocol
+	if number_of_hex_digits in _LITTLE_ENDIAN_WIDTHS and 0 <= number < 1 << number_of_hex_digits * 4:
+		if number_of_hex_digits == 3:
+			# Lowest byte first, then the single high digit
+			return _HEX_BYTE[number & 0xFF] + '%X' % (number >> 8)
+		return number.to_bytes(number_of_hex_digits >> 1, 'little').hex().upper()
+	if number_of_hex_digits == 2 and 0 <= number <= 0xFF:
+		return _HEX_BYTE[number]
 	hex_string = '%X' % number
 	# Validate number of digits
 	if len(hex_string) > number_of_hex_digits:
 		raise Exception(f'Number {number} 0x{hex_string} cant fit in {number_of_hex_digits} hexadecimal digits.')
 	# Pad leading zeros
 	hex_string = hex_string.rjust(number_of_hex_digits, '0')
-	if little_endian:
-		# Reverse order in pair of 2, from right
-		hex_string_reversed = ""
-		for i in range(number_of_hex_digits, 0, -2):
-			hex_string_reversed += hex_string[max(0, i - 2):i]
-		return hex_string_reversed
-	else:
-		return hex_string
+	# Reverse order in pair of 2, from right
+	return ''.join(hex_string[max(0, i - 2):i] for i in range(number_of_hex_digits, 0, -2))
 
 
 def hexstring_to_int(inputstring: str, little_endian: bool) -> int:
@@ -32,14 +59,68 @@ def hexstring_to_int(inputstring: str, little_endian: bool) -> int:
 	:param little_endian: bool True to decode string as little endian
 	:return: int
 	"""
-	hexstring = ""
-	if little_endian:
-		# Reverse order in pair of 2, from left
-		for i in range(0, len(inputstring), 2):
-			hexstring = inputstring[i:i+2] + hexstring
-	else:
-		hexstring = inputstring
-	return int(hexstring, base=16)
+	if not little_endian:
+		return int(inputstring, base=16)
+	length = len(inputstring)
+	if length <= 2:
+		return int(inputstring, base=16)
+	if length == 3:
+		return int(inputstring[2] + inputstring[:2], base=16)
+	if length == 4 or length == 8:
+		try:
+			data = bytes.fromhex(inputstring)
+		except ValueError:
+			data = b''  # Let int() raise the same error as for other lengths
+		# fromhex skips whitespace, so a string with whitespace gives fewer bytes, and int() raises for it
+		if len(data) == length >> 1:
+			return int.from_bytes(data, 'little')
+	# Reverse order in pair of 2, from left
+	return int(''.join(reversed([inputstring[i:i+2] for i in range(0, length, 2)])), base=16)
+
+
+def position_to_bytes(vertical: int, horizontal: int) -> bytes:
+	"""
+	Pack the 3 hexadecimal digit little endian vertical position and the 3 hexadecimal digit big endian horizontal
+	position in to the 3 bytes they share.
+	Vertical 0xABC and horizontal 0xDEF is written as BCA DEF in hexadecimal, that is the bytes 0xBC 0xAD 0xEF.
+	:param vertical: int vertical position
+	:param horizontal: int horizontal position
+	:return: bytes 3 bytes
+	"""
+	if not 0 <= vertical <= 0xFFF:
+		raise Exception(f'Number {vertical} 0x{vertical:X} cant fit in 3 hexadecimal digits.')
+	if not 0 <= horizontal <= 0xFFF:
+		raise Exception(f'Number {horizontal} 0x{horizontal:X} cant fit in 3 hexadecimal digits.')
+	return bytes((vertical & 0xFF, (vertical >> 8) << 4 | horizontal >> 8, horizontal & 0xFF))
+
+
+def bytes_to_position(data: bytes) -> (int, int):
+	"""
+	Unpack vertical and horizontal position from the 3 bytes they share, see position_to_bytes
+	:param data: bytes 3 bytes
+	:return: (int, int) vertical and horizontal position
+	"""
+	return data[0] | (data[1] >> 4) << 8, (data[1] & 0x0F) << 8 | data[2]
+
+
+@lru_cache(maxsize=4096)
+def utf8_to_utf16bytes(inputstring: str) -> bytes:
+	"""
+	Convert a string to UTF-16 big endian bytes, characters outside of the BMP are encoded as surrogate pairs.
+	Recently encoded strings are cached, since prices and unit labels repeat across many text entities.
+	:param inputstring: str to be converted
+	:return: bytes UTF-16 big endian without BOM
+	"""
+	return inputstring.encode('utf-16-be')
+
+
+def utf16bytes_to_utf8(data: bytes) -> str:
+	"""
+	Convert UTF-16 big endian bytes to a string, surrogate pairs are combined to one character
+	:param data: bytes, bytearray or memoryview UTF-16 big endian without BOM
+	:return: str
+	"""
+	return str(data, 'utf-16-be')
 
 
 def utf8_to_utf16hexstring(inputstring: str) -> str:
@@ -48,13 +129,7 @@ def utf8_to_utf16hexstring(inputstring: str) -> str:
 	:param inputstring: str to be converted
 	:return: str hexadecimal string
 	"""
-	out = ""
-	for character in inputstring:
-		# Convert to UTF-16 and remove BOM flag
-		utf16string = character.encode("UTF-16")[2:]
-		# Convert to hexadecimal big endian
-		out += "%02X%02X" % (utf16string[1], utf16string[0])
-	return out
+	return utf8_to_utf16bytes(inputstring).hex().upper()
 
 
 def utf16hexstring_to_utf8(inputstring: str) -> str:
@@ -63,20 +138,7 @@ def utf16hexstring_to_utf8(inputstring: str) -> str:
 	:param inputstring: str to be converted
 	:return: str UTF-8
 	"""
-	out = ""
-	# For every 4 hexadecimal in string, convert to UTF-8
-	for i in range(0, len(inputstring), 4):
-		# Prepare UTF-16 string with BOM flag
-		character = bytearray(b'\xff\xfe')
-		# Extract 2 bytes and convert to int
-		first = hexstring_to_int(inputstring[i+0:i+2], little_endian=False)
-		second = hexstring_to_int(inputstring[i+2:i+4], little_endian=False)
-		# Append to UTF-16 string in little endian
-		character.append(second)
-		character.append(first)
-		# Decode UTF-16
-		out += character.decode("UTF-16")
-	return out
+	return utf16bytes_to_utf8(bytes.fromhex(inputstring))
 
 
 def catogerize_rgb_as_color(red: int, green: int, blue: int) -> str:
@@ -93,6 +155,22 @@ def catogerize_rgb_as_color(red: int, green: int, blue: int) -> str:
 		return 'white'
 
 
+def image_to_rgb(image: Image) -> Image:
+	"""
+	Convert a Pillow image of any mode (RGBA, L, 1, P...) to a RGB image.
+	Transparent pixels are flattened on to a white background, since white is the unpainted color of a e-ink display.
+
+	:param image: Pillow Image to convert
+	:return: Pillow Image in RGB mode
+	"""
+	if image.mode == 'RGB':
+		return image
+	if image.mode in ('RGBA', 'LA', 'PA') or (image.mode == 'P' and 'transparency' in image.info):
+		background = Image.new('RGBA', image.size, "white")
+		return Image.alpha_composite(background, image.convert('RGBA')).convert('RGB')
+	return image.convert('RGB')
+
+
 def image_to_black_and_colored_pixel_strings(image: Image) -> (list, list):
 	"""
 	Analyze colors in Pillow image, return a tuple of pixel array matching black pixels,
@@ -105,23 +183,107 @@ def image_to_black_and_colored_pixel_strings(image: Image) -> (list, list):
 	:param image: Pillow Image extract pixels from
 	:return: (list, list) a tuple concisting of a list matching black pixels, and colored pixels
 	"""
-	pixels_black = []
-	pixels_color = []
+	pixels_black, pixels_color = image_to_black_and_colored_pixel_planes(image)
+	return list(pixels_black), list(pixels_color)
+
+
+def image_to_black_and_colored_pixel_planes(image: Image) -> (bytes, bytes):
+	"""
+	Same classification as catogerize_rgb_as_color, but done on the whole image in one pass with NumPy.
+	Falls back to a pixel by pixel loop if NumPy isn't installed.
+	RGBA, L, 1 and P images are converted to RGB with Pillow before classification.
+
+	:param image: Pillow Image extract pixels from
+	:return: (bytes, bytes) a tuple of black pixels and colored pixels, one byte per pixel, 0 is a non filled pixel,
+	1 is a filled pixel
+	"""
+	image = image_to_rgb(image)
+	if numpy is None:
+		return _image_to_black_and_colored_pixel_planes_loop(image)
+	above_mid = numpy.asarray(image) > 127
+	red = above_mid[:, :, 0]
+	green = above_mid[:, :, 1]
+	blue = above_mid[:, :, 2]
+	pixels_black = ~(red | green | blue)
+	pixels_color = red & ~blue  # Red or yellow, both is drawn with the second color of the display
+	return pixels_black.astype(numpy.uint8).tobytes(), pixels_color.astype(numpy.uint8).tobytes()
+
+
+def image_to_black_and_colored_bit_planes(image: Image) -> (BitPlane, BitPlane):
+	"""
+	Same as image_to_black_and_colored_pixel_planes, but both planes are packed to bit planes in the same pass, without
+	going through one byte per pixel.
+
+	:param image: Pillow Image extract pixels from
+	:return: (BitPlane, BitPlane) a tuple of black pixels and colored pixels
+	"""
+	if numpy is None:
+		pixels_black, pixels_color = _image_to_black_and_colored_pixel_planes_loop(image_to_rgb(image))
+		return (BitPlane.from_pixels(pixels_black, image.width, image.height),
+				BitPlane.from_pixels(pixels_color, image.width, image.height))
+	packed = _pack_black_and_colored(image)
+	return BitPlane(image.width, image.height, packed[0].tobytes()), BitPlane(image.width, image.height,
+																				packed[1].tobytes())
+
+
+def write_black_and_colored_bit_planes(image: Image, buffer, colored: bool = True) -> int:
+	"""
+	Same as image_to_black_and_colored_bit_planes, but the packed planes are written straight in to a buffer, like a
+	shared memory block, without making BitPlane objects. The black plane comes first, followed by the color plane.
+	Every plane takes (width + 7) // 8 * height bytes, the layout of BitPlane.data.
+
+	:param image: Pillow Image extract pixels from
+	:param buffer: writable buffer (bytearray, memoryview) with room for the planes
+	:param colored: bool False to only write the black plane
+	:return: int number of bytes written
+	"""
+	plane_count = 2 if colored else 1
+	stride = (image.width + 7) // 8
+	size = plane_count * stride * image.height
+	if numpy is None:
+		planes = image_to_black_and_colored_bit_planes(image)[:plane_count]
+		buffer[:size] = b''.join(plane.data for plane in planes)
+		return size
+	out = numpy.ndarray((plane_count, image.height, stride), dtype=numpy.uint8, buffer=buffer)
+	out[...] = _pack_black_and_colored(image)[:plane_count]
+	return size
+
+
+def _pack_black_and_colored(image: Image):
+	"""
+	:param image: Pillow Image extract pixels from
+	:return: NumPy array of the black and the color plane, packed like BitPlane.data, shape (2, height, stride)
+	"""
+	above_mid = numpy.asarray(image_to_rgb(image)) > 127
+	red = above_mid[:, :, 0]
+	blue = above_mid[:, :, 2]
+	planes = numpy.empty((2, image.height, image.width), dtype=bool)
+	numpy.logical_not(red | above_mid[:, :, 1] | blue, out=planes[0])
+	numpy.logical_and(red, ~blue, out=planes[1])
+	return numpy.packbits(planes, axis=2)
+
+
+def _image_to_black_and_colored_pixel_planes_loop(image: Image) -> (bytes, bytes):
+	"""
+	Pixel by pixel classification of a RGB image, used when NumPy isn't available.
+
+	:param image: Pillow Image in RGB mode
+	:return: (bytes, bytes) a tuple of black pixels and colored pixels, one byte per pixel
+	"""
+	pixels_black = bytearray(image.width * image.height)
+	pixels_color = bytearray(image.width * image.height)
 	pixel_access = image.load()  # Used for reading pixel value of a Pillow image
+	i = 0
 	for y in range(image.height):
 		for x in range(image.width):
 			r, g, b = pixel_access[x, y]
 			color = catogerize_rgb_as_color(r, g, b)
 			if color == 'black':
-				pixels_black.append(1)
-				pixels_color.append(0)
+				pixels_black[i] = 1
 			elif color == 'yellow' or color == 'red':
-				pixels_black.append(0)  # Don't color in black pixels since we are going to draw a colored
-				pixels_color.append(1)
-			else:
-				pixels_black.append(0)
-				pixels_color.append(0)
-	return pixels_black, pixels_color
+				pixels_color[i] = 1  # Don't color in black pixels since we are going to draw a colored
+			i += 1
+	return bytes(pixels_black), bytes(pixels_color)
 
 
 def pixel_string_to_image(image: Image, pixels: list, color=(0, 0, 0)):
@@ -130,9 +292,13 @@ def pixel_string_to_image(image: Image, pixels: list, color=(0, 0, 0)):
 	Only filled pixels will be drawn.
 
 	:param image: Pillow Image to write pixels on
-	:param pixels: list of pixels to write, 0 is a non filled pixel, 1 is a filled pixel
+	:param pixels: BitPlane or list of pixels to write, 0 is a non filled pixel, 1 is a filled pixel
 	:param color: tuple of 3 representing R, G & B to draw on filled pixels
 	"""
+	if isinstance(pixels, BitPlane):
+		# Paste color in bulk with the plane as mask
+		image.paste(color, (0, 0, pixels.width, pixels.height), pixels.to_mask())
+		return
 	pixel_access = image.load()
 	for i, value in enumerate(pixels):
 		if value:
@@ -141,70 +307,637 @@ def pixel_string_to_image(image: Image, pixels: list, color=(0, 0, 0)):
 			pixel_access[x, y] = color
 
 
-def compress_pixel_array(inputstring: list) -> str:
+# Palette of images built by bit_planes_to_image, index 0 is white, 1 is black and 2 is the second color
+_DISPLAY_PALETTE = [255, 255, 255, 0, 0, 0, 255, 0, 0]
+
+
+def bit_planes_to_image(black: BitPlane, color: BitPlane = None, mode: str = 'RGB') -> Image:
+	"""
+	Build a Pillow image from bit planes, with the color plane drawn in red on top of the black plane.
+	The image is built from the packed planes with Image.frombytes and a masked paste, without going through the pixels
+	one by one.
+
+	:param black: BitPlane of black pixels
+	:param color: BitPlane of colored pixels, or None for a black and white image
+	:param mode: str '1', 'P' or 'RGB' mode of the image, '1' can't show a color plane
+	:return: Pillow Image
+	"""
+	if mode == '1':
+		if color is not None:
+			raise Exception("A image with a color plane can't be built in mode 1, use mode P or RGB")
+		return black.to_image()
+	if mode == 'RGB':
+		image = Image.new('RGB', (black.width, black.height), "white")
+		pixel_string_to_image(image, black)
+		if color is not None:
+			pixel_string_to_image(image, color, (255, 0, 0))
+		return image
+	if mode != 'P':
+		raise Exception(f'Image mode must be 1, P or RGB, not {mode}')
+	image = Image.frombytes('P', (black.width, black.height), black.to_pixels())  # Pixel values are palette indexes
+	if color is not None:
+		image.paste(2, (0, 0, color.width, color.height), color.to_mask())
+	image.putpalette(_DISPLAY_PALETTE)
+	return image
+
+
+# Pixel pattern byte for every combination of 7 pixels (one byte per pixel), used by the RLE encoder
+_PIXEL_PATTERN_ENCODE = {bytes((pattern >> (6-i)) & 1 for i in range(7)): (1 << 7) | pattern for pattern in range(128)}
+# Single pixel and 7 pixels of the same color, indexed by pixel value
+_PIXEL_BYTE = (b'\x00', b'\x01')
+_PIXEL_RUN_OF_7 = (bytes(7), b'\x01' * 7)
+# Pixels for every pixel pattern byte (one byte per pixel), used by the RLE decoder
+_PIXEL_PATTERN_DECODE = [bytes((pattern >> i) & 1 for i in range(6, -1, -1)) for pattern in range(256)]
+
+
+def _pixel_pattern_runs(pattern: int) -> tuple:
+	"""
+	:param pattern: int pixel pattern byte
+	:return: tuple of (pixel, length) runs in the pattern
+	"""
+	runs = []
+	for pixel in _PIXEL_PATTERN_DECODE[pattern]:
+		if runs and runs[-1][0] == pixel:
+			runs[-1][1] += 1
+		else:
+			runs.append([pixel, 1])
+	return tuple((pixel, length) for pixel, length in runs)
+
+
+# Runs of (pixel, length) for every pixel pattern byte, used by the streaming RLE decoder
+_PIXEL_PATTERN_RUNS = [_pixel_pattern_runs(pattern) for pattern in range(256)]
+
+
+def compress_pixel_array(inputstring: list, optimal: bool = False) -> str:
 	"""
 	Compress pixel array with RLE (Run Length Encoding)
 
-	:param inputstring: list of ints representing pixels to compress, 0 is a non filled pixel, 1 is a filled pixel
+	:param inputstring: BitPlane or list of ints representing pixels to compress, 0 is a non filled pixel,
+	1 is a filled pixel
+	:param optimal: bool True to search for the smallest possible encoding instead of the greedy one, slower to compress
 	:return: str compressed
 	"""
-	pixel_counter = 0
-	pixel_counter_offset = 0
-	compressed_pixels = ""
+	return compress_pixel_bytes(inputstring, optimal).hex().upper()
+
+
+def compress_pixel_bytes(pixels: bytes, optimal: bool = False) -> bytearray:
+	"""
+	Compress pixel array with RLE (Run Length Encoding) in to binary tokens.
+	If the compression cache is enabled (see esllib.cache), identical planes are only compressed once.
+
+	:param pixels: BitPlane or bytes (or list of ints) representing pixels to compress, 0 is a non filled pixel,
+	1 is a filled pixel
+	:param optimal: bool True to search for the smallest possible encoding instead of the greedy one, slower to compress
+	:return: bytearray compressed
+	"""
+	if optimal:
+		encoder_name, encoder = 'optimal', _compress_pixel_bytes_optimal
+	else:
+		encoder_name, encoder = 'greedy', _compress_pixel_bytes_greedy
+	cache = get_compression_cache()
+	if cache is None:
+		return encoder(pixels)
+	if isinstance(pixels, BitPlane):
+		cache_key = CompressedPlaneCache.key(pixels.data, pixels.width, pixels.height, encoder_name)
+	else:
+		pixels = bytes(pixels)
+		cache_key = CompressedPlaneCache.key(pixels, len(pixels), 1, encoder_name)
+	compressed = cache.get(cache_key)
+	if compressed is None:
+		compressed = encoder(pixels)
+		cache.put(cache_key, compressed)
+		return compressed
+	return bytearray(compressed)
+
+
+def compress_pixel_planes(planes: list, optimal: bool = False, threads: bool = False) -> list:
+	"""
+	Compress several pixel planes with RLE (Run Length Encoding), like the black and color plane of a image.
+	With NumPy the runs of all planes are found in one pass, and each plane is then encoded from its runs. The planes
+	are encoded on worker threads if threads is True, NumPy releases the GIL for most of the work.
+	If the compression cache is enabled (see esllib.cache), identical planes are only compressed once.
+
+	:param planes: list of BitPlane or bytes (or list of ints) representing pixels to compress
+	:param optimal: bool True to search for the smallest possible encoding instead of the greedy one, slower to compress
+	:param threads: bool True to encode the planes on worker threads
+	:return: list of bytearray compressed, one per plane
+	"""
+	if optimal or get_compression_cache() is not None:
+		return [compress_pixel_bytes(plane, optimal) for plane in planes]
+	if len({len(plane) for plane in planes}) > 1:
+		return [_compress_pixel_bytes_greedy(plane) for plane in planes]
+	return _compress_planes_greedy(planes, threads)
+
+
+def estimate_compressed_size(plane: BitPlane) -> int:
+	"""
+	Estimate the size of the greedy RLE (Run Length Encoding) compression of a plane from its runs, without building the
+	tokens. Runs of at least 7 pixels are counted as color strings, and the pixels of shorter runs as pixel patterns,
+	so the estimate is off by a few bytes where short and long runs meet. Without NumPy the plane is compressed.
+
+	:param plane: BitPlane
+	:return: int estimated bytes
+	"""
+	if numpy is None:
+		return len(_compress_pixel_bytes_greedy(plane))
+	pixels = numpy.frombuffer(plane.to_pixels(), dtype=numpy.uint8)
+	changes = numpy.flatnonzero(pixels[1:] != pixels[:-1]) + 1
+	lengths = numpy.diff(numpy.concatenate(([0], changes, [len(pixels)])))
+	long_runs = lengths[lengths >= 7]
+	pattern_pixels = int(lengths.sum() - long_runs.sum())
+	string_bytes = numpy.where(long_runs <= 31, 1, numpy.where(long_runs <= 255, 2, 3 * ((long_runs + 65534) // 65535)))
+	return (pattern_pixels + 6) // 7 + int(string_bytes.sum())
+
+
+def compare_compression(pixels: bytes) -> dict:
+	"""
+	Compress pixels with both the greedy and the optimal encoder, and report the difference in size
+
+	:param pixels: BitPlane or bytes (or list of ints) representing pixels to compress
+	:return: dict with greedy, optimal and saved size in bytes
+	"""
+	greedy_size = len(compress_pixel_bytes(pixels))
+	optimal_size = len(compress_pixel_bytes(pixels, optimal=True))
+	return {'greedy': greedy_size, 'optimal': optimal_size, 'saved': greedy_size - optimal_size}
+
+
+def _compress_pixel_bytes(pixels: bytes) -> bytearray:
+	"""
+	Compress pixel array with RLE (Run Length Encoding) in to binary tokens, without using the compression cache
+
+	:param pixels: BitPlane or bytes (or list of ints) representing pixels to compress
+	:return: bytearray compressed
+	"""
+	if isinstance(pixels, BitPlane):
+		pixels = pixels.to_pixels()
+	return _compress_pixel_span(bytes(pixels), 0)[0]
+
+
+def _compress_pixel_span(pixels: bytes, pixel_counter: int, resync_positions: list = None, resync_from: int = 0) \
+		-> tuple:
+	"""
+	Greedy RLE compression of pixels from a token start to the end of the pixels. With resync_positions the compression
+	stops at the first token at or after resync_from that starts where a token of a earlier compression started.
+
+	:param pixels: bytes one byte per pixel
+	:param pixel_counter: int pixel to start at
+	:param resync_positions: sorted list of int first pixel of every token of a earlier compression, ending with a
+	pixel at or after the end of the pixels, or None
+	:param resync_from: int first pixel where the pixels are the same as in the earlier compression
+	:return: tuple of bytearray compressed, list of int first pixel of every token, list of int byte offset of every
+	token, and int pixel where the compression stopped
+	"""
+	token_positions = []
+	token_offsets = []
+	resync_index = 0
+	pixel_total = len(pixels)
+	compressed_pixels = bytearray()
 	# Loop through image to be compressed
-	while pixel_counter < len(inputstring):
-		pixel = inputstring[pixel_counter]
-		count_until_colorchange = 0
-		# Count until pixel change color, or we hit 65535, or reach end of image
-		while pixel == inputstring[pixel_counter + count_until_colorchange]:
-			count_until_colorchange += 1
-			if pixel_counter + count_until_colorchange >= len(inputstring):
-				# Don't try to read more pixels then there is pixels available
-				break
-			if count_until_colorchange >= 65535:
-				# Don't try to read more pixels than can be fitted in to 2 bytes length
-				break
+	while pixel_counter < pixel_total:
+		if resync_positions is not None and pixel_counter >= resync_from:
+			resync_index = bisect_left(resync_positions, pixel_counter, resync_index)
+			if resync_positions[resync_index] == pixel_counter:
+				break  # The rest of the tokens are the same as in the earlier compression
+		token_positions.append(pixel_counter)
+		token_offsets.append(len(compressed_pixels))
+		pixel = pixels[pixel_counter]
+		pattern_pixels = pixels[pixel_counter:pixel_counter+7]
+		if pattern_pixels == _PIXEL_RUN_OF_7[pixel]:
+			# Count until pixel change color, or we hit 65535, or reach end of image
+			color_change = pixels.find(_PIXEL_BYTE[pixel ^ 1], pixel_counter + 7)
+			if color_change == -1:
+				color_change = pixel_total
+			count_until_colorchange = min(color_change - pixel_counter, 65535)
+		else:
+			count_until_colorchange = 0  # Color changes within the next 7 pixels
 
 		# Decide how to compress
 		if count_until_colorchange < 7:
 			# If number of same pixels is less than a byte, fill it up with pixel pattern
-			# Bit pattern 1 byte (1 for pixel pattern, pattern)
-			# 0xC0(0b11000000) 1 black pixel, 5 white pixels
-			# 0xE0(0b11100000) 2 black pixels, 4 white pixels
-			pixel_pattern = (1 << 7)
-			# Build pixel pattern usings remaining bits of the byte
-			for i in range(7):
-				if pixel_counter + i >= len(inputstring):
-					break  # Don't read outside of image size
-				pixel_pattern = pixel_pattern | (inputstring[pixel_counter+i] << (6-i))
-			compressed_pixels += int_to_hexstring(pixel_pattern, little_endian=False, number_of_hex_digits=2)
+			# Bit pattern 1 byte (1 for pixel pattern, pattern of 7 pixels)
+			# 0xC0(0b11000000) 1 black pixel, 6 white pixels
+			# 0xE0(0b11100000) 2 black pixels, 5 white pixels
+			if len(pattern_pixels) < 7:
+				pattern_pixels = pattern_pixels.ljust(7, b'\x00')  # Don't read outside of image size
+			compressed_pixels.append(_PIXEL_PATTERN_ENCODE[pattern_pixels])
 			pixel_counter += 7
 		elif count_until_colorchange <= 31:
 			# Short color string 1 byte (0 for color string, pixel type, number of pixels])
 			# 0x47 0b01000111 0b111 = 7 black pixels
 			# 0x1F 0b00011111 0b11111 = 31 white pixels
-			value = (0 << 7) + (pixel << 6) + count_until_colorchange
-			compressed_pixels += int_to_hexstring(value, little_endian=False, number_of_hex_digits=2)
+			compressed_pixels.append((pixel << 6) | count_until_colorchange)
 			pixel_counter += count_until_colorchange
 		elif count_until_colorchange <= 255:
 			# Middle color string 2 bytes (0 for color string, pixel type, 000001 for 1B length) (number of pixels])
 			# 0x01(0b00000001) 0x20(0b00010100) 32 white pixels
 			# 0x41(0b01000001) 0x20(0b00010100) 32 black pixels
-			value = (0 << 7) + (pixel << 6) + 1
-			compressed_pixels += int_to_hexstring(value, little_endian=False, number_of_hex_digits=2)
-			compressed_pixels += int_to_hexstring(count_until_colorchange, little_endian=False, number_of_hex_digits=2)
+			compressed_pixels.append((pixel << 6) | 1)
+			compressed_pixels.append(count_until_colorchange)
 			pixel_counter += count_until_colorchange
 		else:
 			# Long color string 3 bytes (0 for color string, pixel type, 000000 for 2B length) (number of pixels little endian]) (number of pixels big endian])
 			# 0x00(0b00000000) 0xBA 0xD4 54458 white pixels
 			# 0x40(0b01000000) 0x00 0x01 256 black pixels
-			value = (0 << 7) + (pixel << 6) + 0
-			compressed_pixels += int_to_hexstring(value, little_endian=False, number_of_hex_digits=2)
-			compressed_pixels += int_to_hexstring(count_until_colorchange, little_endian=True, number_of_hex_digits=4)
+			compressed_pixels.append(pixel << 6)
+			compressed_pixels.append(count_until_colorchange & 0xFF)
+			compressed_pixels.append(count_until_colorchange >> 8)
 			pixel_counter += count_until_colorchange
+	return compressed_pixels, token_positions, token_offsets, pixel_counter
+
+
+def _pixel_rows(planes: list):
+	"""
+	:param planes: list of BitPlane or bytes (or list of ints) with the same number of pixels
+	:return: NumPy array of one row of pixels per plane, 0 or 1 as uint8, followed by 7 non filled pixels so the last
+	pixel pattern of a plane can be read without going outside of the row
+	"""
+	pixel_total = len(planes[0])
+	rows = numpy.zeros((len(planes), pixel_total + 7), dtype=numpy.uint8)
+	for row, plane in zip(rows, planes):
+		if isinstance(plane, BitPlane):
+			row[:pixel_total] = numpy.unpackbits(numpy.frombuffer(bytes(plane.data), dtype=numpy.uint8).reshape(
+				plane.height, plane.stride), axis=1, count=plane.width).reshape(-1)
+		else:
+			row[:pixel_total] = numpy.frombuffer(bytes(plane), dtype=numpy.uint8)
+	return rows
+
+
+def _plane_run_boundaries(rows) -> list:
+	"""
+	Find the runs of 7 or more pixels of all planes in one pass, the runs the greedy RLE encoder can start a color
+	string in. Shorter runs are left to pixel patterns.
+
+	:param rows: NumPy array from _pixel_rows
+	:return: list of (NumPy array of run starts, NumPy array of run ends) for every plane
+	"""
+	plane_count, pixel_total = rows.shape[0], rows.shape[1] - 7
+	# The end of a row is a color change too, so all planes are searched as one array
+	last_of_run = numpy.empty((plane_count, pixel_total), dtype=bool)
+	numpy.not_equal(rows[:, 1:pixel_total], rows[:, :pixel_total-1], out=last_of_run[:, :-1])
+	last_of_run[:, -1] = True
+	run_ends = numpy.flatnonzero(last_of_run) + 1  # Positions in the flattened rows
+	run_starts = numpy.concatenate(([0], run_ends[:-1]))
+	long_runs = numpy.flatnonzero(run_ends - run_starts >= 7)
+	run_starts = run_starts[long_runs]
+	run_ends = run_ends[long_runs]
+	plane_starts = numpy.searchsorted(run_starts, numpy.arange(plane_count + 1) * pixel_total)
+	return [(run_starts[plane_starts[i]:plane_starts[i+1]] - i * pixel_total,
+			run_ends[plane_starts[i]:plane_starts[i+1]] - i * pixel_total) for i in range(plane_count)]
+
+
+def _next_color_strings(positions, run_starts, run_ends):
+	"""
+	Where the greedy RLE encoder starts its next color string from positions.
+	The encoder starts a color string where at least 7 pixels of the same color follow, and otherwise moves on 7 pixels
+	with a pixel pattern. So the next color string starts at the first position in a run of 7 or more pixels, that is
+	a multiple of 7 pixels ahead and has at least 7 pixels left of the run.
+
+	:param positions: NumPy array of positions
+	:param run_starts: NumPy array of starts of runs with at least 7 pixels
+	:param run_ends: NumPy array of ends of the same runs
+	:return: tuple of NumPy arrays, position of the color string, and the run it is in (len(run_starts) if there is
+	no color string before the end of the plane)
+	"""
+	run_count = len(run_starts)
+	color_starts = numpy.zeros(len(positions), dtype=numpy.int64)
+	runs = numpy.searchsorted(run_ends - 7, positions)  # First run with a possible color string after the position
+	unresolved = numpy.arange(len(positions))
+	while len(unresolved):
+		unresolved = unresolved[runs[unresolved] < run_count]
+		run = runs[unresolved]
+		position = positions[unresolved]
+		first = numpy.maximum(run_starts[run], position)
+		first += (position - first) % 7
+		found = first <= run_ends[run] - 7
+		color_starts[unresolved[found]] = first[found]
+		unresolved = unresolved[~found]
+		runs[unresolved] += 1  # A run of 7 to 12 pixels doesn't have every position modulo 7
+	return color_starts, runs
+
+
+def _color_string_chain(pixel_total: int, run_starts, run_ends) -> tuple:
+	"""
+	Follow the greedy RLE encoder through one plane from its runs.
+	A color string continues to the end of its run, so the encoder only starts over from the start of the plane or from
+	the end of a run. The next color string from each of those is found at once, and the chain of color strings from
+	the start of the plane is followed by pointer doubling.
+
+	:param pixel_total: int number of pixels in the plane
+	:param run_starts: NumPy array of starts of runs with at least 7 pixels, from _plane_run_boundaries
+	:param run_ends: NumPy array of ends of the same runs
+	:return: tuple of NumPy arrays, start and stop of every stretch of pixel patterns, and start and length of every
+	color string, or None if the encoder has to be followed pixel by pixel
+	"""
+	run_count = len(run_starts)
+	# Next color string from the start of the plane (0), and from the end of every run (run + 1)
+	positions = numpy.concatenate(([0], run_ends))
+	next_starts, next_runs = _next_color_strings(positions, run_starts, run_ends)
+	# From the last color string the chain goes to a end that leads to itself
+	end = run_count + 1
+	chain_next = numpy.append(numpy.where(next_runs < run_count, next_runs + 1, end), end)
+	chain = numpy.zeros(1, dtype=numpy.int64)
+	jump = chain_next
+	while chain[-1] != end:
+		chain = numpy.concatenate((chain, jump[chain]))
+		jump = jump[jump]
+	chain = chain[:numpy.argmax(chain == end)]
+	pattern_starts = positions[chain]
+	color_starts = next_starts[chain[:-1]]
+	color_lengths = run_ends[next_runs[chain[:-1]]] - color_starts
+	pattern_stops = numpy.append(color_starts, pixel_total)
+	# Color strings are cut every 65535 pixels, and the encoder starts over within the run after a cut
+	cut = color_lengths > 65535
+	if cut.any():
+		if (color_lengths[cut] % 65535 - 1 < 6).any():
+			return None  # Less than 7 pixels left after a cut are sent as a pixel pattern
+		pieces = (color_lengths + 65534) // 65535
+		piece_offsets = numpy.arange(pieces.sum()) - numpy.repeat(numpy.cumsum(pieces) - pieces, pieces)
+		color_ends = numpy.repeat(color_starts + color_lengths, pieces)
+		color_starts = numpy.repeat(color_starts, pieces) + 65535 * piece_offsets
+		color_lengths = numpy.minimum(color_ends - color_starts, 65535)
+	return pattern_starts, pattern_stops, color_starts, color_lengths
+
+
+def _compress_rows(rows) -> list:
+	"""
+	Greedy RLE encoding of planes from their runs, gives the same tokens as _compress_pixel_bytes.
+	The tokens of all planes are built with the same NumPy calls, only the chain of color strings is followed per plane.
+
+	:param rows: NumPy array from _pixel_rows
+	:return: list of bytearray compressed, one per plane
+	"""
+	plane_count, stride = rows.shape
+	pixel_total = stride - 7
+	padded = rows.reshape(-1)  # Positions of tokens are in the flattened rows
+	compressed = [None] * plane_count
+	chains = []
+	for plane, (run_starts, run_ends) in enumerate(_plane_run_boundaries(rows)):
+		chain = _color_string_chain(pixel_total, run_starts, run_ends)
+		if chain is None:
+			compressed[plane] = _compress_pixel_bytes(rows[plane, :pixel_total].tobytes())
+		else:
+			pattern_starts, pattern_stops, color_starts, color_lengths = chain
+			offset = plane * stride
+			chains.append((plane, (pattern_starts + offset, pattern_stops + offset, color_starts + offset, color_lengths)))
+	if not chains:
+		return compressed
+	pattern_starts, pattern_stops, color_starts, color_lengths = [numpy.concatenate(parts) for parts in
+																	zip(*[chain for plane, chain in chains])]
+	# Pixel patterns every 7 pixels between the color strings
+	pattern_counts = (pattern_stops - pattern_starts + 6) // 7
+	pattern_offsets = numpy.arange(pattern_counts.sum()) - numpy.repeat(numpy.cumsum(pattern_counts) - pattern_counts,
+																		pattern_counts)
+	pattern_positions = numpy.repeat(pattern_starts, pattern_counts) + 7 * pattern_offsets
+	patterns = numpy.full(len(pattern_positions), 0x80, dtype=numpy.uint8)
+	for i in range(7):
+		patterns |= padded[pattern_positions + i] << (6 - i)
+	# Every token as up to 3 bytes, see _compress_pixel_bytes for the token types
+	pattern_total = len(pattern_positions)
+	tokens = numpy.zeros((pattern_total + len(color_starts), 3), dtype=numpy.uint8)
+	token_sizes = numpy.ones(len(tokens), dtype=numpy.int64)
+	tokens[:pattern_total, 0] = patterns
+	color_pixels = padded[color_starts].astype(numpy.int64) << 6
+	short = color_lengths <= 31
+	middle = (color_lengths > 31) & (color_lengths <= 255)
+	color_tokens = tokens[pattern_total:]
+	color_tokens[:, 0] = numpy.where(short, color_pixels | color_lengths, numpy.where(middle, color_pixels | 1,
+																						color_pixels))
+	color_tokens[:, 1] = numpy.where(middle, color_lengths, color_lengths & 0xFF)
+	color_tokens[:, 2] = color_lengths >> 8
+	token_sizes[pattern_total:] = numpy.where(short, 1, numpy.where(middle, 2, 3))
+	token_positions = numpy.concatenate((pattern_positions, color_starts))
+	order = numpy.argsort(token_positions, kind='stable')
+	token_sizes = token_sizes[order]
+	data = tokens[order][numpy.arange(3) < token_sizes[:, None]].tobytes()
+	# Split the tokens in to planes, the planes are in order of position
+	plane_sizes = numpy.bincount(token_positions[order] // stride, weights=token_sizes, minlength=plane_count)
+	offset = 0
+	for plane, chain in chains:
+		size = int(plane_sizes[plane])
+		compressed[plane] = bytearray(data[offset:offset+size])
+		offset += size
+	return compressed
+
+
+_NUMPY_MINIMUM_PIXELS = 4096  # Smaller planes are compressed faster without the overhead of NumPy calls
+_plane_executor = None  # Threads for compress_pixel_planes, created when first used
+
+
+def _compress_planes_greedy(planes: list, threads: bool = False) -> list:
+	"""
+	Greedy RLE compression of several planes, see compress_pixel_planes
+
+	:return: list of bytearray compressed
+	"""
+	if numpy is None or not planes or len(planes[0]) < _NUMPY_MINIMUM_PIXELS:
+		return [_compress_pixel_bytes(plane) for plane in planes]
+	if not threads or len(planes) < 2:
+		return _compress_rows(_pixel_rows(planes))
+	global _plane_executor
+	if _plane_executor is None:
+		_plane_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='esllib-compress')
+	return list(_plane_executor.map(lambda plane: _compress_rows(_pixel_rows([plane]))[0], planes))
+
+
+def _compress_pixel_bytes_greedy(pixels: bytes) -> bytearray:
+	"""
+	Greedy RLE compression of one plane, with NumPy if it is installed
+	"""
+	return _compress_planes_greedy([pixels])[0]
+
+
+def _color_string_cost(length: int) -> int:
+	"""
+	:param length: int number of pixels of the same color
+	:return: int smallest number of bytes of color strings covering exactly length pixels
+	"""
+	long_strings, rest = divmod(length, 65535)
+	if rest == 0:
+		return 3 * long_strings
+	if rest == 1:
+		# A single pixel needs a middle color string, unless a long string gives up a pixel for a short string of 2
+		return 3 * long_strings + (1 if long_strings else 2)
+	return 3 * long_strings + (1 if rest <= 31 else 2 if rest <= 255 else 3)
+
+
+def _append_color_string(compressed_pixels: bytearray, pixel: int, length: int):
+	"""
+	Append the color strings of _color_string_cost for length pixels of the same color
+	"""
+	long_strings, rest = divmod(length, 65535)
+	lengths = [65535] * long_strings + ([rest] if rest else [])
+	if rest == 1 and long_strings:
+		lengths[-2:] = [65534, 2]
+	for length in lengths:
+		if 2 <= length <= 31:
+			compressed_pixels.append((pixel << 6) | length)  # Short color string
+		elif length <= 255:
+			compressed_pixels += bytes(((pixel << 6) | 1, length))  # Middle color string, also used for a single pixel
+		else:
+			compressed_pixels += bytes((pixel << 6, length & 0xFF, length >> 8))  # Long color string
+
+
+def _compress_pixel_bytes_optimal(pixels: bytes) -> bytearray:
+	"""
+	Compress pixel array with RLE (Run Length Encoding) in to the smallest token sequence.
+	The greedy encoder picks one token at a time, this finds the cheapest way to encode the rest of the pixels from
+	every position that matters (dynamic programming), walking the runs backwards from the last pixel.
+	A pixel pattern 7 pixels in to a run costs the same as a short color string of 7, so patterns only matter in the
+	last 6 pixels of a run, where they can pick up the color change, and they end at most 6 pixels in to a later run.
+	So only the first 7 and the last 6 positions of every run are tried. From a first position further than 6 pixels
+	from the end of the run, the cheapest way is color strings to one of the last 6 positions or to the end of the run,
+	and the cost of color strings only depends on the number of pixels, see _color_string_cost.
+	The work grows with the number of runs, not the number of pixels.
+
+	:param pixels: BitPlane or bytes (or list of ints) representing pixels to compress
+	:return: bytearray compressed
+	"""
+	if isinstance(pixels, BitPlane):
+		pixels = pixels.to_pixels()
+	pixels = bytes(pixels)
+	pixel_total = len(pixels)
+	run_ends = []
+	position = 0
+	while position < pixel_total:
+		position = pixels.find(_PIXEL_BYTE[pixels[position] ^ 1], position)
+		if position == -1:
+			position = pixel_total
+		run_ends.append(position)
+	best_cost = [0] * (pixel_total + 1)  # Only the positions that matter are filled in
+	best_step = [0] * (pixel_total + 1)  # Next position, negative if the step is a pixel pattern
+	for run_start, run_end in zip(reversed([0] + run_ends[:-1]), reversed(run_ends)):
+		# Last 6 positions, a pixel pattern, a middle color string of 1 pixel or a short color string of up to 6 pixels
+		for position in range(run_end - 1, max(run_start, run_end - 7) - 1, -1):
+			pattern_end = min(position + 7, pixel_total)
+			cost, step = 1 + best_cost[pattern_end], -pattern_end
+			if 2 + best_cost[position + 1] < cost:
+				cost, step = 2 + best_cost[position + 1], position + 1
+			if position + 2 <= run_end:
+				string_cost = min(best_cost[position + 2:run_end + 1])
+				if 1 + string_cost < cost:
+					cost, step = 1 + string_cost, best_cost.index(string_cost, position + 2, run_end + 1)
+			best_cost[position] = cost
+			best_step[position] = step
+		# First positions of a longer run, color strings to the end of the run or one of the last 6 positions
+		for position in range(min(run_start + 6, run_end - 7), run_start - 1, -1):
+			cost, step = min((_color_string_cost(next_position - position) + best_cost[next_position], next_position)
+							for next_position in range(run_end - 6, run_end + 1))
+			best_cost[position] = cost
+			best_step[position] = step
+	# Walk forward from the first pixel to collect the tokens
+	compressed_pixels = bytearray()
+	position = 0
+	while position < pixel_total:
+		step = best_step[position]
+		if step < 0:
+			pattern_pixels = pixels[position:position+7]
+			if len(pattern_pixels) < 7:
+				pattern_pixels = pattern_pixels.ljust(7, b'\x00')  # Don't read outside of image size
+			compressed_pixels.append(_PIXEL_PATTERN_ENCODE[pattern_pixels])
+			position = -step
+		else:
+			_append_color_string(compressed_pixels, pixels[position], step - position)
+			position = step
 	return compressed_pixels
 
 
+def _token_checkpoints(data: bytes) -> tuple:
+	"""
+	Walk the tokens of compressed data without unpacking the pixels
+
+	:param data: bytes compressed data
+	:return: tuple of list of int first pixel of every token and list of int byte offset of every token, both ending
+	with the end of the data
+	"""
+	positions = []
+	offsets = []
+	position = 0
+	offset = 0
+	data_length = len(data)
+	while offset < data_length:
+		positions.append(position)
+		offsets.append(offset)
+		token = data[offset]
+		if token & 0b10000000:
+			position += 7  # Pixel pattern
+			offset += 1
+		elif token & 0b00111111 == 1:
+			position += data[offset+1]  # Middle color string
+			offset += 2
+		elif token & 0b00111111 == 0:
+			position += data[offset+1] | (data[offset+2] << 8)  # Long color string
+			offset += 3
+		else:
+			position += token & 0b00011111  # Short color string
+			offset += 1
+	positions.append(position)
+	offsets.append(offset)
+	return positions, offsets
+
+
+class IncrementalPixelEncoder:
+	"""
+	Greedy RLE (Run Length Encoding) compressed pixels that are compressed again in part when a span of pixels change,
+	like when a price is drawn again on a label.
+	The first pixel and the byte offset of every token are kept as checkpoints. A greedy token only depends on the pixels
+	from its first pixel to the pixel after it, so the tokens before the change are kept, and the compression starts
+	again at the token holding the pixel before the change. After the change the compression stops at the first token
+	starting on a checkpoint, since every token from there on is the same as before, and those tokens are moved in place.
+	The result is the same as compressing all pixels with compress_pixel_bytes.
+
+	encoder = IncrementalPixelEncoder(compress_pixel_bytes(plane))
+	data = encoder.update(plane, 200 * plane.width, 260 * plane.width)
+	"""
+	def __init__(self, data: bytes):
+		"""
+		:param data: bytes greedy compressed pixels, see compress_pixel_bytes
+		"""
+		self.data = bytes(data)
+		self.positions, self.offsets = _token_checkpoints(self.data)
+		self.span = (0, 0)  # First pixel and end of the pixels compressed by the last update
+
+	def update(self, pixels, start: int, stop: int) -> bytes:
+		"""
+		Compress pixels where only the pixels from start to stop have changed since the last compression
+
+		:param pixels: BitPlane or bytes (or list of ints) with the same number of pixels as before
+		:param start: int first changed pixel
+		:param stop: int pixel after the last changed pixel
+		:return: bytes compressed
+		"""
+		if isinstance(pixels, BitPlane):
+			pixels = pixels.to_pixels()
+		pixels = bytes(pixels)
+		positions, offsets = self.positions, self.offsets
+		pixel_total = len(pixels)
+		# The last pixel pattern is padded up to 7 pixels
+		if not positions[-1] - 7 < pixel_total <= positions[-1]:
+			raise Exception(f'Expected the {positions[-1]} pixels of the compressed data, got {pixel_total}')
+		start = max(start, 0)
+		stop = min(stop, pixel_total)
+		if start >= stop:
+			self.span = (start, start)
+			return self.data
+		# The token holding the pixel before the change read the first changed pixel to find its end
+		first = max(bisect_right(positions, start - 1) - 1, 0)
+		compressed, token_positions, token_offsets, end = _compress_pixel_span(pixels, positions[first], positions,
+																				stop)
+		if end < pixel_total:
+			last = bisect_left(positions, end)
+			tail_positions = positions[last:]
+		else:
+			last = len(positions) - 1
+			tail_positions = [end]
+		base = offsets[first]
+		shift = base + len(compressed) - offsets[last]
+		self.data = self.data[:base] + compressed + self.data[offsets[last]:]
+		self.positions = positions[:first] + token_positions + tail_positions
+		self.offsets = offsets[:first] + [base + offset for offset in token_offsets] + \
+			[offset + shift for offset in offsets[last:]]
+		self.span = (positions[first], end)
+		return self.data
+
+
 def uncompress_pixel_array(inputstring: str) -> list:
 	"""
 	Un-compress RLE (Run Length Encoding) to pixel array
@@ -212,64 +945,186 @@ def uncompress_pixel_array(inputstring: str) -> list:
 	:param inputstring: str compressed data
 	:return: list of ints representing pixels, 0 is a non filled pixel, 1 is a filled pixel
 	"""
-	out = []
+	return list(uncompress_pixel_bytes(bytes.fromhex(inputstring)))
+
+
+def uncompress_pixel_plane(data: bytes, width: int, height: int) -> BitPlane:
+	"""
+	Un-compress binary RLE (Run Length Encoding) tokens to a bit plane
+
+	:param data: bytes or memoryview compressed data, or a str with hexadecimal compressed data
+	:param width: int width of image
+	:param height: int height of image
+	:return: BitPlane
+	"""
+	if isinstance(data, str):
+		data = bytes.fromhex(data)
+	return BitPlane.from_pixels(uncompress_pixel_bytes(data), width, height)
+
+
+def uncompress_pixel_bytes(data: bytes) -> bytearray:
+	"""
+	Un-compress binary RLE (Run Length Encoding) tokens to pixel array
+
+	:param data: bytes or memoryview compressed data
+	:return: bytearray representing pixels, one byte per pixel, 0 is a non filled pixel, 1 is a filled pixel
+	"""
+	data = memoryview(data)
+	data_length = len(data)
+	out = bytearray()
 	byte_counter = 0
 	# Go through compressed data
-	while byte_counter < len(inputstring):
-		# Read byte at counter
-		current_string = inputstring[byte_counter:byte_counter+2]
-		current_byte = hexstring_to_int(current_string, little_endian=False)
+	while byte_counter < data_length:
+		current_byte = data[byte_counter]
 		# Check if pixel pattern or color string
 		if current_byte & 0b10000000:
 			# If 8:th bit is set, it's a pixel pattern
-			# Bit pattern 1 byte (1 for pixel pattern, pattern)
-			# 0xC0(0b11000000) 1 black pixel, 5 white pixels
-			# 0xE0(0b11100000) 2 black pixels, 4 white pixels
-			# Check set pixels in pixel pattern (6 pixels)
-			for i in range(6, 0, -1):
-				if current_byte & (1 << i):
-					# Black/Colored pixel
-					out.append(1)
-				else:
-					# White pixel
-					out.append(0)
-			# pixel pattern is 1 byte, increase counter by 1*2
-			byte_counter += 1 * 2
+			# Bit pattern 1 byte (1 for pixel pattern, pattern of 7 pixels)
+			# 0xC0(0b11000000) 1 black pixel, 6 white pixels
+			# 0xE0(0b11100000) 2 black pixels, 5 white pixels
+			# Older versions only unpacked 6 pixels (bit 6 to 1), but the encoder always packs 7 and the pixel count
+			# in a image only adds up with 7 pixels per pattern.
+			out += _PIXEL_PATTERN_DECODE[current_byte]
+			byte_counter += 1
+			continue
+		# If 8:th bit is unset, it's a color string
+		if current_byte == 0b00000001 or current_byte == 0b01000001:
+			# Middle color string 2 bytes (0 for color string, pixel type, 000001 for 1B length) (number of pixels])
+			if byte_counter + 2 > data_length:
+				raise Exception(f'Compressed data ends in the middle of a color string at byte {byte_counter}')
+			pixel_count = data[byte_counter+1]
+			byte_counter += 2
+		elif current_byte == 0b00000000 or current_byte == 0b01000000:
+			# Long color string 3 bytes (0 for color string, pixel type, 000000 for 2B length) (number of pixels little endian])
+			if byte_counter + 3 > data_length:
+				raise Exception(f'Compressed data ends in the middle of a color string at byte {byte_counter}')
+			pixel_count = data[byte_counter+1] | (data[byte_counter+2] << 8)
+			byte_counter += 3
 		else:
-			# If 8:th bit is unset, it's a color string
-			pixel_count = 0
-			pixel_type = 1
+			# Short color string 1 byte (0 for color string, pixel type, number of pixels])
+			pixel_count = current_byte & 0b00011111  # Mask the first 5 bits
+			byte_counter += 1
+		# Fill pixel string
+		if current_byte & 0b01000000:
+			out += b'\x01' * pixel_count  # Black/colored string
+		else:
+			out += bytes(pixel_count)  # White string
+	return out
+
+
+class PixelStreamDecoder:
+	"""
+	Incremental RLE (Run Length Encoding) decoder for compressed data arriving in chunks, like from a serial or TCP
+	link or a large capture file.
+	Tokens split between chunks are kept until the rest of the token arrives.
+	The decoder refuse to produce more than max_pixels pixels, so corrupt data can't make it use unlimited memory.
+	"""
+	def __init__(self, max_pixels: int, hex_input: bool = False):
+		"""
+		:param max_pixels: int maximum number of pixels to decode, normally width*height of the image
+		:param hex_input: bool True if chunks are hexadecimal text (str or ASCII bytes) instead of binary tokens
+		"""
+		self.max_pixels = max_pixels
+		self.hex_input = hex_input
+		self.pixel_count = 0
+		self._pending = b''  # Start of a token that continues in the next chunk
+		self._pending_hex = ''  # Odd hexadecimal digit that continues in the next chunk
+
+	def feed(self, chunk) -> list:
+		"""
+		Decode a chunk of compressed data
+
+		:param chunk: bytes, bytearray or memoryview binary tokens, or str/bytes hexadecimal text if hex_input is set
+		:return: list of (pixel, length) runs decoded from the chunk, pixel 0 is non filled, 1 is filled
+		"""
+		if self.hex_input:
+			if not isinstance(chunk, str):
+				chunk = bytes(chunk).decode('ascii')
+			chunk = self._pending_hex + chunk
+			even_length = len(chunk) & ~1
+			self._pending_hex = chunk[even_length:]
+			chunk = bytes.fromhex(chunk[:even_length])
+		if self._pending:
+			chunk = self._pending + bytes(chunk)
+		data = memoryview(chunk)
+		data_length = len(data)
+		runs = []
+		byte_counter = 0
+		while byte_counter < data_length:
+			current_byte = data[byte_counter]
+			if current_byte & 0b10000000:
+				# Pixel pattern, the encoder pads the last pattern of a image with non filled pixels
+				remaining = self.max_pixels - self.pixel_count
+				if remaining <= 0:
+					raise Exception(f'Compressed data decodes to more than {self.max_pixels} pixels')
+				for pixel, length in _PIXEL_PATTERN_RUNS[current_byte]:
+					if length > remaining:
+						if pixel:
+							raise Exception(f'Compressed data decodes to more than {self.max_pixels} pixels')
+						length = remaining
+					if length:
+						runs.append((pixel, length))
+						remaining -= length
+				self.pixel_count = self.max_pixels - remaining
+				byte_counter += 1
+				continue
 			if current_byte == 0b00000001 or current_byte == 0b01000001:
-				# Middle color string 2 bytes (0 for color string, pixel type, 000001 for 1B length) (number of pixels])
-				# 0x01(0b00000001) 0x20(0b00010100) 32 white pixels
-				# 0x41(0b01000001) 0x20(0b00010100) 32 black pixels
-				pixel_count = hexstring_to_int(inputstring[byte_counter+2:byte_counter+4], little_endian=False)
-				if current_byte == 0b00000001:
-					pixel_type = 0  # White string
-				else:
-					pixel_type = 1  # Black/colored string
-				byte_counter += 2 * 2
+				# Middle color string 2 bytes
+				if byte_counter + 2 > data_length:
+					break
+				pixel_count = data[byte_counter+1]
+				byte_counter += 2
 			elif current_byte == 0b00000000 or current_byte == 0b01000000:
-				# Long color string 3 bytes (0 for color string, pixel type, 000000 for 2B length) (number of pixels little endian]) (number of pixels big endian])
-				# 0x00(0b00000000) 0xBA 0xD4 54458 white pixels
-				# 0x40(0b01000000) 0x00 0x01 256 black pixels
-				pixel_count = hexstring_to_int(inputstring[byte_counter+2:byte_counter+6], little_endian=True)
-				if current_byte == 0b00000000:
-					pixel_type = 0  # White string
-				else:
-					pixel_type = 1  # Black/colored string
-				byte_counter += 3 * 2
+				# Long color string 3 bytes
+				if byte_counter + 3 > data_length:
+					break
+				pixel_count = data[byte_counter+1] | (data[byte_counter+2] << 8)
+				byte_counter += 3
 			else:
-				# Short color string 1 byte (0 for color string, pixel type, number of pixels])
-				# 0x47 0b01000111 0b111 = 7 black pixels
-				# 0x1F 0b00011111 0b11111 = 31 white pixels
-				pixel_count = current_byte & 0b00011111  # Mask the first 5 bits
-				if current_byte & 0b01000000:
-					pixel_type = 1  # Black/colored string
-				else:
-					pixel_type = 0  # White string
-				byte_counter += 1 * 2
-			# Fill pixel string
-			for i in range(pixel_count):
-				out.append(pixel_type)
-	return out
+				# Short color string 1 byte
+				pixel_count = current_byte & 0b00011111
+				byte_counter += 1
+			if self.pixel_count + pixel_count > self.max_pixels:
+				raise Exception(f'Compressed data decodes to more than {self.max_pixels} pixels')
+			self.pixel_count += pixel_count
+			runs.append((1 if current_byte & 0b01000000 else 0, pixel_count))
+		self._pending = bytes(data[byte_counter:])
+		return runs
+
+	def close(self):
+		"""
+		Check that the compressed data didn't end in the middle of a token
+		"""
+		if self._pending or self._pending_hex:
+			raise Exception('Compressed data ends in the middle of a token')
+
+	def runs(self, chunks):
+		"""
+		Decode an iterable of chunks
+
+		:param chunks: iterable of chunks, see feed()
+		:return: generator of (pixel, length) runs
+		"""
+		for chunk in chunks:
+			yield from self.feed(chunk)
+		self.close()
+
+	def rows(self, chunks, width: int):
+		"""
+		Decode an iterable of chunks in to rows of pixels
+
+		:param chunks: iterable of chunks, see feed()
+		:param width: int width of image
+		:return: generator of bytes with one byte per pixel for every complete row, a last incomplete row is padded with
+		non filled pixels
+		"""
+		row = bytearray()
+		for pixel, length in self.runs(chunks):
+			row += _PIXEL_BYTE[pixel] * length
+			if len(row) >= width:
+				row_count = len(row) // width
+				for y in range(row_count):
+					yield bytes(row[y*width:(y+1)*width])
+				del row[:row_count*width]
+		if row:
+			yield bytes(row.ljust(width, b'\x00'))
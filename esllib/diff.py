@@ -0,0 +1,340 @@
+import hashlib
+
+from PIL import Image
+from esllib.bitplane import BitPlane
+from esllib.conversion import image_to_black_and_colored_bit_planes
+from esllib.enums import PatternsCodesInv
+from esllib.Package import EntityText, EntityBarcode, EntityRectangle, EntityLine, EntityImage
+from esllib.payload import encode_payload
+
+
+def image_to_bit_planes(image: Image) -> tuple:
+	"""
+	:param image: Pillow Image
+	:return: tuple of BitPlane black and BitPlane color
+	"""
+	return image_to_black_and_colored_bit_planes(image)
+
+
+def changed_rectangles(previous, new, merge_gap: int = 8, x_align: int = 8) -> list:
+	"""
+	Find bounding rectangles of the pixels that differ between two images.
+	Changed rows closer than merge_gap rows are grouped to bands, and each band is split where the changed columns
+	are more than merge_gap pixels apart.
+
+	:param previous: Pillow Image, or tuple of BitPlane black and BitPlane color
+	:param new: Pillow Image, or tuple of BitPlane black and BitPlane color, the same size as previous
+	:param merge_gap: int number of unchanged pixels between changes that are still put in the same rectangle
+	:param x_align: int left edge and width of rectangles are aligned to this number of pixels
+	:return: list of (left, upper, right, lower) tuples, right and lower are exclusive like Pillow boxes
+	"""
+	if isinstance(previous, Image.Image):
+		previous = image_to_bit_planes(previous)
+	if isinstance(new, Image.Image):
+		new = image_to_bit_planes(new)
+	width, height, stride = new[0].width, new[0].height, new[0].stride
+	if (previous[0].width, previous[0].height) != (width, height):
+		raise Exception(f'Images must be the same size, {previous[0].width}x{previous[0].height} and {width}x{height}')
+	# Xor of the packed planes gives the changed pixels
+	changed = 0
+	for previous_plane, new_plane in zip(previous, new):
+		changed |= int.from_bytes(previous_plane.data, 'big') ^ int.from_bytes(new_plane.data, 'big')
+	if not changed:
+		return []
+	changed = changed.to_bytes(stride * height, 'big')
+	unchanged_row = bytes(stride)
+	rows = [y for y in range(height) if changed[y*stride:(y+1)*stride] != unchanged_row]
+
+	# Group rows to bands
+	bands = []
+	first = last = rows[0]
+	for y in rows[1:]:
+		if y - last > merge_gap + 1:
+			bands.append((first, last))
+			first = y
+		last = y
+	bands.append((first, last))
+
+	rectangles = []
+	for first, last in bands:
+		columns = 0
+		for y in range(first, last + 1):
+			columns |= int.from_bytes(changed[y*stride:(y+1)*stride], 'big')
+		columns = columns.to_bytes(stride, 'big')
+		# Split the band where the changed bytes of the columns are more than merge_gap pixels apart
+		left = right = None
+		for i, value in enumerate(columns):
+			if not value:
+				continue
+			if right is not None and (i - right - 1) * 8 > merge_gap:
+				rectangles.append(_aligned_rectangle(columns, left, right, first, last, width, x_align))
+				left = None
+			if left is None:
+				left = i
+			right = i
+		rectangles.append(_aligned_rectangle(columns, left, right, first, last, width, x_align))
+	return rectangles
+
+
+def _aligned_rectangle(columns: bytes, left_byte: int, right_byte: int, first: int, last: int, width: int,
+						x_align: int) -> tuple:
+	"""
+	:return: tuple (left, upper, right, lower) of the changed bits in the bytes left_byte to right_byte
+	"""
+	left = left_byte * 8 + 8 - columns[left_byte].bit_length()
+	right = right_byte * 8 + 8 - ((columns[right_byte] & -columns[right_byte]).bit_length() - 1)
+	left = left // x_align * x_align
+	right = min(width, -(-right // x_align) * x_align)
+	return left, first, right, last + 1
+
+
+def _area(rectangle: tuple) -> int:
+	return (rectangle[2] - rectangle[0]) * (rectangle[3] - rectangle[1])
+
+
+def _union(a: tuple, b: tuple) -> tuple:
+	return min(a[0], b[0]), min(a[1], b[1]), max(a[2], b[2]), max(a[3], b[3])
+
+
+class ImageDiff:
+	"""
+	Update of a display tag image, either partial images of the changed rectangles sent with a UpdatePart pattern code,
+	or the full image sent with a Update pattern code when that is smaller.
+
+	Attributes
+	pattern_code	int see PatternsCodes
+	entities		list of EntityImage, empty if nothing changed
+	rectangles		list of (left, upper, right, lower) of the entities, relative to the image
+	partial			bool True if entities are partial images
+	size			int bytes of the payload
+	full_size		int bytes of the full image payload
+	"""
+	def __init__(self, pattern_code: int, entities: list, rectangles: list, partial: bool, size: int, full_size: int):
+		self.pattern_code = pattern_code
+		self.entities = entities
+		self.rectangles = rectangles
+		self.partial = partial
+		self.size = size
+		self.full_size = full_size
+
+	@property
+	def payload(self) -> bytes:
+		"""
+		:return: bytes payload of the update
+		"""
+		return encode_payload(self.entities)
+
+	def __repr__(self):
+		return f'ImageDiff(pattern_code=0x{self.pattern_code:02X}, partial={self.partial}, rectangles={self.rectangles}, size={self.size}, full_size={self.full_size})'
+
+
+def diff_images(previous: Image, new: Image, x: int = 0, y: int = 0, colored_image: bool = False,
+				optimal_compression: bool = False, screen: int = 1, merge_gap: int = 8, x_align: int = 8,
+				max_rectangles: int = 16) -> ImageDiff:
+	"""
+	Build the smallest update from the image shown on a display tag to a new image.
+	Rectangles are merged while that makes the encoded payload smaller, and the full image is used if the partial
+	images together would be as big or bigger.
+
+	:param previous: Pillow Image shown on the display tag
+	:param new: Pillow Image to show, the same size as previous
+	:param x: int X position of the image on the display
+	:param y: int Y position of the image on the display
+	:param colored_image: bool True to include the color plane
+	:param optimal_compression: bool True to compress with the smallest possible RLE encoding
+	:param screen: int frame buffer 1 to 4 to update
+	:param merge_gap: int see changed_rectangles
+	:param x_align: int see changed_rectangles
+	:param max_rectangles: int maximum number of partial images
+	:return: ImageDiff
+	"""
+	full = EntityImage(x=x, y=y, image=new, colored_image=colored_image, optimal_compression=optimal_compression)
+	full_size = len(full.to_bytes())
+	full_update = ImageDiff(PatternsCodesInv[f'Update{screen}/Screen{screen}'], [full], [(0, 0, new.width, new.height)],
+							False, full_size, full_size)
+	previous_planes = image_to_bit_planes(previous)
+	new_planes = (full.image_black_raw, full.image_color_raw)
+	if not colored_image:
+		previous_planes, new_planes = previous_planes[:1], new_planes[:1]
+	rectangles = changed_rectangles(previous_planes, new_planes, merge_gap, x_align)
+	if not rectangles:
+		return ImageDiff(PatternsCodesInv[f'UpdatePart{screen}'], [], [], True, 0, full_size)
+
+	partials = {}
+
+	def encoded_size(rectangle: tuple) -> int:
+		if rectangle not in partials:
+			partials[rectangle] = EntityImage(x=x+rectangle[0], y=y+rectangle[1], image=new.crop(rectangle),
+											colored_image=colored_image, optimal_compression=optimal_compression)
+		return len(partials[rectangle].to_bytes())
+
+	# Merge by area first when there are many rectangles, encoding every pair would be too slow
+	while len(rectangles) > 2 * max_rectangles:
+		best = None
+		for i in range(len(rectangles)):
+			for j in range(i + 1, len(rectangles)):
+				union = _union(rectangles[i], rectangles[j])
+				grown = _area(union) - _area(rectangles[i]) - _area(rectangles[j])
+				if best is None or grown < best[0]:
+					best = (grown, i, j, union)
+		grown, i, j, union = best
+		rectangles = [rectangle for k, rectangle in enumerate(rectangles) if k not in (i, j)] + [union]
+
+	# Merge the pair of rectangles that saves the most bytes, until no merge saves bytes and the count is within limit
+	while len(rectangles) > 1:
+		best = None
+		for i in range(len(rectangles)):
+			for j in range(i + 1, len(rectangles)):
+				union = _union(rectangles[i], rectangles[j])
+				saved = encoded_size(rectangles[i]) + encoded_size(rectangles[j]) - encoded_size(union)
+				if best is None or saved > best[0]:
+					best = (saved, i, j, union)
+		saved, i, j, union = best
+		if saved <= 0 and len(rectangles) <= max_rectangles:
+			break
+		rectangles = [rectangle for k, rectangle in enumerate(rectangles) if k not in (i, j)] + [union]
+	rectangles.sort(key=lambda rectangle: (rectangle[1], rectangle[0]))
+
+	size = sum(encoded_size(rectangle) for rectangle in rectangles)
+	if size >= full_size:
+		return full_update
+	return ImageDiff(PatternsCodesInv[f'UpdatePart{screen}'], [partials[rectangle] for rectangle in rectangles],
+					rectangles, True, size, full_size)
+
+
+def _entity_key(entity) -> tuple:
+	"""
+	:return: tuple of entity type and position, entities are matched between label revisions by this key
+	"""
+	if isinstance(entity, EntityImage):
+		return type(entity).__name__, entity.x, entity.y
+	return type(entity).__name__, getattr(entity, 'vertical', None), getattr(entity, 'horizontal', None)
+
+
+def _entity_area(entity) -> tuple:
+	"""
+	:return: tuple describing the area a entity draws on, a entity with the same area covers what the entity before it
+	drew. Text and barcodes have the same area with the same number of characters in the same font style, rectangles,
+	lines and images with the same size. LED data draws nothing.
+	"""
+	if isinstance(entity, (EntityText, EntityBarcode)):
+		return len(entity.text), entity.font_style
+	if isinstance(entity, EntityRectangle):
+		return entity.height, entity.width, entity.border
+	if isinstance(entity, EntityLine):
+		return entity.font_style, entity.border
+	if isinstance(entity, EntityImage):
+		return entity.width, entity.height
+	return ()
+
+
+def _keyed_packages(entities) -> list:
+	"""
+	:return: list of (key, package), the key is the entity type, position and occurrence
+	"""
+	packages = []
+	occurrences = {}
+	for entity in entities:
+		key = _entity_key(entity)
+		occurrence = occurrences.get(key, 0)
+		occurrences[key] = occurrence + 1
+		packages.append((key + (occurrence,), entity.to_bytes()))
+	return packages
+
+
+def _digest(package: bytes) -> bytes:
+	return hashlib.blake2b(package, digest_size=16).digest()
+
+
+def entity_digests(entities) -> dict:
+	"""
+	Digests of the serialized entities of a label, can be stored instead of the entities to diff the next revision.
+	Entities of the same type on the same position are told apart by their order.
+
+	:param entities: iterable of entities
+	:return: dict of (entity type, position, occurrence) to (digest of the entity package, area of the entity)
+	"""
+	entities = list(entities)
+	return {key: (_digest(package), _entity_area(entity)) for entity, (key, package) in
+			zip(entities, _keyed_packages(entities))}
+
+
+class EntityDiff:
+	"""
+	Difference between two revisions of the entities on a label.
+
+	Attributes
+	added			list of entities in the new revision without a match in the previous revision
+	removed			list of keys (entity type, position, occurrence) of previous entities without a match
+	changed			list of entities in the new revision that differs from their match in the previous revision
+	unchanged		int number of entities that are the same in both revisions
+	digests			dict of the new revision, see entity_digests
+	pattern_code	int see PatternsCodes
+	partial			bool True if the payload only holds the added and changed entities
+	payload			bytes payload of the update, empty if nothing changed
+	"""
+	def __init__(self, added: list, removed: list, changed: list, unchanged: int, digests: dict, pattern_code: int,
+				partial: bool, payload: bytes):
+		self.added = added
+		self.removed = removed
+		self.changed = changed
+		self.unchanged = unchanged
+		self.digests = digests
+		self.pattern_code = pattern_code
+		self.partial = partial
+		self.payload = payload
+
+	@property
+	def identical(self) -> bool:
+		"""
+		:return: bool True if the revisions have the same entities
+		"""
+		return not (self.added or self.removed or self.changed)
+
+	def __repr__(self):
+		return f'EntityDiff(added={len(self.added)}, removed={len(self.removed)}, changed={len(self.changed)}, unchanged={self.unchanged}, partial={self.partial})'
+
+
+def diff_entities(previous, new: list, screen: int = 1, allow_partial: bool = True) -> EntityDiff:
+	"""
+	Compare two revisions of the entities on a label, entities are matched by type and position and compared by a
+	digest of their package.
+	A removed entity can only be cleared by drawing the whole label, then the payload has all entities and the Update
+	pattern code. Otherwise the payload only has the added and changed entities and the UpdatePart pattern code, they
+	are drawn over the label, so a changed entity must cover what it replaces. A changed entity that may draw a smaller
+	area than before, like a shorter text, would leave pixels of the entity before it, so that is also drawn as a whole
+	label, see _entity_area.
+
+	:param previous: list of entities, or dict from entity_digests or EntityDiff.digests of the previous revision
+	:param new: list of entities
+	:param screen: int frame buffer 1 to 4 to update
+	:param allow_partial: bool False to always build a payload with all entities
+	:return: EntityDiff
+	"""
+	if not isinstance(previous, dict):
+		previous = entity_digests(previous)
+	new = list(new)
+	digests = {}
+	added = []
+	changed = []
+	updated = []  # Packages of added and changed entities, in the order of the new revision
+	unchanged = 0
+	covered = True  # Changed entities draw over all of what they replace
+	for entity, (key, package) in zip(new, _keyed_packages(new)):
+		digest = digests[key] = (_digest(package), _entity_area(entity))
+		previous_digest = previous.get(key)
+		if previous_digest == digest:
+			unchanged += 1
+			continue
+		if previous_digest is None:
+			added.append(entity)
+		else:
+			changed.append(entity)
+			covered = covered and previous_digest[1] == digest[1]
+		updated.append(package)
+	removed = [key for key in previous if key not in digests]
+	if allow_partial and not removed and covered:
+		return EntityDiff(added, removed, changed, unchanged, digests, PatternsCodesInv[f'UpdatePart{screen}'], True,
+						b''.join(updated))
+	return EntityDiff(added, removed, changed, unchanged, digests, PatternsCodesInv[f'Update{screen}/Screen{screen}'],
+					False, encode_payload(new))
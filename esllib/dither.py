@@ -0,0 +1,141 @@
+from functools import lru_cache
+
+from PIL import Image, ImageChops, ImageFilter, ImageStat
+from esllib.conversion import image_to_rgb
+from esllib.Package import EntityImage
+
+DITHER_METHODS = ('threshold', 'bayer', 'floyd-steinberg', 'lines')
+# Second color of the display, both are drawn from the color plane
+_COLORS = {'red': (255, 0, 0), 'yellow': (255, 255, 0)}
+_ERROR_BLUR = ImageFilter.GaussianBlur(1)
+# Pillow before 9.1 has the dither constants on Image instead of the Image.Dither enum
+_DITHER = getattr(Image, 'Dither', Image)
+
+
+def _bayer_matrix(size: int) -> list:
+	"""
+	:param size: int width and height, a power of 2
+	:return: list of rows of int thresholds from 0 to size*size-1, spread out so every threshold level is even
+	"""
+	matrix = [[0]]
+	while len(matrix) < size:
+		matrix = [[4 * value for value in row] + [4 * value + 2 for value in row] for row in matrix] + \
+			[[4 * value + 3 for value in row] + [4 * value + 1 for value in row] for row in matrix]
+	return matrix
+
+
+def _line_screen(period: int) -> list:
+	"""
+	:param period: int number of rows, a power of 2
+	:return: list of int thresholds from 0 to period-1, one per row, spread out like a Bayer matrix
+	"""
+	screen = [0]
+	while len(screen) < period:
+		screen = [2 * value for value in screen] + [2 * value + 1 for value in screen]
+	return screen
+
+
+@lru_cache(maxsize=16)
+def _threshold_map(method: str, width: int, height: int, spread: int, period: int) -> Image:
+	"""
+	Threshold map of ordered dithering, tiled to the size of the image.
+	128 is no change, the map is added to the image with ImageChops.add and a offset of -128.
+	:return: Pillow Image in RGB mode
+	"""
+	if method == 'bayer':
+		matrix = _bayer_matrix(period)
+	else:
+		matrix = [[value] for value in _line_screen(period)]  # The same threshold along every row
+	levels = len(matrix) * len(matrix[0])
+	rows = []
+	for row in matrix:
+		values = bytes(min(255, max(0, round(128 + ((value + 0.5) / levels - 0.5) * spread))) for value in row)
+		rows.append((values * (width // len(values) + 1))[:width])
+	band = Image.frombytes('L', (width, height), b''.join(rows[y % len(rows)] for y in range(height)))
+	return Image.merge('RGB', (band, band, band))
+
+
+def dither_image(image: Image, method: str = 'threshold', colored: bool = True, color: str = 'red', spread: int = 255,
+				period: int = 4) -> Image:
+	"""
+	Quantize a image to the colors of the display, white, black and optionally the second color, ahead of EntityImage.
+	Every pixel gets the nearest color in RGB, after the threshold map of the method is added.
+
+	threshold		No dithering, flat areas stay flat but gradients are posterized
+	bayer			Ordered dithering with a period x period Bayer matrix
+	floyd-steinberg	Error diffusion, the smoothest gradients, but the noise gives short runs that compress the worst
+	lines			Ordered dithering with a horizontal line screen. The threshold only changes between rows, so a area of
+					the same tone is drawn as horizontal lines, with runs as long as the area for the RLE compression
+
+	The methods run in Pillow without going through the pixels in Python, the threshold map is added with
+	ImageChops.add and the colors are picked by Image.quantize.
+
+	:param image: Pillow Image of any mode
+	:param method: str one of DITHER_METHODS
+	:param colored: bool True to use the second color, False for only black and white
+	:param color: str 'red' or 'yellow' second color of the display
+	:param spread: int range of the threshold map of bayer and lines, 255 dithers the whole range between two colors
+	:param period: int size of the Bayer matrix or number of rows of the line screen, a power of 2
+	:return: Pillow Image in RGB mode with only the colors of the display
+	"""
+	if color not in _COLORS:
+		raise Exception(f'Color must be red or yellow, not {color}')
+	if period < 1 or period & (period - 1):
+		raise Exception(f'Period must be a power of 2, not {period}')
+	palette = [255, 255, 255, 0, 0, 0] + (list(_COLORS[color]) if colored else [])
+	palette_image = Image.new('P', (1, 1))
+	palette_image.putpalette(palette)
+	rgb = image_to_rgb(image)
+	dither = _DITHER.NONE
+	if method == 'floyd-steinberg':
+		dither = _DITHER.FLOYDSTEINBERG
+	elif method in ('bayer', 'lines'):
+		rgb = ImageChops.add(rgb, _threshold_map(method, rgb.width, rgb.height, spread, period), 1.0, -128)
+	elif method != 'threshold':
+		raise Exception(f'Dithering method must be one of {", ".join(DITHER_METHODS)}, not {method}')
+	return rgb.quantize(palette=palette_image, dither=dither).convert('RGB')
+
+
+class DitherResult:
+	"""
+	Image dithered with one method, and what it costs to send
+
+	Attributes
+	method			str dithering method, see dither_image
+	image			Pillow Image in RGB mode with only the colors of the display
+	size			int bytes of the image entity package
+	error			float mean difference of the color channels from the original, 0 to 255, both blurred first
+	"""
+	def __init__(self, method: str, image: Image, size: int, error: float):
+		self.method = method
+		self.image = image
+		self.size = size
+		self.error = error
+
+	def __repr__(self):
+		return f'DitherResult(method={self.method!r}, size={self.size}, error={self.error:.2f})'
+
+
+def compare_dithering(image: Image, methods=DITHER_METHODS, colored: bool = True, color: str = 'red',
+					spread: int = 255, period: int = 4, optimal_compression: bool = False) -> list:
+	"""
+	Dither a image with several methods, and report the size of the image entity package and the error of each, to
+	trade quality against bytes and airtime.
+	The error is measured after a Gaussian blur with radius 1 of both images, roughly how dithered pixels blend when the
+	display is seen at a distance, so a dithered gradient has a lower error than a posterized one.
+
+	:param image: Pillow Image of any mode
+	:param methods: iterable of str dithering methods, see dither_image
+	:param optimal_compression: bool True to size the packages with the smallest possible RLE encoding
+	:return: list of DitherResult, in the same order as methods
+	"""
+	original = image_to_rgb(image)
+	blurred = original.filter(_ERROR_BLUR)
+	results = []
+	for method in methods:
+		dithered = dither_image(original, method, colored, color, spread, period)
+		entity = EntityImage(image=dithered, colored_image=colored, optimal_compression=optimal_compression)
+		size = len(entity.to_bytes())
+		difference = ImageStat.Stat(ImageChops.difference(dithered.filter(_ERROR_BLUR), blurred)).mean
+		results.append(DitherResult(method, dithered, size, sum(difference) / len(difference)))
+	return results
@@ -91,3 +91,9 @@ AnswerTagStatus = {0x4E: 'Failed',
 					0xE6: 'ERRE6'
 }
 AnswerTagStatusInv = {v: k for k, v in AnswerTagStatus.items()}
+
+UpdatePriorities = {0: 'PriceChange',		# Scheduled before promotions and cosmetic updates
+					1: 'Promo',
+					2: 'Cosmetic'
+}
+UpdatePrioritiesInv = {v: k for k, v in UpdatePriorities.items()}
@@ -0,0 +1,138 @@
+import struct
+
+from esllib.conversion import int_to_hexstring
+from esllib.enums import PatternsCodes, PatternsCodesInv
+from esllib.payload import decode_payload, encode_payload
+
+_FRAME_HEADER = struct.Struct('>cHB3sH')  # Start, Length, PatternCode, Display Tag ID, ServiceCode
+
+
+class Frame:
+	"""
+	Frame sent to the ESL gateway, it wraps a payload of entities with the command and the display tag to send it to.
+	The layout follows the Answer package, the length counts the hexadecimal digits after the length field.
+
+	Part					Length	Data
+	Start					1		@
+	Length					4		000C (12 hexadecimal digits of following data when there is no payload)
+	PatternCode				2		33(Update1/Screen1), 35(Display1), 30(UpdatePart1), 53(Bind) See PatternsCodes
+	Display Tag ID			6		061C95
+	ServiceCode				4		4E23(20003) The Answer on this frame will have the same service code
+	Payload							Entities, see EntityText, EntityBarcode, EntityRectangle, EntityLine, EntityImage
+	Example: @001C33061C954E230701000100020041 write the text A to frame buffer 1 of display tag 061C95
+	"""
+	def __init__(self, raw="", pattern_code=PatternsCodesInv['Update1/Screen1'], display_tag_id="", service_code=0,
+				payload=b''):
+		"""
+		:param payload: bytes payload, or a list of entities
+		"""
+		if len(raw) > 0:
+			self._raw = raw
+			if isinstance(raw, str):
+				buffer = memoryview(raw[0].encode('ascii') + bytes.fromhex(raw[1:]))
+			else:
+				buffer = memoryview(raw)
+			if len(buffer) < _FRAME_HEADER.size:
+				raise Exception(f'Frame is at least {_FRAME_HEADER.size} bytes, this frame is {len(buffer)} bytes')
+			start, self.length, self.pattern_code, display_tag_id, self.service_code = _FRAME_HEADER.unpack_from(buffer)
+			if start != b'@':
+				raise Exception('Frame must start with @')
+			if self.length != (len(buffer) - 3) * 2:
+				raise Exception(f'Frame length field {self.length} does not match up with {(len(buffer) - 3) * 2} hexadecimal digits of data')
+			self.display_tag_id = display_tag_id.hex().upper()
+			self.payload = buffer[_FRAME_HEADER.size:]
+		else:
+			self.length = 0
+			self.pattern_code = pattern_code
+			self.display_tag_id = display_tag_id
+			self.service_code = service_code
+			if isinstance(payload, (list, tuple)):
+				payload = encode_payload(payload)
+			self.payload = payload
+
+	@classmethod
+	def from_bytes(cls, buffer):
+		"""
+		Parse a binary frame, that is @ followed by the frame in binary instead of hexadecimal
+		:param buffer: bytes, bytearray or memoryview
+		:return: Frame
+		"""
+		return cls(raw=buffer)
+
+	def to_bytes(self) -> bytes:
+		"""
+		Build and return a binary frame, that is @ followed by the frame in binary instead of hexadecimal
+		:return: bytes representing frame
+		"""
+		display_tag_id = bytes.fromhex(self.display_tag_id)
+		if len(display_tag_id) != 3:
+			raise Exception(f'Display Tag ID must be 6 hexadecimal digits, not {self.display_tag_id}')
+		length = (_FRAME_HEADER.size - 3 + len(self.payload)) * 2
+		if length > 0xFFFF:
+			raise Exception(f'Frame payload is {len(self.payload)} bytes, it cant fit in the length field.')
+		return _FRAME_HEADER.pack(b'@', length, self.pattern_code, display_tag_id, self.service_code) + self.payload
+
+	def entities(self, lazy_images: bool = False):
+		"""
+		Decode the entities of the payload
+		:param lazy_images: bool True to decode the pixels of images when they are read, see decode_payload
+		:return: generator of entities
+		"""
+		return decode_payload(self.payload, lazy_images)
+
+	def __repr__(self):
+		"""
+		Build and return a frame
+		:return: str representing frame
+		"""
+		return '@' + self.to_bytes()[1:].hex().upper()
+
+	def __str__(self):
+		"""
+		Build a human readable frame
+		:return: str
+		"""
+		out = "Frame\n"
+		out += "Part\t\t\t\t\tLength\tData\n"
+		out += "Start\t\t\t\t\t1\t\t@\n"
+		length = (_FRAME_HEADER.size - 3 + len(self.payload)) * 2
+		out += "Length\t\t\t\t\t4\t\t%s (%d)\n" % (int_to_hexstring(length, little_endian=False, number_of_hex_digits=4), length)
+		if self.pattern_code in PatternsCodes:
+			out += "PatternCode\t\t\t\t2\t\t%s (%s)\n" % (int_to_hexstring(self.pattern_code, little_endian=False,
+																		number_of_hex_digits=2),
+																		PatternsCodes[self.pattern_code])
+		else:
+			out += "PatternCode\t\t\t\t2\t\t%s (Unknown)\n" % int_to_hexstring(self.pattern_code, little_endian=False,
+																				number_of_hex_digits=2)
+		out += "Display Tag ID\t\t\t6\t\t%s\n" % self.display_tag_id
+		out += "ServiceCode\t\t\t\t4\t\t%s (%d)\n" % (int_to_hexstring(self.service_code, little_endian=False,
+																		number_of_hex_digits=4), self.service_code)
+		out += "Payload\t\t\t\t\t\t\t%s" % bytes(self.payload).hex().upper()
+		return out
+
+
+def batch_frames(frames) -> bytes:
+	"""
+	Join the frames of many display tags to a single buffer, to write it to the gateway at once
+	:param frames: iterable of Frame
+	:return: bytes
+	"""
+	return b''.join([frame.to_bytes() for frame in frames])
+
+
+def split_frames(buffer):
+	"""
+	Split a buffer of binary frames, the length field of each frame gives where the next frame starts
+	:param buffer: bytes, bytearray or memoryview
+	:return: generator of Frame
+	"""
+	buffer = memoryview(buffer)
+	offset = 0
+	while offset < len(buffer):
+		if len(buffer) - offset < 3:
+			raise Exception(f'Frame at byte {offset} is truncated')
+		end = offset + 3 + (buffer[offset+1] << 8 | buffer[offset+2]) // 2
+		if end > len(buffer):
+			raise Exception(f'Frame at byte {offset} ends at byte {end}, but the buffer is {len(buffer)} bytes')
+		yield Frame.from_bytes(buffer[offset:end])
+		offset = end
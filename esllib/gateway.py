@@ -0,0 +1,194 @@
+import asyncio
+
+from esllib.enums import PatternsCodesInv
+from esllib.frame import Frame
+from esllib.Package import Answer
+
+_ANSWER_HEX_DIGITS = 22  # Hexadecimal digits after @ in a answer
+_ANSWER_BINARY_SIZE = 11  # Bytes after @ in a binary answer
+
+
+class GatewayClient:
+	"""
+	Asyncio client for a ESL gateway, that keeps a window of frames in flight instead of waiting for every answer.
+
+	Every frame gets a service code that is unique among the frames in flight, and the Answer from the gateway is
+	matched to the frame by service code and display tag ID. Frames without a answer within the timeout are sent
+	again with a new service code, so a late answer on the earlier attempt is ignored.
+	Frames are written as @ and hexadecimal digits and answers are read as @ and 22 hexadecimal digits, or both in
+	binary form if binary is True.
+
+	async with GatewayClient('192.168.1.10', 9000, window=16) as gateway:
+		answer = await gateway.send('061C95', [EntityText(vertical=1, horizontal=1, font_style=2, text="19.90")])
+	"""
+	def __init__(self, host: str, port: int, window: int = 8, timeout: float = 10.0, retries: int = 2,
+				binary: bool = False):
+		"""
+		:param host: str host name or address of gateway
+		:param port: int TCP port of gateway
+		:param window: int number of frames in flight
+		:param timeout: float seconds to wait for a answer before sending the frame again
+		:param retries: int number of times a frame is sent again before giving up
+		:param binary: bool True to write frames and read answers in binary form instead of hexadecimal
+		"""
+		if not 0 < window < 0xFFFF:
+			raise Exception(f'Window must be between 1 and {0xFFFF - 1} frames, not {window}')
+		self.host = host
+		self.port = port
+		self.window = window
+		self.timeout = timeout
+		self.retries = retries
+		self.binary = binary
+		self.sent = 0
+		self.answered = 0
+		self.timeouts = 0
+		self.malformed = 0
+		self._reader = None
+		self._writer = None
+		self._reader_task = None
+		self._window = None
+		self._pending = {}  # (service code, display tag ID) to future of Answer
+		self._service_codes = set()  # Service codes of frames in flight
+		self._next_service_code = 1
+		self._connection_error = None
+
+	async def connect(self):
+		"""
+		Connect to the gateway and start reading answers
+		"""
+		self._reader, self._writer = await asyncio.open_connection(self.host, self.port)
+		self._window = asyncio.Semaphore(self.window)
+		self._connection_error = None
+		self._reader_task = asyncio.ensure_future(self._read_answers())
+
+	async def close(self):
+		"""
+		Close the connection, frames in flight fails with ConnectionError
+		"""
+		if self._reader_task is not None:
+			self._reader_task.cancel()
+			try:
+				await self._reader_task
+			except asyncio.CancelledError:
+				pass
+			self._reader_task = None
+		if self._writer is not None:
+			self._writer.close()
+			try:
+				await self._writer.wait_closed()
+			except ConnectionError:
+				pass
+			self._writer = None
+		self._fail_pending(ConnectionError('Gateway connection closed'))
+
+	async def __aenter__(self):
+		await self.connect()
+		return self
+
+	async def __aexit__(self, exc_type, exc, traceback):
+		await self.close()
+
+	@property
+	def in_flight(self) -> int:
+		"""
+		:return: int number of frames waiting for a answer
+		"""
+		return len(self._pending)
+
+	async def send(self, display_tag_id: str, payload=b'', pattern_code: int = PatternsCodesInv['Update1/Screen1']) \
+			-> Answer:
+		"""
+		Send a frame to a display tag and wait for the answer
+		:param display_tag_id: str 6 hexadecimal digits
+		:param payload: bytes payload, or a list of entities
+		:param pattern_code: int see PatternsCodes
+		:return: Answer
+		"""
+		return await self.send_frame(Frame(pattern_code=pattern_code, display_tag_id=display_tag_id, payload=payload))
+
+	async def send_frame(self, frame: Frame) -> Answer:
+		"""
+		Send a frame and wait for the answer, the service code of the frame is replaced by a allocated one, and the
+		display tag ID is changed to uppercase since the answer is matched by it.
+		Waits for a free slot in the window first.
+		:param frame: Frame
+		:return: Answer, check tag_status for the result on the display tag
+		"""
+		if self._writer is None:
+			raise ConnectionError('Gateway client is not connected')
+		frame.display_tag_id = frame.display_tag_id.upper()  # Answers always hold the display tag ID in uppercase
+		async with self._window:
+			for attempt in range(self.retries + 1):
+				if self._connection_error is not None:
+					raise self._connection_error
+				service_code = self._allocate_service_code()
+				frame.service_code = service_code
+				key = (service_code, frame.display_tag_id)
+				future = asyncio.get_running_loop().create_future()
+				self._pending[key] = future
+				try:
+					if self.binary:
+						self._writer.write(frame.to_bytes())
+					else:
+						self._writer.write(frame.__repr__().encode('ascii'))
+					await self._writer.drain()
+					self.sent += 1
+					answer = await asyncio.wait_for(future, self.timeout)
+					self.answered += 1
+					return answer
+				except asyncio.TimeoutError:
+					self.timeouts += 1
+				finally:
+					del self._pending[key]
+					self._service_codes.discard(service_code)
+		raise TimeoutError(f'No answer from display tag {frame.display_tag_id} after {self.retries + 1} attempts')
+
+	async def send_many(self, frames) -> list:
+		"""
+		Send frames concurrently, limited by the window
+		:param frames: iterable of Frame
+		:return: list of Answer or exception, in the same order as the frames
+		"""
+		return await asyncio.gather(*[self.send_frame(frame) for frame in frames], return_exceptions=True)
+
+	def _allocate_service_code(self) -> int:
+		"""
+		:return: int service code between 1 and 0xFFFF, that is not used by a frame in flight
+		"""
+		while True:
+			service_code = self._next_service_code
+			self._next_service_code = service_code % 0xFFFF + 1
+			if service_code not in self._service_codes:
+				self._service_codes.add(service_code)
+				return service_code
+
+	async def _read_answers(self):
+		"""
+		Read answers from the gateway and resolve the matching frames in flight
+		"""
+		try:
+			while True:
+				start = await self._reader.readexactly(1)
+				if start != b'@':
+					continue  # Skip line breaks and noise between answers
+				try:
+					if self.binary:
+						answer = Answer.from_bytes(start + await self._reader.readexactly(_ANSWER_BINARY_SIZE))
+					else:
+						answer = Answer('@' + (await self._reader.readexactly(_ANSWER_HEX_DIGITS)).decode('ascii'))
+				except (asyncio.IncompleteReadError, ConnectionError):
+					raise
+				except Exception:
+					self.malformed += 1
+					continue
+				future = self._pending.get((answer.service_code, answer.display_tag_id))
+				if future is not None and not future.done():
+					future.set_result(answer)
+		except (asyncio.IncompleteReadError, ConnectionError) as e:
+			self._connection_error = ConnectionError(f'Gateway connection lost: {e}')
+			self._fail_pending(self._connection_error)
+
+	def _fail_pending(self, error: Exception):
+		for future in self._pending.values():
+			if not future.done():
+				future.set_exception(error)
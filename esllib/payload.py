@@ -0,0 +1,105 @@
+from esllib.enums import FontStyles, FontStylesInv
+from esllib.Package import _raw_to_buffer, EntityText, EntityBarcode, EntityRectangle, EntityLine, EntityLEDData, \
+	EntityImage
+
+# Entity class by font style, the font style is the 6th byte of every length prefixed entity except rectangles
+_ENTITY_CLASSES = {}
+for _font_style, _name in FontStyles.items():
+	if _name.startswith('Barcode'):
+		_ENTITY_CLASSES[_font_style] = EntityBarcode
+	elif _name in ('Horizontal Line', 'Vertical Line'):
+		_ENTITY_CLASSES[_font_style] = EntityLine
+	elif _name.endswith('px'):
+		_ENTITY_CLASSES[_font_style] = EntityText
+_ENTITY_CLASSES[0xED] = EntityLEDData  # The hardcoded 00ED takes the place of draw style and font style
+_RECTANGLE = FontStylesInv['Rectangle']  # Rectangles have font style as the 5th byte, before draw style
+_IMAGE_HEADER_SIZE = 13  # ImageType, X, Y, Height, Width and Size
+_IMAGE_TYPES = (FontStylesInv['ImageCompress'], FontStylesInv['ImageX2'], FontStylesInv['Image'])
+
+
+def _image_end(buffer: memoryview, offset: int) -> int:
+	"""
+	:param buffer: memoryview of payload
+	:param offset: int start of image
+	:return: int end of the black part, or of the color part if there is one
+	"""
+	end = offset + _IMAGE_HEADER_SIZE + int.from_bytes(buffer[offset+9:offset+13], 'big')
+	# A color part starts with the same image type as the black part and the hardcoded 8 filler before X
+	if end + 1 < len(buffer) and buffer[end] == buffer[offset] and buffer[end+1] >> 4 == 8:
+		end += _IMAGE_HEADER_SIZE + int.from_bytes(buffer[end+9:end+13], 'big')
+	if end > len(buffer):
+		raise Exception(f'Image at byte {offset} ends at byte {end}, but the payload is {len(buffer)} bytes.')
+	return end
+
+
+def _is_image(buffer: memoryview, offset: int) -> bool:
+	"""
+	FC and FE are even, so they can't be the length byte of a entity. FD is also the length byte of a text or barcode
+	entity with 248 bytes of text, so it is only a image if the image header fits the payload, and if the font style of
+	a entity of that length doesn't fit it. A image ending exactly at the end of the payload is taken as a image.
+	:param buffer: memoryview of payload
+	:param offset: int start of entity
+	:return: bool True if a image starts at offset
+	"""
+	image_type = buffer[offset]
+	if image_type not in _IMAGE_TYPES:
+		return False
+	if image_type != FontStylesInv['ImageX2']:
+		return True
+	if offset + _IMAGE_HEADER_SIZE > len(buffer):
+		return False
+	try:
+		end = _image_end(buffer, offset)
+	except Exception:
+		return False
+	entity_end = offset + 1 + image_type
+	if entity_end > len(buffer) or _ENTITY_CLASSES.get(buffer[offset+5]) not in (EntityText, EntityBarcode):
+		return True
+	return end == len(buffer) and entity_end != len(buffer)
+
+
+def decode_payload(payload, lazy_images: bool = False):
+	"""
+	Decode a display payload, a run of length prefixed entities optionally followed by a image.
+	The payload is decoded in a single pass, the length byte gives the end of each entity, and the font style byte
+	gives the entity class. A image has no length byte, it is recognized by the image type FC, FD or FE at the start of a
+	entity. Length bytes of other entities are always odd, so FC and FE are always images, but FD is also the length of a
+	text or barcode with 248 bytes of text, see _is_image. The size fields of the black and the optional color part gives the
+	end of the image, so a payload can hold several images.
+	Entities are parsed from slices of the payload when they are yielded, without copying the payload.
+
+	:param payload: str hexadecimal string, or bytes, bytearray or memoryview
+	:param lazy_images: bool True to only parse the headers of images, the pixels are decoded when image is read, see
+	EntityImage
+	:return: generator of entities, EntityText, EntityBarcode, EntityRectangle, EntityLine, EntityLEDData or EntityImage
+	"""
+	buffer = _raw_to_buffer(payload)
+	payload_length = len(buffer)
+	offset = 0
+	while offset < payload_length:
+		length = buffer[offset]
+		if _is_image(buffer, offset):
+			end = _image_end(buffer, offset)
+			yield EntityImage.from_bytes(buffer[offset:end], lazy=lazy_images)
+			offset = end
+			continue
+		end = offset + 1 + length
+		if end > payload_length or length < 5:
+			raise Exception(f'Entity at byte {offset} has length {length}, but the payload is {payload_length} bytes.')
+		if buffer[offset+4] == _RECTANGLE:
+			entity_class = EntityRectangle
+		else:
+			entity_class = _ENTITY_CLASSES.get(buffer[offset+5])
+			if entity_class is None:
+				raise Exception(f'Unknown font style 0x{buffer[offset+5]:02X} in entity at byte {offset}.')
+		yield entity_class.from_bytes(buffer[offset:end])
+		offset = end
+
+
+def encode_payload(entities) -> bytes:
+	"""
+	Build a display payload from entities
+	:param entities: iterable of entities
+	:return: bytes payload
+	"""
+	return b''.join([entity.to_bytes() for entity in entities])
@@ -0,0 +1,203 @@
+import asyncio
+import heapq
+import time
+
+from esllib.enums import PatternsCodesInv, UpdatePrioritiesInv
+from esllib.frame import Frame
+from esllib.payload import encode_payload
+
+_NO_DEADLINE = float('inf')
+_AIRTIME_TOLERANCE = 1e-9  # Seconds, so rounding errors of the budget don't hold back a frame
+
+
+class _Update:
+	"""
+	Pending update of a display tag
+	"""
+	__slots__ = ('display_tag_id', 'payload', 'pattern_code', 'priority', 'deadline', 'gateway', 'sequence')
+
+	def __init__(self, display_tag_id, payload, pattern_code, priority, deadline, gateway, sequence):
+		self.display_tag_id = display_tag_id
+		self.payload = payload
+		self.pattern_code = pattern_code
+		self.priority = priority
+		self.deadline = deadline
+		self.gateway = gateway
+		self.sequence = sequence
+
+
+class UpdateScheduler:
+	"""
+	Scheduler of display tag updates, that coalesces updates to the same display tag and orders them by priority.
+
+	Pending updates are keyed by display tag ID, a newer update replaces the payload of a pending update to the same
+	tag, so only the latest payload is sent. The coalesced update keeps the most urgent priority and the earliest
+	deadline of the two.
+	Updates are sent by priority class, see UpdatePriorities, and by earliest deadline within a class. Updates without
+	a deadline are sent after those with a deadline.
+	Every gateway has a airtime budget, refilled with airtime_budget seconds of airtime per second up to burst seconds.
+	The airtime of a frame is estimated from its payload size like on the simulated gateway.
+
+	scheduler = UpdateScheduler(airtime_per_byte=0.0001, airtime_budget=0.5)
+	scheduler.submit('061C95', payload, priority=UpdatePrioritiesInv['PriceChange'], gateway='aisle-1')
+	await scheduler.run(client.send_frame, gateway='aisle-1')
+	"""
+	def __init__(self, airtime_per_frame: float = 0.0, airtime_per_byte: float = 0.0, airtime_budget: float = None,
+				burst: float = 1.0, clock=time.monotonic):
+		"""
+		:param airtime_per_frame: float estimated seconds of radio time for every frame
+		:param airtime_per_byte: float estimated seconds of radio time for every payload byte
+		:param airtime_budget: float seconds of airtime per second for every gateway, None for no limit
+		:param burst: float seconds of airtime a gateway can use at once after being idle
+		:param clock: function returning seconds, for the airtime budget and deadlines
+		"""
+		self.airtime_per_frame = airtime_per_frame
+		self.airtime_per_byte = airtime_per_byte
+		self.airtime_budget = airtime_budget
+		self.burst = burst
+		self.clock = clock
+		self.submitted = 0
+		self.coalesced = 0
+		self.scheduled = 0
+		self.airtime_saved = 0.0
+		self._pending = {}  # Display tag ID to _Update
+		self._queues = {}  # Gateway to heap of (priority, deadline, sequence, display tag ID)
+		self._budgets = {}  # Gateway to [seconds of airtime available, time of last refill]
+		self._sequence = 0
+
+	def airtime(self, payload) -> float:
+		"""
+		:param payload: bytes payload
+		:return: float estimated seconds of radio time to send the payload
+		"""
+		return self.airtime_per_frame + self.airtime_per_byte * len(payload)
+
+	def submit(self, display_tag_id: str, payload=b'', priority: int = UpdatePrioritiesInv['PriceChange'],
+				deadline: float = None, pattern_code: int = PatternsCodesInv['Update1/Screen1'], gateway=None) -> bool:
+		"""
+		Add a update, replacing the payload of a pending update to the same display tag
+		:param display_tag_id: str 6 hexadecimal digits
+		:param payload: bytes payload, or a list of entities
+		:param priority: int see UpdatePriorities, lower is more urgent
+		:param deadline: float time from clock when the update should be sent, None for no deadline
+		:param pattern_code: int see PatternsCodes
+		:param gateway: gateway the display tag is reached through, any hashable value
+		:return: bool True if a pending update was replaced
+		"""
+		if isinstance(payload, (list, tuple)):
+			payload = encode_payload(payload)
+		display_tag_id = display_tag_id.upper()
+		deadline = _NO_DEADLINE if deadline is None else deadline
+		self.submitted += 1
+		self._sequence += 1
+		previous = self._pending.get(display_tag_id)
+		if previous is not None:
+			self.coalesced += 1
+			self.airtime_saved += self.airtime(previous.payload)
+			priority = min(priority, previous.priority)
+			deadline = min(deadline, previous.deadline)
+		update = _Update(display_tag_id, payload, pattern_code, priority, deadline, gateway, self._sequence)
+		self._pending[display_tag_id] = update
+		heapq.heappush(self._queues.setdefault(gateway, []), (priority, deadline, update.sequence, display_tag_id))
+		return previous is not None
+
+	def cancel(self, display_tag_id: str) -> bool:
+		"""
+		Remove a pending update
+		:param display_tag_id: str 6 hexadecimal digits
+		:return: bool True if there was a pending update
+		"""
+		return self._pending.pop(display_tag_id.upper(), None) is not None
+
+	def pending(self, gateway=None) -> int:
+		"""
+		:param gateway: gateway to count updates of, None counts updates of all gateways
+		:return: int number of pending updates
+		"""
+		if gateway is None:
+			return len(self._pending)
+		return sum(1 for update in self._pending.values() if update.gateway == gateway)
+
+	def __len__(self):
+		return len(self._pending)
+
+	def _peek(self, gateway):
+		"""
+		:return: _Update next to be sent through the gateway, or None
+		"""
+		queue = self._queues.get(gateway)
+		while queue:
+			priority, deadline, sequence, display_tag_id = queue[0]
+			update = self._pending.get(display_tag_id)
+			if update is not None and update.sequence == sequence:
+				return update
+			heapq.heappop(queue)  # Replaced or cancelled
+		return None
+
+	def _available_airtime(self, gateway) -> float:
+		if self.airtime_budget is None:
+			return _NO_DEADLINE
+		now = self.clock()
+		budget = self._budgets.get(gateway)
+		if budget is None:
+			budget = self._budgets[gateway] = [self.burst, now]
+		budget[0] = min(self.burst, budget[0] + (now - budget[1]) * self.airtime_budget)
+		budget[1] = now
+		return budget[0]
+
+	def pop(self, gateway=None, max_frames: int = None) -> list:
+		"""
+		Take the next updates of a gateway that fits in its airtime budget
+		:param gateway: gateway to take updates of
+		:param max_frames: int maximum number of frames, None for no limit
+		:return: list of Frame, the service code is left to the transport
+		"""
+		frames = []
+		available = self._available_airtime(gateway)
+		while max_frames is None or len(frames) < max_frames:
+			update = self._peek(gateway)
+			if update is None:
+				break
+			airtime = self.airtime(update.payload)
+			# A frame longer than the burst is let through when the budget is full, so it isn't stuck forever
+			if airtime > available + _AIRTIME_TOLERANCE and available < self.burst:
+				break
+			available -= airtime
+			heapq.heappop(self._queues[gateway])
+			del self._pending[update.display_tag_id]
+			frames.append(Frame(pattern_code=update.pattern_code, display_tag_id=update.display_tag_id,
+								payload=update.payload))
+		if self.airtime_budget is not None:
+			self._budgets[gateway][0] = available
+		self.scheduled += len(frames)
+		return frames
+
+	def wait_time(self, gateway=None) -> float:
+		"""
+		:param gateway: gateway to wait for
+		:return: float seconds until the airtime budget allows the next update, or None if there is no pending update
+		"""
+		update = self._peek(gateway)
+		if update is None:
+			return None
+		if self.airtime_budget is None:
+			return 0.0
+		needed = min(self.airtime(update.payload), self.burst) - self._available_airtime(gateway)
+		return max(0.0, (needed - _AIRTIME_TOLERANCE) / self.airtime_budget)
+
+	async def run(self, send, gateway=None) -> list:
+		"""
+		Feed the pending updates of a gateway to a transport until there are no pending updates left
+		:param send: coroutine function sending a Frame, like GatewayClient.send_frame
+		:param gateway: gateway to send updates of
+		:return: list of results of send, or exceptions
+		"""
+		tasks = []
+		while True:
+			for frame in self.pop(gateway):
+				tasks.append(asyncio.ensure_future(send(frame)))
+			wait = self.wait_time(gateway)
+			if wait is None:
+				break
+			await asyncio.sleep(wait)
+		return await asyncio.gather(*tasks, return_exceptions=True)
@@ -0,0 +1,215 @@
+import argparse
+import asyncio
+import random
+
+from esllib.enums import AnswerTagStatusInv
+from esllib.frame import Frame
+from esllib.Package import Answer
+
+
+class VirtualTag:
+	"""
+	State of a simulated display tag, created the first time a frame is sent to it
+	"""
+	__slots__ = ('display_tag_id', 'updates', 'last_pattern_code', 'last_payload_size', 'status', 'rssi', 'volt',
+				'temperature')
+
+	def __init__(self, display_tag_id: str, status: int):
+		self.display_tag_id = display_tag_id
+		self.updates = 0
+		self.last_pattern_code = None
+		self.last_payload_size = 0
+		self.status = status
+		self.rssi = -70
+		self.volt = 3.0
+		self.temperature = 20
+
+
+class GatewaySimulator:
+	"""
+	Simulated ESL gateway on TCP, for load testing clients and schedulers without radios.
+
+	Frames are read the same way GatewayClient writes them, and the payload is decoded with the entity classes.
+	The radio sends one frame at a time, a frame occupies it for airtime_per_frame plus airtime_per_byte for every
+	payload byte. After the airtime and the latency the Answer is written, unless the frame is lost.
+	Frames with a payload that can't be decoded are answered with the Failed status. Frames that can't be parsed at all
+	have no display tag ID or service code to answer, so they are skipped and counted as malformed, and the
+	connection is kept.
+	Display tags are only created when a frame is sent to them, so the simulator scales to any number of tags.
+
+	simulator = GatewaySimulator(airtime_per_byte=0.0001, latency=0.05, loss=0.01)
+	port = await simulator.start()
+	"""
+	def __init__(self, host: str = '127.0.0.1', port: int = 0, airtime_per_frame: float = 0.0,
+				airtime_per_byte: float = 0.0, latency: float = 0.0, loss: float = 0.0,
+				default_status: int = AnswerTagStatusInv['Success'], decode: bool = True, binary: bool = False,
+				seed=None):
+		"""
+		:param host: str address to listen on
+		:param port: int TCP port to listen on, 0 picks a free port
+		:param airtime_per_frame: float seconds of radio time for every frame
+		:param airtime_per_byte: float seconds of radio time for every payload byte
+		:param latency: float seconds between the end of the airtime and the answer
+		:param loss: float probability between 0 and 1 that a frame gets no answer
+		:param default_status: int tag status of answers, see AnswerTagStatus
+		:param decode: bool True to decode the entities of every payload
+		:param binary: bool True to read frames and write answers in binary form instead of hexadecimal
+		:param seed: seed of the random loss, for repeatable runs
+		"""
+		self.host = host
+		self.port = port
+		self.airtime_per_frame = airtime_per_frame
+		self.airtime_per_byte = airtime_per_byte
+		self.latency = latency
+		self.loss = loss
+		self.default_status = default_status
+		self.decode = decode
+		self.binary = binary
+		self.tags = {}
+		self.frames = 0
+		self.payload_bytes = 0
+		self.lost = 0
+		self.answered = 0
+		self.malformed = 0
+		self.airtime = 0.0
+		self._random = random.Random(seed)
+		self._radio_free_at = 0.0
+		self._server = None
+
+	def tag(self, display_tag_id: str) -> VirtualTag:
+		"""
+		:param display_tag_id: str 6 hexadecimal digits
+		:return: VirtualTag, created if it did not exist
+		"""
+		tag = self.tags.get(display_tag_id)
+		if tag is None:
+			tag = self.tags[display_tag_id] = VirtualTag(display_tag_id, self.default_status)
+		return tag
+
+	def set_tag_status(self, display_tag_id: str, status: int):
+		"""
+		Answer all frames to a display tag with a tag status
+		:param display_tag_id: str 6 hexadecimal digits
+		:param status: int see AnswerTagStatus
+		"""
+		self.tag(display_tag_id.upper()).status = status
+
+	async def start(self) -> int:
+		"""
+		Start listening
+		:return: int TCP port
+		"""
+		self._server = await asyncio.start_server(self._handle, self.host, self.port)
+		self.port = self._server.sockets[0].getsockname()[1]
+		return self.port
+
+	async def stop(self):
+		"""
+		Stop listening
+		"""
+		if self._server is not None:
+			self._server.close()
+			await self._server.wait_closed()
+			self._server = None
+
+	def stats(self) -> dict:
+		"""
+		:return: dict with frames, payload_bytes, lost, answered, malformed, airtime and tags
+		"""
+		return {
+			'frames': self.frames,
+			'payload_bytes': self.payload_bytes,
+			'lost': self.lost,
+			'answered': self.answered,
+			'malformed': self.malformed,
+			'airtime': self.airtime,
+			'tags': len(self.tags)
+		}
+
+	async def _handle(self, reader, writer):
+		try:
+			while True:
+				try:
+					if self.binary:
+						header = await reader.readexactly(3)
+						frame = Frame.from_bytes(header + await reader.readexactly((header[1] << 8 | header[2]) // 2))
+					else:
+						start = await reader.readexactly(1)
+						if start != b'@':
+							continue  # Skip line breaks between frames
+						length = await reader.readexactly(4)
+						data = await reader.readexactly(int(length, 16))
+						frame = Frame((start + length + data).decode('ascii'))
+				except (asyncio.IncompleteReadError, ConnectionError):
+					raise
+				except Exception:
+					self.malformed += 1
+					continue  # Look for the next frame, a hexadecimal frame starts at the next @
+				self._receive(frame, writer)
+		except (asyncio.IncompleteReadError, ConnectionError):
+			pass
+		finally:
+			writer.close()
+
+	def _receive(self, frame: Frame, writer):
+		"""
+		Put a frame on the simulated radio, and schedule the answer
+		"""
+		loop = asyncio.get_running_loop()
+		tag = self.tag(frame.display_tag_id)
+		status = tag.status
+		if self.decode:
+			try:
+				for entity in frame.entities():
+					pass
+			except Exception:
+				status = AnswerTagStatusInv['Failed']
+		payload_size = len(frame.payload)
+		airtime = self.airtime_per_frame + self.airtime_per_byte * payload_size
+		start = max(loop.time(), self._radio_free_at)
+		self._radio_free_at = start + airtime
+		self.frames += 1
+		self.payload_bytes += payload_size
+		self.airtime += airtime
+		tag.updates += 1
+		tag.last_pattern_code = frame.pattern_code
+		tag.last_payload_size = payload_size
+		if self.loss and self._random.random() < self.loss:
+			self.lost += 1
+			return
+		answer = Answer(service_code=frame.service_code, display_tag_id=frame.display_tag_id, rssi=tag.rssi,
+						tag_status=status, volt=tag.volt, temperature=tag.temperature)
+		loop.call_at(self._radio_free_at + self.latency, self._answer, writer, answer)
+
+	def _answer(self, writer, answer: Answer):
+		if writer.is_closing():
+			return
+		if self.binary:
+			writer.write(answer.to_bytes())
+		else:
+			writer.write(answer.__repr__().encode('ascii') + b'\r\n')
+		self.answered += 1
+
+
+def main():
+	parser = argparse.ArgumentParser(description='Simulated ESL gateway')
+	parser.add_argument('--host', default='127.0.0.1')
+	parser.add_argument('--port', type=int, default=9000)
+	parser.add_argument('--airtime-per-frame', type=float, default=0.0)
+	parser.add_argument('--airtime-per-byte', type=float, default=0.0)
+	parser.add_argument('--latency', type=float, default=0.0)
+	parser.add_argument('--loss', type=float, default=0.0)
+	parser.add_argument('--binary', action='store_true')
+	args = parser.parse_args()
+
+	async def serve():
+		simulator = GatewaySimulator(args.host, args.port, args.airtime_per_frame, args.airtime_per_byte, args.latency,
+									args.loss, binary=args.binary)
+		await simulator.start()
+		print(f'Simulated gateway listening on {args.host}:{simulator.port}')
+		await asyncio.Event().wait()
+	asyncio.run(serve())
+
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,115 @@
+import copy
+
+from esllib.conversion import utf8_to_utf16bytes, position_to_bytes
+from esllib.Package import EntityText, EntityBarcode
+
+
+class LabelTemplate:
+	"""
+	Precompiled label layout, where only the named slots change between display tags.
+
+	Entities without slots are serialized once when the template is created, and consecutive static entities are joined
+	to a single block of bytes. For every tag only the slotted entities are built, and the payload is spliced together
+	from the static blocks and the slotted entities.
+	Text slots of a EntityText are spliced from a precomputed header, and only the text and the length byte is
+	computed per tag. Other slots are built by a copy of the template entity with the slot attributes replaced.
+
+	template = LabelTemplate([name_text, price_text, ean_barcode, frame_rectangle],
+							slots={'name': (0, 'text'), 'price': (1, 'text'), 'ean': (2, 'text')})
+	payload = template.build(name="Milk 1L", price="19.90", ean="731234567890")
+	"""
+	def __init__(self, entities: list, slots: dict = None):
+		"""
+		:param entities: list of entities in payload order, EntityText, EntityBarcode, EntityRectangle, EntityLine,
+		EntityImage etc.
+		:param slots: dict of slot name to (int entity index, str attribute name)
+		"""
+		self.entities = list(entities)
+		self.slots = dict(slots or {})
+		slots_by_entity = {}
+		for name, (index, attribute) in self.slots.items():
+			if not 0 <= index < len(self.entities):
+				raise Exception(f'Slot {name} refers to entity {index}, template has {len(self.entities)} entities.')
+			if not hasattr(self.entities[index], attribute):
+				raise Exception(f'Slot {name} refers to missing attribute {attribute} of entity {index}.')
+			slots_by_entity.setdefault(index, {})[attribute] = name
+		# Parts are either bytes, or a function building bytes from the dict of slot values
+		self._parts = []
+		static = []
+		for index, entity in enumerate(self.entities):
+			if index not in slots_by_entity:
+				static.append(entity.to_bytes())
+				continue
+			if static:
+				self._parts.append(b''.join(static))
+				static = []
+			self._parts.append(self._compile_entity(entity, slots_by_entity[index]))
+		if static:
+			self._parts.append(b''.join(static))
+
+	@staticmethod
+	def _compile_entity(entity, attributes: dict):
+		"""
+		:param entity: template entity with slots
+		:param attributes: dict of attribute name to slot name
+		:return: function building the entity bytes from a dict of slot values
+		"""
+		if type(entity) is EntityText and list(attributes) == ['text']:
+			name = attributes['text']
+			default = entity.text
+			header = position_to_bytes(entity.vertical, entity.horizontal) + bytes((entity.draw_style, entity.font_style))
+			header_length = len(header)
+
+			def build_text(values: dict) -> bytes:
+				text = utf8_to_utf16bytes(values.get(name, default))
+				length = header_length + len(text)
+				if length > 0xFF:
+					raise Exception(f'Text in slot {name} is {len(text)} bytes, it cant fit in the length field.')
+				return bytes((length,)) + header + text
+			return build_text
+
+		if type(entity) is EntityBarcode and list(attributes) == ['text']:
+			# The check digit depends on the text, so let the barcode validate and calculate it
+			name = attributes['text']
+
+			def build_barcode(values: dict) -> bytes:
+				if name not in values:
+					return entity.to_bytes()
+				return EntityBarcode(vertical=entity.vertical, horizontal=entity.horizontal, draw_style=entity.draw_style,
+									font_style=entity.font_style, text=values[name]).to_bytes()
+			return build_barcode
+
+		def build_entity(values: dict) -> bytes:
+			slotted = copy.copy(entity)
+			for attribute, name in attributes.items():
+				if name in values:
+					setattr(slotted, attribute, values[name])
+			return slotted.to_bytes()
+		return build_entity
+
+	def build(self, **values) -> bytes:
+		"""
+		Build the payload of one display tag, slots without a value keeps the value of the template entity
+		:param values: slot name and value
+		:return: bytes payload
+		"""
+		for name in values:
+			if name not in self.slots:
+				raise Exception(f'Label template has no slot named {name}.')
+		return b''.join([part if part.__class__ is bytes else part(values) for part in self._parts])
+
+	def build_many(self, rows):
+		"""
+		Build payloads for many display tags
+		:param rows: iterable of dicts with slot values
+		:return: generator of bytes payloads
+		"""
+		for values in rows:
+			yield self.build(**values)
+
+	@property
+	def static_size(self) -> int:
+		"""
+		:return: int number of bytes in the payload that are serialized once
+		"""
+		return sum(len(part) for part in self._parts if part.__class__ is bytes)
@@ -12,3 +12,10 @@ class TestAnswer(TestCase):
 	def test_answer_raw_decode(self):
 		self.assertEqual("@00124E23061C95AD541F11", Answer("@00124E23061C95AD541F11").__repr__())
 		self.assertEqual("@001299D1061C95DB541F19", Answer("@001299D1061C95DB541F19").__repr__())
+
+	def test_answer_bytes(self):
+		packet = b'@' + bytes.fromhex("00124E23061C95AD541F11")
+		answer = Answer.from_bytes(packet)
+		self.assertEqual((20003, "061C95", -81, AnswerTagStatusInv['Success'], 3.1, 17), (answer.service_code, answer.display_tag_id, answer.rssi, answer.tag_status, answer.volt, answer.temperature))
+		self.assertEqual(packet, answer.to_bytes())
+		self.assertEqual("@00124E23061C95AD541F11", answer.__repr__())
@@ -0,0 +1,58 @@
+from unittest import TestCase
+
+from PIL import Image, ImageDraw
+from esllib.batch import BatchEncoder, encode_labels
+from esllib.Package import EntityImage, EntityText, EntityRectangle
+from esllib.payload import encode_payload
+
+
+def make_label(number: int) -> list:
+	image = Image.new('RGB', (64, 32), "white")
+	draw = ImageDraw.Draw(image)
+	draw.rectangle((2, 2, 10 + number % 40, 12), fill=(0, 0, 0))
+	draw.rectangle((4, 20, 20, 20 + number % 10), fill=(255, 0, 0))
+	return [EntityText(vertical=1, horizontal=1, font_style=2, text=f'{number}.90'),
+			EntityImage(x=8, y=16, image=image, colored_image=True, auto_crop=number % 2 == 1)]
+
+
+class TestBatchEncoder(TestCase):
+	def setUp(self):
+		self.labels = [make_label(number) for number in range(40)]
+		self.expected = [encode_payload(label) for label in self.labels]
+
+	def test_encode_in_order(self):
+		self.assertEqual(self.expected, encode_labels(self.labels, processes=2, chunk_size=3))
+		self.assertEqual(self.expected, encode_labels(iter(self.labels), processes=0, chunk_size=3))
+
+	def test_encode_as_completed(self):
+		with BatchEncoder(processes=2, chunk_size=4) as encoder:
+			payloads = dict(encoder.encode_as_completed(self.labels))
+			self.assertEqual(10, encoder.chunks)
+		self.assertEqual(self.expected, [payloads[index] for index in range(len(self.labels))])
+
+	def test_back_pressure(self):
+		consumed = []
+
+		def labels():
+			for label in self.labels:
+				consumed.append(label)
+				yield label
+		with BatchEncoder(processes=1, chunk_size=2, max_pending_chunks=2) as encoder:
+			payloads = encoder.encode(labels())
+			self.assertEqual(self.expected[0], next(payloads))
+			self.assertEqual(4, len(consumed))  # Only the chunks in flight are read
+			payloads.close()
+			self.assertEqual(4, len(consumed))
+
+	def test_mixed_entities(self):
+		palette_image = Image.new('P', (16, 8), 0)
+		palette_image.putpalette([255, 255, 255, 0, 0, 0])
+		palette_image.putpixel((3, 3), 1)
+		# Rows that don't fill a whole byte, and a color plane after the black plane
+		odd_image = Image.new('RGB', (61, 13), "white")
+		ImageDraw.Draw(odd_image).rectangle((3, 2, 57, 9), fill=(255, 0, 0), outline=(0, 0, 0))
+		labels = [[EntityRectangle(vertical=0, horizontal=0, height=10, width=10)],
+				[EntityImage(image=palette_image)],
+				[EntityImage(image=odd_image, colored_image=True), EntityImage(x=5, image=odd_image)],
+				[]]
+		self.assertEqual([encode_payload(label) for label in labels], encode_labels(labels, processes=1, chunk_size=1))
@@ -0,0 +1,68 @@
+from unittest import TestCase
+
+from PIL import Image
+from esllib import bitplane
+from esllib.bitplane import BitPlane
+from esllib.conversion import compress_pixel_array, uncompress_pixel_plane, pixel_string_to_image
+
+pixels = bytes([1, 0, 0, 1, 1, 1, 0, 0, 0, 1,
+				0, 0, 0, 0, 0, 0, 0, 0, 0, 1,
+				1, 1, 1, 1, 1, 1, 1, 1, 1, 1])
+
+
+class TestBitPlane(TestCase):
+	def test_pack_unpack(self):
+		plane = BitPlane.from_pixels(pixels, 10, 3)
+		self.assertEqual(2, plane.stride)
+		self.assertEqual(bytes([0x9C, 0x40, 0x00, 0x40, 0xFF, 0xC0]), bytes(plane.data))
+		self.assertEqual(pixels, plane.to_pixels())
+		self.assertEqual(pixels[10:20], plane.row(1))
+		self.assertEqual(1, plane.get(9, 1))
+		self.assertEqual(0, plane.get(8, 1))
+		self.assertEqual(30, len(plane))
+
+	def test_pack_unpack_without_numpy(self):
+		numpy = bitplane.numpy
+		bitplane.numpy = None
+		try:
+			plane = BitPlane.from_pixels(pixels, 10, 3)
+			self.assertEqual(bytes([0x9C, 0x40, 0x00, 0x40, 0xFF, 0xC0]), bytes(plane.data))
+			self.assertEqual(pixels, plane.to_pixels())
+		finally:
+			bitplane.numpy = numpy
+
+	def test_runs(self):
+		plane = BitPlane.from_pixels(pixels, 10, 3)
+		self.assertEqual([(1, 1), (0, 2), (1, 3), (0, 3), (1, 1), (0, 9), (1, 11)], list(plane.runs()))
+
+	def test_image(self):
+		image = Image.new('1', (10, 3), 1)
+		image.putpixel((3, 1), 0)
+		plane = BitPlane.from_image(image)
+		self.assertEqual(bytes([0x00, 0x00, 0x10, 0x00, 0x00, 0x00]), bytes(plane.data))
+		self.assertEqual(image.tobytes(), bytes(Image.eval(plane.to_mask(), lambda value: 255 - value).tobytes()))
+		self.assertEqual(image.tobytes(), plane.to_image().tobytes())
+		self.assertEqual(plane, BitPlane.from_image(plane.to_image()))
+
+	def test_compress_uncompress(self):
+		plane = BitPlane.from_pixels(bytes([1]*32 + [0]*400*300), 400, 300)
+		self.assertEqual(compress_pixel_array(plane.to_pixels()), compress_pixel_array(plane))
+		self.assertEqual(plane, uncompress_pixel_plane(compress_pixel_array(plane), 400, 300))
+		self.assertEqual(15000, len(plane.data))
+
+	def test_pixel_string_to_image(self):
+		image = Image.new('RGB', (10, 3), "white")
+		pixel_string_to_image(image, BitPlane.from_pixels(pixels, 10, 3), (255, 0, 0))
+		expected = Image.new('RGB', (10, 3), "white")
+		pixel_string_to_image(expected, list(pixels), (255, 0, 0))
+		self.assertEqual(expected.tobytes(), image.tobytes())
+
+	def test_bbox_crop_or(self):
+		plane = BitPlane.from_pixels(bytes([0, 0, 0, 0, 0,
+											0, 1, 0, 0, 0,
+											0, 0, 0, 1, 0]), 5, 3)
+		self.assertEqual((1, 1, 4, 3), plane.bbox())
+		self.assertEqual(BitPlane.from_pixels(bytes([1, 0, 0, 0, 0, 1]), 3, 2), plane.crop((1, 1, 4, 3)))
+		self.assertIsNone(BitPlane(5, 3).bbox())
+		other = BitPlane.from_pixels(bytes([1] + [0]*14), 5, 3)
+		self.assertEqual(BitPlane.from_pixels(bytes([1, 0, 0, 0, 0, 0, 1, 0, 0, 0, 0, 0, 0, 1, 0]), 5, 3), plane | other)
@@ -0,0 +1,50 @@
+from unittest import TestCase
+
+from PIL import Image, ImageDraw
+from esllib.cache import CompressedPlaneCache, enable_compression_cache, disable_compression_cache, \
+	get_compression_cache
+from esllib.conversion import compress_pixel_array
+from esllib.Package import EntityImage
+
+
+class TestCompressedPlaneCache(TestCase):
+	def tearDown(self):
+		disable_compression_cache()
+
+	def test_lru_eviction(self):
+		cache = CompressedPlaneCache(max_bytes=3*(32+10))
+		keys = [CompressedPlaneCache.key(bytes([i]), 1, 1) for i in range(4)]
+		for key in keys[0:3]:
+			cache.put(key, bytes(10))
+		self.assertIsNotNone(cache.get(keys[0]))  # Mark first as recently used
+		cache.put(keys[3], bytes(10))
+		self.assertIsNone(cache.get(keys[1]))
+		self.assertIsNotNone(cache.get(keys[0]))
+		self.assertEqual({'hits': 2, 'misses': 1, 'evictions': 1, 'entries': 3, 'size': 3*(32+10), 'max_bytes': 3*(32+10)},
+						cache.stats())
+
+	def test_key(self):
+		self.assertNotEqual(CompressedPlaneCache.key(bytes(4), 2, 2), CompressedPlaneCache.key(bytes(4), 4, 1))
+		self.assertEqual(CompressedPlaneCache.key(bytes(4), 2, 2), CompressedPlaneCache.key(bytes(4), 2, 2))
+
+	def test_compress_pixel_array(self):
+		self.assertIsNone(get_compression_cache())
+		cache = enable_compression_cache()
+		self.assertIs(cache, get_compression_cache())
+		self.assertEqual("C000FFFF00BAD4", compress_pixel_array([1] + [0]*119999))
+		self.assertEqual("C000FFFF00BAD4", compress_pixel_array([1] + [0]*119999))
+		self.assertEqual(1, cache.hits)
+		self.assertEqual(1, cache.misses)
+
+	def test_entity_image(self):
+		cache = enable_compression_cache()
+		images = []
+		for i in range(3):
+			img = Image.new('RGB', (400, 300), "white")
+			ImageDraw.Draw(img).line((0, 0, 30, 0), fill=(0, 0, 0), width=1)
+			images.append(img)
+		for img in images:
+			self.assertEqual("FC00000000012B018F000000075F00FFFF00A2D4", EntityImage(x=0, y=0, image=img).__repr__())
+		# Black plane is looked up for every image, but only compressed for the first
+		self.assertEqual(1, cache.misses)
+		self.assertEqual(2, cache.hits)
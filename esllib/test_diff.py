@@ -0,0 +1,108 @@
+from unittest import TestCase
+
+from PIL import Image, ImageDraw
+from esllib.diff import changed_rectangles, diff_images, image_to_bit_planes, diff_entities, entity_digests
+from esllib.enums import FontStylesInv, PatternsCodesInv
+from esllib.Package import EntityText, EntityBarcode, EntityRectangle
+from esllib.payload import decode_payload, encode_payload
+
+
+def label(price: str, badge: bool = False) -> Image:
+	image = Image.new('RGB', (640, 384), "white")
+	draw = ImageDraw.Draw(image)
+	draw.rectangle((0, 0, 639, 60), fill="black")
+	for i in range(0, 640, 9):
+		draw.line((i, 300, 640 - i, 383), fill="black")
+	draw.text((400, 150), price, fill="red")
+	if badge:
+		draw.ellipse((560, 70, 630, 140), fill="black")
+	return image
+
+
+class TestImageDiff(TestCase):
+	def test_changed_rectangles(self):
+		previous = Image.new('RGB', (100, 50), "white")
+		new = previous.copy()
+		new.putpixel((10, 5), (0, 0, 0))
+		new.putpixel((90, 6), (0, 0, 0))
+		new.putpixel((12, 40), (255, 0, 0))
+		self.assertEqual([(8, 5, 16, 7), (88, 5, 96, 7), (8, 40, 16, 41)], changed_rectangles(previous, new))
+		self.assertEqual([(10, 5, 11, 7), (90, 5, 91, 7), (12, 40, 13, 41)], changed_rectangles(previous, new, x_align=1))
+		self.assertEqual([(10, 5, 91, 41)], changed_rectangles(previous, new, merge_gap=100, x_align=1))
+		self.assertEqual([], changed_rectangles(image_to_bit_planes(new), image_to_bit_planes(new)))
+
+	def test_diff_images_partial(self):
+		previous = label("19.90")
+		new = label("17.50", badge=True)
+		diff = diff_images(previous, new, colored_image=True)
+		self.assertTrue(diff.partial)
+		self.assertEqual(PatternsCodesInv['UpdatePart1'], diff.pattern_code)
+		self.assertLess(diff.size, diff.full_size)
+		self.assertEqual(diff.size, len(diff.payload))
+		# Pasting the decoded partial images on the previous image gives the new image
+		shown = previous.copy()
+		for entity in decode_payload(diff.payload):
+			shown.paste(entity.image, (entity.x, entity.y))
+		self.assertEqual(image_to_bit_planes(new), image_to_bit_planes(shown))
+
+	def test_diff_images_full(self):
+		diff = diff_images(Image.new('RGB', (64, 64), "white"), Image.new('RGB', (64, 64), "black"), screen=2)
+		self.assertFalse(diff.partial)
+		self.assertEqual(PatternsCodesInv['Update2/Screen2'], diff.pattern_code)
+		self.assertEqual(1, len(diff.entities))
+		diff = diff_images(label("1"), label("1"), screen=3)
+		self.assertEqual((PatternsCodesInv['UpdatePart3'], [], 0), (diff.pattern_code, diff.entities, diff.size))
+
+
+class TestEntityDiff(TestCase):
+	def entities(self, price="9.90", unit="kr/st"):
+		entities = [
+			EntityRectangle(vertical=1, horizontal=1, height=50, width=50, border=1),
+			EntityText(vertical=10, horizontal=10, font_style=FontStylesInv['12px'], text="Milk"),
+			EntityText(vertical=40, horizontal=10, font_style=FontStylesInv['32px'], text=price),
+			EntityBarcode(vertical=90, horizontal=10, font_style=FontStylesInv['Barcode EAN13'], text="731234567890")
+		]
+		if unit is not None:
+			entities.append(EntityText(vertical=60, horizontal=10, font_style=FontStylesInv['12px'], text=unit))
+		return entities
+
+	def test_changed(self):
+		diff = diff_entities(self.entities(), self.entities(price="8.90"))
+		self.assertEqual((0, [], 1, 4), (len(diff.added), diff.removed, len(diff.changed), diff.unchanged))
+		self.assertEqual("8.90", diff.changed[0].text)
+		self.assertTrue(diff.partial)
+		self.assertEqual(PatternsCodesInv['UpdatePart1'], diff.pattern_code)
+		self.assertEqual(diff.changed[0].to_bytes(), diff.payload)
+		# Stored digests gives the same diff as the entities
+		self.assertEqual(diff.payload, diff_entities(entity_digests(self.entities()), self.entities(price="8.90")).payload)
+		self.assertEqual(diff.digests, entity_digests(self.entities(price="8.90")))
+
+	def test_identical(self):
+		diff = diff_entities(self.entities(), self.entities())
+		self.assertTrue(diff.identical)
+		self.assertEqual(b'', diff.payload)
+
+	def test_added_and_removed(self):
+		diff = diff_entities(self.entities(unit=None), self.entities(price="8.90"))
+		self.assertEqual((1, 1), (len(diff.added), len(diff.changed)))
+		self.assertEqual(diff.changed[0].to_bytes() + diff.added[0].to_bytes(), diff.payload)
+		diff = diff_entities(self.entities(), self.entities(unit=None), screen=2)
+		self.assertEqual([('EntityText', 60, 10, 0)], diff.removed)
+		self.assertFalse(diff.partial)
+		self.assertEqual(PatternsCodesInv['Update2/Screen2'], diff.pattern_code)
+		self.assertEqual(encode_payload(self.entities(unit=None)), diff.payload)
+		self.assertFalse(diff_entities(self.entities(), self.entities(price="1"), allow_partial=False).partial)
+
+	def test_smaller_area(self):
+		# A shorter text doesn't cover the pixels of the text before it, so the whole label is drawn again
+		for previous in (self.entities(price="19.90"), entity_digests(self.entities(price="19.90"))):
+			diff = diff_entities(previous, self.entities(price="9.90"))
+			self.assertEqual(1, len(diff.changed))
+			self.assertFalse(diff.partial)
+			self.assertEqual(PatternsCodesInv['Update1/Screen1'], diff.pattern_code)
+			self.assertEqual(encode_payload(self.entities(price="9.90")), diff.payload)
+		# As is a smaller rectangle
+		smaller = self.entities()
+		smaller[0] = EntityRectangle(vertical=1, horizontal=1, height=40, width=50, border=1)
+		self.assertFalse(diff_entities(self.entities(), smaller).partial)
+		self.assertTrue(diff_entities(self.entities(price="19.90"), self.entities(price="18.90")).partial)
@@ -0,0 +1,61 @@
+from unittest import TestCase
+
+from PIL import Image, ImageDraw
+from esllib.dither import dither_image, compare_dithering, DITHER_METHODS, _bayer_matrix, _line_screen
+from esllib.Package import EntityImage
+
+black = (0, 0, 0)
+red = (255, 0, 0)
+white = (255, 255, 255)
+
+
+def _gradient() -> Image:
+	image = Image.linear_gradient('L').rotate(90).resize((200, 120)).convert('RGB')
+	ImageDraw.Draw(image).ellipse((20, 20, 80, 80), fill=(200, 40, 40))
+	return image
+
+
+class TestDither(TestCase):
+	def test_matrices(self):
+		self.assertEqual([[0, 2], [3, 1]], _bayer_matrix(2))
+		self.assertEqual(list(range(64)), sorted(value for row in _bayer_matrix(8) for value in row))
+		self.assertEqual([0, 2, 1, 3], _line_screen(4))
+
+	def test_dither_image_colors(self):
+		image = _gradient()
+		for method in DITHER_METHODS:
+			dithered = dither_image(image, method)
+			self.assertEqual((image.size, 'RGB'), (dithered.size, dithered.mode))
+			self.assertLessEqual({color for count, color in dithered.getcolors()}, {white, black, red})
+			colors = {color for count, color in dither_image(image, method, colored=False).getcolors()}
+			self.assertLessEqual(colors, {white, black})
+		yellow = Image.new('RGB', (8, 8), (230, 210, 30))
+		self.assertEqual([(64, (255, 255, 0))], dither_image(yellow, color='yellow').getcolors())
+		# Colors of the display are kept as they are
+		image = Image.new('RGB', (64, 8), "white")
+		ImageDraw.Draw(image).rectangle((8, 0, 15, 7), fill=black)
+		ImageDraw.Draw(image).rectangle((24, 0, 31, 7), fill=red)
+		for method in ('threshold', 'bayer', 'lines'):
+			self.assertEqual(image.tobytes(), dither_image(image, method).tobytes())
+		with self.assertRaises(Exception):
+			dither_image(image, 'atkinson')
+		with self.assertRaises(Exception):
+			dither_image(image, 'bayer', period=3)
+
+	def test_lines(self):
+		# The line screen keeps the tone of a area the same along every row
+		dithered = dither_image(Image.new('RGB', (64, 16), (128, 128, 128)), 'lines')
+		for y in range(16):
+			self.assertEqual(1, len(dithered.crop((0, y, 64, y + 1)).getcolors()))
+		self.assertEqual(2, len(dithered.getcolors()))
+
+	def test_compare_dithering(self):
+		image = _gradient()
+		results = {result.method: result for result in compare_dithering(image)}
+		self.assertEqual(list(DITHER_METHODS), list(results))
+		for result in results.values():
+			self.assertEqual(len(EntityImage(image=result.image, colored_image=True).to_bytes()), result.size)
+		# Dithering is closer to the original than thresholding, and the line screen is much smaller than diffusion
+		self.assertLess(results['floyd-steinberg'].error, results['threshold'].error)
+		self.assertLess(results['bayer'].error, results['threshold'].error)
+		self.assertLess(results['lines'].size, results['floyd-steinberg'].size // 4)
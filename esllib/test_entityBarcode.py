@@ -20,3 +20,9 @@ class TestEntityBarcode(TestCase):
 		self.assertEqual("0F01000100420088003100300052008A", EntityBarcode("0F01000100420088003100300052008A").__repr__())
 		self.assertEqual("25010001004100880037003300310031003200350030003000300039003400310039003D008A", EntityBarcode("25010001004100880037003300310031003200350030003000300039003400310039003D008A").__repr__())
 		self.assertEqual("25010001004900880037003300310031003200350030003000300039003400310039003D008A", EntityBarcode("25010001004900880037003300310031003200350030003000300039003400310039003D008A").__repr__())
+
+	def test_enity_barcode_package_bytes(self):
+		for raw in ["0F01000100420088003100300052008A", "25010001004100880037003300310031003200350030003000300039003400310039003D008A"]:
+			entity = EntityBarcode.from_bytes(bytes.fromhex(raw))
+			self.assertEqual(EntityBarcode(raw).text, entity.text)
+			self.assertEqual(bytes.fromhex(raw), entity.to_bytes())
@@ -1,6 +1,9 @@
+import random
 from unittest import TestCase
 
 from PIL import Image, ImageDraw
+from esllib.bitplane import BitPlane
+from esllib.conversion import image_to_black_and_colored_bit_planes
 from esllib.Package import EntityImage
 
 black = (0, 0, 0)
@@ -74,3 +77,166 @@ class TestEntityImage(TestCase):
 		self.assertEqual("FC00000000012B018F00000008412100FFFF00A0D4", EntityImage("FC00000000012B018F00000008412100FFFF00A0D4").__repr__())  # 33px
 		self.assertEqual("FC00000000012B018F0000001C5F1F41200120412101F14000011F417100000140000200FFFF00A1CE", EntityImage("FC00000000012B018F0000001C5F1F41200120412101F14000011F417100000140000200FFFF00A1CE").__repr__())  # Black lines different lengths
 		self.assertEqual("FC00000000012B018F0000001C5F1F41200120412101F14000011F417100000140000200FFFF00A1CEFC80000000812B018F0000000E009F1F5F0840000100FFFF00FBB3",EntityImage("FC00000000012B018F0000001C5F1F41200120412101F14000011F417100000140000200FFFF00A1CEFC80000000812B018F0000000E009F1F5F0840000100FFFF00FBB3").__repr__())  # Black & red lines different lengths
+
+	def test_entity_image_encode_cache(self):
+		img = Image.new('RGB', (400, 300), "white")
+		entity = EntityImage(x=0, y=0, image=img, colored_image=False)
+		payload = entity.encode()
+		self.assertEqual("FC00000000012B018F0000000600FFFF00C1D4", payload)
+		self.assertIs(payload, entity.payload)
+		self.assertIs(payload, entity.__repr__())
+		# Drawing on the image in place invalidates the cache
+		ImageDraw.Draw(img).point((0, 0), fill=black)
+		self.assertEqual("FC00000000012B018F00000007C000FFFF00BAD4", entity.encode())
+		entity.x = 1
+		self.assertEqual("FC00010000012B018F00000007C000FFFF00BAD4", entity.encode())
+		entity.colored_image = True
+		self.assertEqual("FC00010000012B018F00000007C000FFFF00BAD4FC80010000812B018F0000000600FFFF00C1D4", entity.encode())
+		entity.image = Image.new('RGB', (10, 10), "white")
+		self.assertEqual("FC0001000000090009000000020164FC8001000080090009000000020164", entity.encode())
+
+	def test_entity_image_bytes(self):
+		raw = "FC00000000012B018F0000001C5F1F41200120412101F14000011F417100000140000200FFFF00A1CEFC80000000812B018F0000000E009F1F5F0840000100FFFF00FBB3"
+		entity = EntityImage.from_bytes(bytes.fromhex(raw))
+		self.assertEqual((0, 0, 400, 300, True), (entity.x, entity.y, entity.width, entity.height, entity.colored_image))
+		self.assertEqual(bytes.fromhex(raw), entity.to_bytes())
+		self.assertEqual(raw, entity.encode())
+
+	def test_entity_image_auto_crop(self):
+		image = Image.new('RGB', (640, 384), "white")
+		draw = ImageDraw.Draw(image)
+		draw.rectangle((100, 50, 109, 59), fill=black)
+		draw.rectangle((120, 55, 129, 64), fill=red)
+		cropped = EntityImage(x=8, y=4, image=image, colored_image=True, auto_crop=True)
+		parsed = EntityImage(cropped.encode())
+		self.assertEqual((108, 54, 30, 15, True), (parsed.x, parsed.y, parsed.width, parsed.height, parsed.colored_image))
+		self.assertEqual(image.crop((100, 50, 130, 65)).tobytes(), parsed.image.tobytes())
+		self.assertLess(len(cropped.to_bytes()), len(EntityImage(x=8, y=4, image=image, colored_image=True).to_bytes()))
+		# An empty color plane is left out
+		image = Image.new('RGB', (640, 384), "white")
+		ImageDraw.Draw(image).rectangle((100, 50, 109, 59), fill=black)
+		parsed = EntityImage(EntityImage(image=image, colored_image=True, auto_crop=True).encode())
+		self.assertEqual((100, 50, 10, 10, False), (parsed.x, parsed.y, parsed.width, parsed.height, parsed.colored_image))
+		# A white image is sent as a single pixel
+		parsed = EntityImage(EntityImage(x=3, y=4, image=Image.new('RGB', (64, 64), "white"), auto_crop=True).encode())
+		self.assertEqual((3, 4, 1, 1), (parsed.x, parsed.y, parsed.width, parsed.height))
+
+	def test_entity_image_types(self):
+		image = Image.new('RGB', (64, 40), "white")
+		draw = ImageDraw.Draw(image)
+		draw.rectangle((10, 10, 29, 19), fill=black)
+		draw.rectangle((40, 20, 51, 31), fill=red)
+		# Image sends packed pixels, ImageX2 sends half the size
+		for image_type, size in ((0xFE, (64, 40)), (0xFD, (32, 20))):
+			entity = EntityImage(x=8, y=4, image=image, colored_image=True, image_type=image_type)
+			parsed = EntityImage(entity.encode())
+			self.assertEqual((image_type, True), (parsed.image_type, parsed.colored_image))
+			self.assertEqual(size, entity.encoded_region[2:])
+			self.assertEqual(image.tobytes(), parsed.image.tobytes())
+		self.assertEqual(64 // 8 * 40, len(EntityImage(image=image, image_type=0xFE).to_bytes()) - 13)
+		# Auto picks ImageX2 for a image that is scaled up without loss, and the default stays ImageCompress
+		self.assertEqual(0xFD, EntityImage(EntityImage(image=image, colored_image=True, image_type='auto').encode()).image_type)
+		self.assertEqual(0xFC, EntityImage(image=image, colored_image=True).to_bytes()[0])
+		# A small change to the image keeps ImageX2 out, unless the error is allowed
+		image.putpixel((11, 11), white)
+		self.assertEqual(0xFC, EntityImage(image=image, image_type='auto').to_bytes()[0])
+		self.assertEqual(0xFD, EntityImage(image=image, image_type='auto', x2_max_error=0.01).to_bytes()[0])
+		# Noise is smaller as packed pixels
+		rng = random.Random(1)
+		noise = Image.new('1', (64, 40))
+		noise.putdata([rng.getrandbits(1) * 255 for i in range(64 * 40)])
+		noise = noise.convert('RGB')
+		entity = EntityImage(image=noise, image_type='auto')
+		self.assertEqual(0xFE, entity.to_bytes()[0])
+		self.assertEqual(noise.tobytes(), EntityImage(entity.encode()).image.tobytes())
+		# ImageX2 can't show a odd width or height
+		odd = Image.new('RGB', (13, 7), "white")
+		ImageDraw.Draw(odd).rectangle((2, 2, 9, 5), fill=black)
+		with self.assertRaises(Exception):
+			EntityImage(image=odd, image_type=0xFD).encode()
+		parsed = EntityImage(EntityImage(image=odd, image_type='auto', x2_max_error=1.0).encode())
+		self.assertNotEqual(0xFD, parsed.image_type)
+		self.assertEqual((13, 7), parsed.image.size)
+
+	def test_entity_image_decode_modes(self):
+		image = Image.new('RGB', (64, 40), "white")
+		draw = ImageDraw.Draw(image)
+		draw.rectangle((10, 10, 29, 19), fill=black)
+		draw.rectangle((20, 15, 51, 31), fill=red)
+		raw = EntityImage(x=8, y=4, image=image, colored_image=True).to_bytes()
+		parsed = EntityImage.from_bytes(raw, image_mode='P')
+		self.assertEqual('P', parsed.image.mode)
+		self.assertEqual(image.tobytes(), parsed.image.convert('RGB').tobytes())
+		self.assertEqual((0, 1, 2), (parsed.image.getpixel((0, 0)), parsed.image.getpixel((10, 10)),
+									parsed.image.getpixel((20, 15))))
+		self.assertEqual(raw, parsed.to_bytes())
+		# Mode 1 only fits packages without a color part
+		image = image.convert('1')
+		raw = EntityImage(image=image).to_bytes()
+		parsed = EntityImage.from_bytes(raw, image_mode='1')
+		self.assertEqual(('1', image.tobytes()), (parsed.image.mode, parsed.image.tobytes()))
+		self.assertEqual(raw, parsed.to_bytes())
+		with self.assertRaises(Exception):
+			EntityImage.from_bytes(EntityImage(image=image, colored_image=True).to_bytes(), image_mode='1')
+
+	def test_entity_image_lazy(self):
+		image = Image.new('RGB', (64, 40), "white")
+		ImageDraw.Draw(image).rectangle((10, 10, 29, 19), fill=red)
+		for image_type, size in ((0xFC, (64, 40)), (0xFD, (64, 40)), (0xFE, (64, 40))):
+			raw = bytearray(EntityImage(x=8, y=4, image=image, colored_image=True, image_type=image_type).to_bytes())
+			parsed = EntityImage.from_bytes(raw, lazy=True)
+			self.assertIsNone(parsed._image)
+			self.assertEqual((8, 4, size[0], size[1], True), (parsed.x, parsed.y, parsed.width, parsed.height,
+																parsed.colored_image))
+			self.assertEqual(len(raw) - 26, parsed.image_black_size + parsed.image_color_size)
+			raw[:] = bytes(len(raw))  # The pixels are copied when parsed, so the buffer can be reused
+			self.assertEqual(image.tobytes(), parsed.image.tobytes())
+		# Corrupt pixels are only found when the image is read
+		parsed = EntityImage.from_bytes(bytes.fromhex('FE000000000009000900000001FF'), lazy=True)
+		with self.assertRaises(Exception):
+			parsed.image
+
+	def test_entity_image_bit_planes(self):
+		image = Image.new('RGB', (61, 40), "white")
+		draw = ImageDraw.Draw(image)
+		draw.rectangle((10, 10, 29, 19), fill=red)
+		draw.rectangle((5, 25, 50, 30), fill=black)
+		black_plane, color_plane = image_to_black_and_colored_bit_planes(image)
+		for colored_image, planes in ((True, (black_plane, color_plane)), (False, (black_plane, None))):
+			expected = EntityImage(x=8, y=4, image=image, colored_image=colored_image, auto_crop=True)
+			entity = EntityImage(x=8, y=4, bit_planes=planes, colored_image=colored_image, auto_crop=True)
+			self.assertEqual((61, 40), (entity.width, entity.height))
+			self.assertEqual(expected.to_bytes(), entity.to_bytes())
+			self.assertIsNone(entity._image)  # Encoded without decoding the image
+		# The image is decoded the first time it is read, and can then be drawn on
+		entity = EntityImage(bit_planes=(black_plane, color_plane), colored_image=True)
+		payload = entity.encode()
+		self.assertEqual(image.tobytes(), entity.image.tobytes())
+		self.assertIs(payload, entity.encode())
+		ImageDraw.Draw(entity.image).point((0, 0), fill=black)
+		image.putpixel((0, 0), black)
+		self.assertEqual(EntityImage(image=image, colored_image=True).encode(), entity.encode())
+		with self.assertRaises(Exception):
+			EntityImage(bit_planes=(black_plane, BitPlane(60, 40)))
+
+	def test_entity_image_update_rows(self):
+		image = Image.new('RGB', (400, 300), "white")
+		draw = ImageDraw.Draw(image)
+		draw.rectangle((10, 10, 389, 40), fill=black)
+		draw.text((20, 100), "Milk 1L", fill=black)
+		entity = EntityImage(x=8, y=4, image=image, colored_image=True)
+		entity.encode()
+		for price, color in (("19.90", red), ("9.90", black), ("119.90", red)):
+			draw.rectangle((200, 200, 399, 259), fill=white)
+			draw.text((210, 210), price, fill=color)
+			payload = entity.update_rows(200, 260)
+			self.assertEqual(EntityImage(x=8, y=4, image=image, colored_image=True).encode(), payload)
+			self.assertIs(payload, entity.encode())
+		# Changed parameters and image types that can't be built on are encoded in full
+		entity.x = 9
+		draw.text((210, 210), "0", fill=black)
+		self.assertEqual(EntityImage(x=9, y=4, image=image, colored_image=True).encode(), entity.update_rows(200, 260))
+		entity = EntityImage(image=image, image_type=0xFE)
+		entity.encode()
+		draw.text((210, 230), "1", fill=black)
+		self.assertEqual(EntityImage(image=image, image_type=0xFE).encode(), entity.update_rows(200, 260))
@@ -10,3 +10,8 @@ class TestEntityLEDData(TestCase):
 	def test_led_data_package_raw(self):
 		self.assertEqual("07044E2E00ED0003", EntityLEDData("07044E2E00ED0003").__repr__())
 		self.assertEqual("07024E2300ED0004", EntityLEDData("07024E2300ED0004").__repr__())
+
+	def test_led_data_package_bytes(self):
+		entity = EntityLEDData.from_bytes(bytes.fromhex("07044E2E00ED0003"))
+		self.assertEqual((False, False, True, 20014, 3), (entity.color_red, entity.color_green, entity.color_blue, entity.service_code, entity.flash_times))
+		self.assertEqual(bytes.fromhex("07044E2E00ED0003"), entity.to_bytes())
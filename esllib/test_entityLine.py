@@ -10,3 +10,8 @@ class TestEntityLine(TestCase):
 
 	def test_entity_line_raw(self):
 		self.assertEqual("0701000100620001", EntityLine("0701000100620001").__repr__())
+
+	def test_entity_line_bytes(self):
+		entity = EntityLine.from_bytes(bytes.fromhex("0701000100620001"))
+		self.assertEqual((1, 1, 0, FontStylesInv["Horizontal Line"], 1), (entity.vertical, entity.horizontal, entity.draw_style, entity.font_style, entity.border))
+		self.assertEqual(bytes.fromhex("0701000100620001"), entity.to_bytes())
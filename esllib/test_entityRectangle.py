@@ -9,3 +9,8 @@ class TestEntityRectangle(TestCase):
 
 	def test_entity_rectangle_raw(self):
 		self.assertEqual("0B0100016400003200320001", EntityRectangle("0B0100016400003200320001").__repr__())
+
+	def test_entity_rectangle_bytes(self):
+		entity = EntityRectangle.from_bytes(bytes.fromhex("0B0100016400003200320001"))
+		self.assertEqual((1, 1, 0, 50, 50, 1), (entity.vertical, entity.horizontal, entity.draw_style, entity.height, entity.width, entity.border))
+		self.assertEqual(bytes.fromhex("0B0100016400003200320001"), entity.to_bytes())
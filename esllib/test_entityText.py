@@ -14,3 +14,16 @@ class TestEntityText(TestCase):
 		self.assertEqual("09010001000200410061", EntityText("09010001000200410061").__repr__())
 		self.assertEqual("0701000100020041", EntityText("0701000100020041").__repr__())
 		self.assertEqual("1701000100020059006F0020006D0061006D006D00610021", EntityText("1701000100020059006F0020006D0061006D006D00610021").__repr__())
+
+	def test_enity_text_package_bytes(self):
+		packet = bytes.fromhex("1701000100020059006F0020006D0061006D006D00610021")
+		entity = EntityText.from_bytes(memoryview(packet))
+		self.assertEqual((1, 1, 0, 2, "Yo mamma!"), (entity.vertical, entity.horizontal, entity.draw_style, entity.font_style, entity.text))
+		self.assertEqual(packet, entity.to_bytes())
+		self.assertEqual(bytes.fromhex("07FF120000020041"), EntityText(vertical=511, horizontal=512, draw_style=0, font_style=FontStylesInv['12px'], text="A").to_bytes())
+		self.assertEqual((511, 512), (EntityText.from_bytes(bytes.fromhex("07FF120000020041")).vertical, EntityText("07FF120000020041").horizontal))
+
+	def test_enity_text_surrogate_pairs(self):
+		entity = EntityText(vertical=1, horizontal=1, font_style=FontStylesInv['12px'], text="A\U0001F600")
+		self.assertEqual("0B01000100020041D83DDE00", entity.__repr__())
+		self.assertEqual("A\U0001F600", EntityText(entity.__repr__()).text)
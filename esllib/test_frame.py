@@ -0,0 +1,33 @@
+from unittest import TestCase
+
+from esllib.enums import PatternsCodesInv
+from esllib.frame import Frame, batch_frames, split_frames
+from esllib.Package import EntityText
+
+
+class TestFrame(TestCase):
+	def test_frame(self):
+		text = EntityText(vertical=1, horizontal=1, draw_style=0, font_style=2, text="A")
+		frame = Frame(pattern_code=PatternsCodesInv['Update1/Screen1'], display_tag_id="061C95", service_code=20003, payload=[text])
+		self.assertEqual("@001C33061C954E230701000100020041", frame.__repr__())
+		parsed = Frame("@001C33061C954E230701000100020041")
+		self.assertEqual((0x33, "061C95", 20003), (parsed.pattern_code, parsed.display_tag_id, parsed.service_code))
+		self.assertEqual(["A"], [entity.text for entity in parsed.entities()])
+		self.assertEqual(frame.to_bytes(), Frame.from_bytes(frame.to_bytes()).to_bytes())
+		self.assertEqual("@000C35061C954E23", Frame(pattern_code=PatternsCodesInv['Display1'], display_tag_id="061C95", service_code=20003).__repr__())
+
+	def test_frame_errors(self):
+		with self.assertRaises(Exception):
+			Frame("@001D33061C954E230701000100020041")  # Wrong length
+		with self.assertRaises(Exception):
+			Frame("#001C33061C954E230701000100020041")
+		with self.assertRaises(Exception):
+			Frame(display_tag_id="61C95").to_bytes()
+
+	def test_batch_frames(self):
+		frames = [Frame(display_tag_id="%06X" % tag, service_code=tag, payload=[EntityText(vertical=1, horizontal=1, font_style=2, text=str(tag))]) for tag in range(100)]
+		buffer = batch_frames(frames)
+		self.assertEqual(sum(len(frame.to_bytes()) for frame in frames), len(buffer))
+		self.assertEqual([frame.__repr__() for frame in frames], [frame.__repr__() for frame in split_frames(buffer)])
+		with self.assertRaises(Exception):
+			list(split_frames(buffer[:-1]))
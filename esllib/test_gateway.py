@@ -0,0 +1,104 @@
+import asyncio
+from unittest import IsolatedAsyncioTestCase
+
+from esllib.enums import AnswerTagStatusInv
+from esllib.frame import Frame
+from esllib.gateway import GatewayClient
+from esllib.Package import Answer, EntityText
+
+
+class StandInGateway:
+	"""
+	Answers every frame after a delay, optionally dropping the first attempts of each display tag
+	"""
+	def __init__(self, delay=0.01, drop_first=0):
+		self.delay = delay
+		self.drop_first = drop_first
+		self.attempts = {}
+		self.in_flight = 0
+		self.max_in_flight = 0
+		self.frames = []
+
+	async def start(self):
+		self.server = await asyncio.start_server(self.handle, '127.0.0.1', 0)
+		return self.server.sockets[0].getsockname()[1]
+
+	async def stop(self):
+		self.server.close()
+		await self.server.wait_closed()
+
+	async def handle(self, reader, writer):
+		try:
+			while True:
+				header = await reader.readexactly(5)
+				data = await reader.readexactly(int(header[1:], 16))
+				frame = Frame((header + data).decode('ascii'))
+				self.frames.append(frame)
+				asyncio.ensure_future(self.answer(writer, frame))
+		except asyncio.IncompleteReadError:
+			writer.close()
+
+	async def answer(self, writer, frame):
+		self.in_flight += 1
+		self.max_in_flight = max(self.max_in_flight, self.in_flight)
+		await asyncio.sleep(self.delay)
+		self.in_flight -= 1
+		attempt = self.attempts.get(frame.display_tag_id, 0)
+		self.attempts[frame.display_tag_id] = attempt + 1
+		if attempt < self.drop_first:
+			return
+		answer = Answer(service_code=frame.service_code, display_tag_id=frame.display_tag_id, rssi=-81,
+						tag_status=AnswerTagStatusInv['Success'], volt=3.1, temperature=17)
+		writer.write(answer.__repr__().encode('ascii') + b'\r\n')
+
+
+class TestGatewayClient(IsolatedAsyncioTestCase):
+	async def test_pipelined_send(self):
+		gateway = StandInGateway()
+		port = await gateway.start()
+		async with GatewayClient('127.0.0.1', port, window=4) as client:
+			frames = [Frame(display_tag_id="%06X" % tag, payload=[EntityText(vertical=1, horizontal=1, font_style=2, text=str(tag))]) for tag in range(20)]
+			answers = await client.send_many(frames)
+		await gateway.stop()
+		self.assertEqual(["%06X" % tag for tag in range(20)], [answer.display_tag_id for answer in answers])
+		self.assertEqual(AnswerTagStatusInv['Success'], answers[0].tag_status)
+		self.assertEqual(4, gateway.max_in_flight)
+		self.assertEqual(20, len({frame.service_code for frame in gateway.frames}))
+		self.assertEqual((20, 20, 0), (client.sent, client.answered, client.timeouts))
+
+	async def test_retry_and_timeout(self):
+		gateway = StandInGateway(drop_first=1)
+		port = await gateway.start()
+		async with GatewayClient('127.0.0.1', port, timeout=0.1, retries=1) as client:
+			answer = await client.send('061c95')
+			self.assertEqual("061C95", answer.display_tag_id)
+			self.assertEqual(1, client.timeouts)
+			self.assertNotEqual(gateway.frames[0].service_code, gateway.frames[1].service_code)
+		gateway.drop_first = 5
+		async with GatewayClient('127.0.0.1', port, timeout=0.05, retries=2) as client:
+			with self.assertRaises(TimeoutError):
+				await client.send('000001')
+			self.assertEqual(0, client.in_flight)
+		await gateway.stop()
+
+	async def test_lowercase_display_tag_id(self):
+		gateway = StandInGateway()
+		port = await gateway.start()
+		async with GatewayClient('127.0.0.1', port, timeout=0.5, retries=0) as client:
+			frame = Frame(display_tag_id='061c95', payload=[EntityText(vertical=1, horizontal=1, font_style=2, text='1')])
+			answer = await client.send_frame(frame)
+			self.assertEqual("061C95", answer.display_tag_id)
+			self.assertEqual((1, 0), (client.answered, client.timeouts))
+		await gateway.stop()
+
+	async def test_connection_lost(self):
+		gateway = StandInGateway(delay=10)
+		port = await gateway.start()
+		client = GatewayClient('127.0.0.1', port, timeout=5)
+		await client.connect()
+		send = asyncio.ensure_future(client.send('000001'))
+		await asyncio.sleep(0.05)
+		await client.close()
+		with self.assertRaises(ConnectionError):
+			await send
+		await gateway.stop()
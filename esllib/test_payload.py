@@ -0,0 +1,48 @@
+from unittest import TestCase
+
+from PIL import Image, ImageDraw
+from esllib.Package import EntityText, EntityBarcode, EntityRectangle, EntityLine, EntityLEDData, EntityImage
+from esllib.enums import FontStylesInv
+from esllib.payload import decode_payload, encode_payload
+
+
+class TestPayload(TestCase):
+	def test_decode_payload(self):
+		image = "FC00000000012B018F0000001C5F1F41200120412101F14000011F417100000140000200FFFF00A1CEFC80000000812B018F0000000E009F1F5F0840000100FFFF00FBB3"
+		payload = "1701000100020059006F0020006D0061006D006D00610021" + "0F01000100420088003100300052008A" + \
+			"0B0100016400003200320001" + "0701000100620001" + "07044E2E00ED0003" + image
+		entities = list(decode_payload(payload))
+		self.assertEqual([EntityText, EntityBarcode, EntityRectangle, EntityLine, EntityLEDData, EntityImage], [type(entity) for entity in entities])
+		self.assertEqual("Yo mamma!", entities[0].text)
+		self.assertEqual("10", entities[1].text)
+		self.assertEqual(50, entities[2].width)
+		self.assertEqual(FontStylesInv["Horizontal Line"], entities[3].font_style)
+		self.assertEqual(3, entities[4].flash_times)
+		self.assertEqual((400, 300, True), (entities[5].width, entities[5].height, entities[5].colored_image))
+		self.assertEqual(bytes.fromhex(payload), encode_payload(entities))
+		self.assertEqual(entities[0].text, next(decode_payload(memoryview(bytes.fromhex(payload)))).text)
+
+	def test_decode_payload_errors(self):
+		with self.assertRaises(Exception):
+			list(decode_payload("1701000100020059"))  # Truncated
+		with self.assertRaises(Exception):
+			list(decode_payload("0701000100990001"))  # Unknown font style
+		self.assertEqual([], list(decode_payload(b'')))
+
+	def test_decode_payload_length_fd(self):
+		# A text of 124 characters and a barcode of 121 characters has length byte FD, the same as ImageX2
+		text = EntityText(vertical=1, horizontal=1, font_style=2, text="x" * 124)
+		barcode = EntityBarcode(vertical=1, horizontal=1, font_style=FontStylesInv['Barcode 128'], text="1" * 121)
+		line = EntityLine(raw="0701000100620001")
+		image = Image.new('RGB', (64, 40), "white")
+		ImageDraw.Draw(image).rectangle((8, 8, 39, 23), fill="black")
+		# Y 2 puts a text font style where a entity has its font style
+		image = EntityImage(x=0, y=2, image=image, image_type=FontStylesInv['ImageX2'])
+		self.assertEqual(0xFD, text.to_bytes()[0])
+		self.assertEqual(0xFD, barcode.to_bytes()[0])
+		for entities in ([text], [barcode], [text, line], [text, image], [image], [barcode, text, image]):
+			payload = encode_payload(entities)
+			decoded = list(decode_payload(payload))
+			self.assertEqual([type(entity) for entity in entities], [type(entity) for entity in decoded])
+			self.assertEqual(payload, encode_payload(decoded))
+		self.assertEqual("x" * 124, next(decode_payload(text.to_bytes())).text)
@@ -0,0 +1,78 @@
+from unittest import TestCase, IsolatedAsyncioTestCase
+
+from esllib.enums import UpdatePrioritiesInv
+from esllib.Package import EntityText
+from esllib.scheduler import UpdateScheduler
+
+
+class FakeClock:
+	def __init__(self):
+		self.now = 0.0
+
+	def __call__(self):
+		return self.now
+
+
+class TestUpdateScheduler(TestCase):
+	def test_coalescing(self):
+		scheduler = UpdateScheduler(airtime_per_byte=0.001)
+		self.assertFalse(scheduler.submit("061c95", b'\x01' * 10, priority=UpdatePrioritiesInv['Cosmetic']))
+		self.assertTrue(scheduler.submit("061C95", b'\x02' * 20, priority=UpdatePrioritiesInv['Promo']))
+		self.assertTrue(scheduler.submit("061C95", [EntityText(vertical=1, horizontal=1, font_style=2, text="A")], priority=UpdatePrioritiesInv['Cosmetic']))
+		self.assertEqual(1, len(scheduler))
+		self.assertEqual(2, scheduler.coalesced)
+		self.assertAlmostEqual(0.03, scheduler.airtime_saved)
+		frames = scheduler.pop()
+		self.assertEqual(1, len(frames))
+		self.assertEqual(bytes.fromhex("0701000100020041"), frames[0].payload)
+		self.assertEqual([], scheduler.pop())
+
+	def test_ordering(self):
+		scheduler = UpdateScheduler()
+		scheduler.submit("000001", priority=UpdatePrioritiesInv['Cosmetic'])
+		scheduler.submit("000002", priority=UpdatePrioritiesInv['Promo'], deadline=20)
+		scheduler.submit("000003", priority=UpdatePrioritiesInv['PriceChange'])
+		scheduler.submit("000004", priority=UpdatePrioritiesInv['Promo'], deadline=10)
+		scheduler.submit("000005", priority=UpdatePrioritiesInv['Promo'])
+		scheduler.submit("000001", priority=UpdatePrioritiesInv['PriceChange'], deadline=5)  # Coalesced, keeps most urgent
+		scheduler.submit("000006", gateway="aisle-2")
+		scheduler.cancel("000005")
+		self.assertEqual(["000001", "000003", "000004", "000002"], [frame.display_tag_id for frame in scheduler.pop()])
+		self.assertEqual(1, scheduler.pending("aisle-2"))
+		self.assertEqual(["000006"], [frame.display_tag_id for frame in scheduler.pop("aisle-2")])
+
+	def test_airtime_budget(self):
+		clock = FakeClock()
+		scheduler = UpdateScheduler(airtime_per_frame=0.1, airtime_budget=0.5, burst=0.3, clock=clock)
+		for tag in range(10):
+			scheduler.submit("%06X" % tag)
+		self.assertEqual(3, len(scheduler.pop()))
+		self.assertEqual([], scheduler.pop())
+		self.assertAlmostEqual(0.2, scheduler.wait_time())
+		clock.now = 0.2
+		self.assertEqual(1, len(scheduler.pop()))
+		clock.now = 10
+		self.assertEqual(2, len(scheduler.pop(max_frames=2)))
+		# Frames longer than the burst are sent when the budget is full
+		scheduler = UpdateScheduler(airtime_per_byte=0.1, airtime_budget=0.5, burst=0.3, clock=clock)
+		scheduler.submit("000001", b'\x00' * 10)
+		self.assertEqual(1, len(scheduler.pop()))
+		self.assertIsNone(scheduler.wait_time())
+
+
+class TestUpdateSchedulerRun(IsolatedAsyncioTestCase):
+	async def test_run(self):
+		sent = []
+
+		async def send(frame):
+			sent.append(frame.display_tag_id)
+			return frame.display_tag_id
+
+		scheduler = UpdateScheduler(airtime_per_frame=0.01, airtime_budget=1.0, burst=0.05)
+		for tag in range(20):
+			scheduler.submit("%06X" % tag)
+			scheduler.submit("%06X" % tag)
+		results = await scheduler.run(send)
+		self.assertEqual(["%06X" % tag for tag in range(20)], sent)
+		self.assertEqual(sent, results)
+		self.assertEqual(0, len(scheduler))
@@ -0,0 +1,54 @@
+import asyncio
+from unittest import IsolatedAsyncioTestCase
+
+from esllib.enums import AnswerTagStatusInv, PatternsCodesInv
+from esllib.frame import Frame
+from esllib.gateway import GatewayClient
+from esllib.Package import Answer, EntityText
+from esllib.simulator import GatewaySimulator
+
+
+class TestGatewaySimulator(IsolatedAsyncioTestCase):
+	async def test_answers(self):
+		simulator = GatewaySimulator(seed=1)
+		simulator.set_tag_status("000002", AnswerTagStatusInv['ERRE3'])
+		port = await simulator.start()
+		async with GatewayClient('127.0.0.1', port, window=32) as client:
+			frames = [Frame(display_tag_id="%06X" % tag, payload=[EntityText(vertical=1, horizontal=1, font_style=2, text="9.90")]) for tag in range(1000)]
+			frames.append(Frame(display_tag_id="000003", payload=b'\x07\x01'))  # Truncated entity
+			answers = await client.send_many(frames)
+		await simulator.stop()
+		self.assertEqual(AnswerTagStatusInv['Success'], answers[0].tag_status)
+		self.assertEqual(AnswerTagStatusInv['ERRE3'], answers[2].tag_status)
+		self.assertEqual(AnswerTagStatusInv['Failed'], answers[1000].tag_status)
+		self.assertEqual(1000, len(simulator.tags))
+		self.assertEqual(2, simulator.tag("000003").updates)
+		self.assertEqual(PatternsCodesInv['Update1/Screen1'], simulator.tag("000001").last_pattern_code)
+		self.assertEqual(1001, simulator.stats()['answered'])
+
+	async def test_airtime_and_loss(self):
+		simulator = GatewaySimulator(airtime_per_frame=0.001, airtime_per_byte=0.0001, loss=0.2, binary=True, seed=2)
+		port = await simulator.start()
+		async with GatewayClient('127.0.0.1', port, window=16, timeout=0.5, retries=5, binary=True) as client:
+			answers = await client.send_many(Frame(display_tag_id="%06X" % tag, payload=bytes.fromhex("0701000100020041")) for tag in range(50))
+		await simulator.stop()
+		self.assertTrue(all(answer.tag_status == AnswerTagStatusInv['Success'] for answer in answers))
+		self.assertGreater(simulator.lost, 0)
+		self.assertEqual(simulator.frames, simulator.lost + simulator.answered)
+		self.assertAlmostEqual(simulator.frames * 0.0018, simulator.airtime)
+
+	async def test_malformed_frame(self):
+		simulator = GatewaySimulator()
+		port = await simulator.start()
+		reader, writer = await asyncio.open_connection('127.0.0.1', port)
+		frame = Frame(display_tag_id="000001", service_code=5, payload=bytes.fromhex("0701000100020041"))
+		# Data that is not hexadecimal, a length that is not hexadecimal, and a frame shorter than the header
+		writer.write(b'@0004ZZZZ\r\n@ZZZZ\r\n@0002AB\r\n' + frame.__repr__().encode('ascii'))
+		answer = Answer((await reader.readline()).decode('ascii').strip())
+		writer.close()
+		await writer.wait_closed()
+		await simulator.stop()
+		self.assertEqual((5, "000001", AnswerTagStatusInv['Success']),
+						(answer.service_code, answer.display_tag_id, answer.tag_status))
+		self.assertEqual(3, simulator.malformed)
+		self.assertEqual(1, simulator.frames)
@@ -0,0 +1,41 @@
+from unittest import TestCase
+
+from PIL import Image
+from esllib.Package import EntityText, EntityBarcode, EntityRectangle, EntityLine, EntityImage
+from esllib.enums import FontStylesInv
+from esllib.template import LabelTemplate
+
+
+class TestLabelTemplate(TestCase):
+	def entities(self, name="Milk", price="9.90", ean="731234567890", x=0):
+		return [
+			EntityRectangle(vertical=1, horizontal=1, height=50, width=50, border=1),
+			EntityText(vertical=10, horizontal=10, font_style=FontStylesInv['12px'], text=name),
+			EntityText(vertical=40, horizontal=10, font_style=FontStylesInv['32px'], text=price),
+			EntityLine(vertical=80, horizontal=1, font_style=FontStylesInv['Horizontal Line'], border=1),
+			EntityBarcode(vertical=90, horizontal=10, font_style=FontStylesInv['Barcode EAN13'], text=ean),
+			EntityImage(x=x, y=0, image=Image.new('RGB', (16, 8), 'black'))
+		]
+
+	def test_build(self):
+		template = LabelTemplate(self.entities(), slots={'name': (1, 'text'), 'price': (2, 'text'), 'ean': (4, 'text'), 'x': (5, 'x')})
+		expected = b''.join(entity.to_bytes() for entity in self.entities("Äpple \U0001F34E", "19.90", "731234567891", 8))
+		self.assertEqual(expected, template.build(name="Äpple \U0001F34E", price="19.90", ean="731234567891", x=8))
+		# Slots without a value keeps the template value
+		self.assertEqual(b''.join(entity.to_bytes() for entity in self.entities(price="5.00")), template.build(price="5.00"))
+		self.assertEqual(len(self.entities()[0].to_bytes()) + len(self.entities()[3].to_bytes()), template.static_size)
+		payloads = list(template.build_many([{'price': "1.00"}, {'price': "2.00"}]))
+		self.assertEqual([template.build(price="1.00"), template.build(price="2.00")], payloads)
+
+	def test_errors(self):
+		with self.assertRaises(Exception):
+			LabelTemplate(self.entities(), slots={'price': (6, 'text')})
+		with self.assertRaises(Exception):
+			LabelTemplate(self.entities(), slots={'price': (2, 'price')})
+		template = LabelTemplate(self.entities(), slots={'price': (2, 'text'), 'ean': (4, 'text')})
+		with self.assertRaises(Exception):
+			template.build(name="Milk")
+		with self.assertRaises(Exception):
+			template.build(price="x" * 200)
+		with self.assertRaises(Exception):
+			template.build(ean="12")
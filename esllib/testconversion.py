@@ -1,5 +1,15 @@
+import random
 from unittest import TestCase
-from esllib.conversion import int_to_hexstring, hexstring_to_int, utf8_to_utf16hexstring, utf16hexstring_to_utf8
+
+from PIL import Image
+from esllib.conversion import int_to_hexstring, hexstring_to_int, utf8_to_utf16hexstring, utf16hexstring_to_utf8, \
+	utf8_to_utf16bytes, utf16bytes_to_utf8, image_to_black_and_colored_pixel_planes, \
+	_image_to_black_and_colored_pixel_planes_loop, compress_pixel_array, \
+	compress_pixel_bytes, uncompress_pixel_array, uncompress_pixel_bytes, compare_compression, PixelStreamDecoder, \
+	position_to_bytes, bytes_to_position, compress_pixel_planes, _compress_pixel_bytes, \
+	image_to_black_and_colored_bit_planes, IncrementalPixelEncoder, \
+	estimate_compressed_size, write_black_and_colored_bit_planes
+from esllib.bitplane import BitPlane
 
 
 class TestConversion(TestCase):
@@ -27,6 +37,19 @@ class TestConversion(TestCase):
 		self.assertEqual("0D0C", int_to_hexstring(number=0x0c0d, little_endian=True, number_of_hex_digits=4))
 		self.assertEqual("0D0C0B0A", int_to_hexstring(number=0x0a0b0c0d, little_endian=True, number_of_hex_digits=8))
 
+	def test_int_to_hexstring_limits(self):
+		for digits in (2, 3, 4, 5, 8):
+			for little_endian in (False, True):
+				hex_string = int_to_hexstring(number=16**digits - 1, little_endian=little_endian, number_of_hex_digits=digits)
+				self.assertEqual("F" * digits, hex_string)
+				self.assertEqual(16**digits - 1, hexstring_to_int(inputstring=hex_string, little_endian=little_endian))
+				with self.assertRaisesRegex(Exception, f"cant fit in {digits} hexadecimal digits"):
+					int_to_hexstring(number=16**digits, little_endian=little_endian, number_of_hex_digits=digits)
+		self.assertEqual("0AB", int_to_hexstring(number=0xAB, little_endian=False, number_of_hex_digits=3))
+		self.assertEqual("AB0", int_to_hexstring(number=0xAB, little_endian=True, number_of_hex_digits=3))
+		with self.assertRaises(ValueError):
+			hexstring_to_int(inputstring="0G0D", little_endian=True)
+
 	def test_hexstring_to_int_big(self):
 		self.assertEqual(1, hexstring_to_int(inputstring="001", little_endian=False))
 		self.assertEqual(241, hexstring_to_int(inputstring="F1", little_endian=False))
@@ -44,6 +67,10 @@ class TestConversion(TestCase):
 		self.assertEqual(20017, hexstring_to_int(inputstring="314E", little_endian=True))
 		self.assertEqual(0x0c0d, hexstring_to_int(inputstring="0D0C", little_endian=True))
 		self.assertEqual(0x0a0b0c0d, hexstring_to_int(inputstring="0D0C0B0A", little_endian=True))
+		# Whitespace is not hexadecimal, also for the lengths bytes.fromhex is used for
+		for inputstring in (" d2 ", "94 c6 40", "0D0C0B0 ", "XY12"):
+			with self.assertRaises(ValueError):
+				hexstring_to_int(inputstring=inputstring, little_endian=True)
 
 	def test_utf8_to_utf16hexstring(self):
 		self.assertEqual("0041", utf8_to_utf16hexstring("A"))
@@ -62,3 +89,194 @@ class TestConversion(TestCase):
 		self.assertEqual("A åäö B", utf16hexstring_to_utf8("0041002000E500E400F600200042"))
 		self.assertEqual("A ÅÄÖ B", utf16hexstring_to_utf8("0041002000C500C400D600200042"))
 		self.assertEqual("={}[]%&", utf16hexstring_to_utf8("003D007B007D005B005D00250026"))
+
+	def test_utf16_surrogate_pairs(self):
+		self.assertEqual("D83DDE00", utf8_to_utf16hexstring("\U0001F600"))
+		self.assertEqual("\U0001F600", utf16hexstring_to_utf8("D83DDE00"))
+		self.assertEqual(b'\x00A\xd8\x3d\xde\x00', utf8_to_utf16bytes("A\U0001F600"))
+		self.assertEqual("A\U0001F600", utf16bytes_to_utf8(memoryview(b'\x00A\xd8\x3d\xde\x00')))
+		self.assertIs(utf8_to_utf16bytes("19.90"), utf8_to_utf16bytes("19.90"))
+		with self.assertRaises(UnicodeDecodeError):
+			utf16hexstring_to_utf8("D83D")
+
+	def test_position_to_bytes(self):
+		self.assertEqual(bytes.fromhex("010001"), position_to_bytes(1, 1))
+		self.assertEqual(bytes.fromhex("FF1200"), position_to_bytes(511, 512))
+		self.assertEqual((511, 512), bytes_to_position(bytes.fromhex("FF1200")))
+		self.assertEqual((0xFFF, 0xFFF), bytes_to_position(position_to_bytes(0xFFF, 0xFFF)))
+		with self.assertRaises(Exception):
+			position_to_bytes(0x1000, 0)
+
+	def test_image_to_black_and_colored_pixel_planes_matches_loop(self):
+		random.seed(1)
+		img = Image.new('RGB', (53, 17))
+		img.putdata([(random.randrange(256), random.randrange(256), random.randrange(256)) for i in range(53*17)])
+		self.assertEqual(_image_to_black_and_colored_pixel_planes_loop(img), image_to_black_and_colored_pixel_planes(img))
+
+	def test_image_to_black_and_colored_pixel_planes_modes(self):
+		img = Image.new('RGB', (4, 1), "white")
+		img.putdata([(0, 0, 0), (255, 0, 0), (255, 255, 0), (255, 255, 255)])
+		expected = (bytes([1, 0, 0, 0]), bytes([0, 1, 1, 0]))
+		self.assertEqual(expected, image_to_black_and_colored_pixel_planes(img))
+		self.assertEqual(expected, image_to_black_and_colored_pixel_planes(img.convert('P')))
+		rgba = img.convert('RGBA')
+		self.assertEqual(expected, image_to_black_and_colored_pixel_planes(rgba))
+		rgba.putpixel((0, 0), (0, 0, 0, 0))  # Transparent pixels are treated as white
+		self.assertEqual((bytes([0, 0, 0, 0]), expected[1]), image_to_black_and_colored_pixel_planes(rgba))
+		self.assertEqual((bytes([1, 1, 0, 0]), bytes(4)), image_to_black_and_colored_pixel_planes(img.convert('L')))
+		bilevel = Image.new('1', (4, 1), 1)
+		bilevel.putpixel((2, 0), 0)
+		self.assertEqual((bytes([0, 0, 1, 0]), bytes(4)), image_to_black_and_colored_pixel_planes(bilevel))
+
+	def test_image_to_black_and_colored_bit_planes(self):
+		random.seed(1)
+		img = Image.new('RGB', (53, 17))
+		img.putdata([(random.randrange(256), random.randrange(256), random.randrange(256)) for i in range(53*17)])
+		pixels_black, pixels_color = image_to_black_and_colored_pixel_planes(img)
+		self.assertEqual((BitPlane.from_pixels(pixels_black, 53, 17), BitPlane.from_pixels(pixels_color, 53, 17)),
+						image_to_black_and_colored_bit_planes(img))
+		# Written straight in to a buffer, black plane first
+		planes = image_to_black_and_colored_bit_planes(img)
+		buffer = bytearray(2 * 7 * 17 + 3)
+		self.assertEqual(2 * 7 * 17, write_black_and_colored_bit_planes(img, memoryview(buffer)[3:]))
+		self.assertEqual(bytes(3) + planes[0].data + planes[1].data, buffer)
+		self.assertEqual(7 * 17, write_black_and_colored_bit_planes(img, buffer, colored=False))
+		self.assertEqual(planes[0].data, buffer[:7 * 17])
+
+	def test_compress_pixel_planes(self):
+		random.seed(3)
+		for pixel_total in (4100, 70000, 140000):
+			for run_lengths in ([1, 2, 3, 6, 7, 8, 12, 13, 30, 32, 300], [7, 12, 65535, 65536, 65542, 65543, 70000]):
+				planes = []
+				for i in range(2):
+					pixels = bytearray()
+					while len(pixels) < pixel_total:
+						pixels += bytes([random.randrange(2)]) * random.choice(run_lengths)
+					planes.append(bytes(pixels[:pixel_total]))
+				expected = [_compress_pixel_bytes(plane) for plane in planes]
+				self.assertEqual(expected, compress_pixel_planes(planes))
+				self.assertEqual(expected, compress_pixel_planes(planes, threads=True))
+		# Bit planes with rows that are not a whole number of bytes
+		planes = [BitPlane.from_pixels(bytes(random.randrange(2) for i in range(101*61)), 101, 61), BitPlane(101, 61)]
+		self.assertEqual([_compress_pixel_bytes(plane) for plane in planes], compress_pixel_planes(planes))
+
+	def test_incremental_pixel_encoder(self):
+		rng = random.Random(24)
+		width = 100
+		pixels = bytearray()
+		for length in [rng.choice((1, 3, 7, 40, 300, 70000)) for i in range(400)]:
+			pixels += bytes([rng.getrandbits(1)]) * length
+		pixels = pixels[:len(pixels) // width * width]
+		encoder = IncrementalPixelEncoder(compress_pixel_bytes(pixels))
+		for i in range(50):
+			top = rng.randrange(len(pixels) // width)
+			bottom = top + rng.randint(1, 5)
+			for j in range(top * width, min(bottom * width, len(pixels))):
+				pixels[j] = rng.getrandbits(1) if i % 2 else 0
+			self.assertEqual(_compress_pixel_bytes(pixels), encoder.update(pixels, top * width, bottom * width))
+		# Only the span around a small change is compressed again
+		self.assertLess(encoder.span[1] - encoder.span[0], len(pixels) // 2)
+		with self.assertRaises(Exception):
+			encoder.update(pixels[:-7], 0, width)
+
+	def test_estimate_compressed_size(self):
+		rng = random.Random(20)
+		for run in (2, 5, 20, 300):
+			pixels = bytearray()
+			while len(pixels) < 64000:
+				pixels += bytes([rng.getrandbits(1)]) * rng.randint(1, run)
+			plane = BitPlane.from_pixels(pixels, 320, 200)
+			size = len(compress_pixel_bytes(plane))
+			self.assertLess(abs(estimate_compressed_size(plane) - size), size * 0.15)
+		self.assertEqual(len(compress_pixel_bytes(BitPlane(320, 200))), estimate_compressed_size(BitPlane(320, 200)))
+
+	def test_compress_pixel_array(self):
+		self.assertEqual("C000FFFF00BAD4", compress_pixel_array([1] + [0]*119999))
+		self.assertEqual("4700FFFF00BAD4", compress_pixel_array([1]*7 + [0]*119993))
+		self.assertEqual("412000FFFF00A1D4", compress_pixel_array([1]*32 + [0]*119968))
+		self.assertEqual("5F1F41200120412101F14000011F417100000140000200FFFF00A1CE", compress_pixel_array(
+			[1]*31 + [0]*31 + [1]*32 + [0]*32 + [1]*33 + [0]*241 + [1]*256 + [0]*31 + [1]*113 + [0]*256 + [1]*512 + [0]*118432))
+
+	def test_compress_pixel_bytes(self):
+		pixels = bytes([1]*31 + [0]*31 + [1]*32)
+		self.assertEqual(bytearray(b'\x5F\x1F\x41\x20'), compress_pixel_bytes(pixels))
+		self.assertEqual(compress_pixel_bytes(pixels), compress_pixel_bytes(list(pixels)))
+
+	def test_uncompress_pixel_bytes(self):
+		self.assertEqual(bytes([1]*31 + [0]*31 + [1]*32), uncompress_pixel_bytes(b'\x5F\x1F\x41\x20'))
+		self.assertEqual(bytes([0]*54458), uncompress_pixel_bytes(memoryview(b'\x00\xBA\xD4')))
+		self.assertEqual([1]*256 + [0]*31, uncompress_pixel_array("4000011F"))
+		with self.assertRaises(Exception):
+			uncompress_pixel_bytes(b'\x41')
+
+	def test_uncompress_pixel_pattern(self):
+		# A pixel pattern holds 7 pixels, bit 6 to bit 0
+		self.assertEqual(bytes([1, 0, 0, 0, 0, 0, 1]), uncompress_pixel_bytes(b'\xC1'))
+		self.assertEqual(bytes([1] + [0]*119999), uncompress_pixel_bytes(bytes.fromhex("C000FFFF00BAD4")))
+
+	def test_compress_pixel_array_optimal(self):
+		random.seed(2)
+		pixels = []
+		while len(pixels) < 4000:
+			pixels += [random.randrange(2)] * random.choice([1, 2, 5, 6, 8, 31, 32, 40, 300])
+		pixels = bytes(pixels[:4000])
+		compressed = compress_pixel_bytes(pixels, optimal=True)
+		self.assertEqual(pixels, uncompress_pixel_bytes(compressed)[:4000])
+		self.assertLessEqual(len(compressed), len(compress_pixel_bytes(pixels)))
+		# Greedy takes all 32 black pixels as a 2 byte color string, optimal stops at 26 and use two pixel patterns
+		self.assertEqual("41209FC0", compress_pixel_array([1]*32 + [0]*2 + [1]*6))
+		self.assertEqual("5AFEBF", compress_pixel_array([1]*32 + [0]*2 + [1]*6, optimal=True))
+		# A single pixel after the longest long color string is cheaper with the long color string a little shorter
+		self.assertEqual(4, len(compress_pixel_bytes([0]*65536, optimal=True)))
+
+	def test_compress_pixel_array_optimal_smallest(self):
+		# Compare with trying every token from every pixel
+		def smallest_size(pixels):
+			sizes = [0] * (len(pixels) + 1)
+			for position in range(len(pixels) - 1, -1, -1):
+				size = 1 + sizes[min(position + 7, len(pixels))]
+				length = 1
+				while position + length <= len(pixels) and pixels[position + length - 1] == pixels[position]:
+					string_size = 1 if 2 <= length <= 31 else 2 if length <= 255 else 3
+					size = min(size, string_size + sizes[position + length])
+					length += 1
+				sizes[position] = size
+			return sizes[0]
+		random.seed(3)
+		for _ in range(50):
+			pixels = b''.join(bytes([pixel & 1]) * random.choice([1, 2, 3, 6, 7, 8, 13, 31, 32, 33, 256])
+							for pixel in range(random.randint(1, 12)))
+			self.assertEqual(smallest_size(pixels), len(compress_pixel_bytes(pixels, optimal=True)))
+
+	def test_compare_compression(self):
+		pixels = [1, 0]*4 + [1]*6 + [0]*100
+		sizes = compare_compression(pixels)
+		self.assertEqual(sizes['greedy'] - sizes['optimal'], sizes['saved'])
+		self.assertGreaterEqual(sizes['saved'], 0)
+
+	def test_pixel_stream_decoder(self):
+		compressed = "5F1F41200120412101F14000011F417100000140000200FFFF00A1CE"
+		expected = uncompress_pixel_bytes(bytes.fromhex(compressed))
+		# Binary chunks of 1 byte, tokens are split between chunks
+		decoder = PixelStreamDecoder(max_pixels=400*300)
+		pixels = b''.join(bytes([pixel]) * length for pixel, length in decoder.runs(bytes.fromhex(compressed)[i:i+1] for i in range(len(compressed)//2)))
+		self.assertEqual(expected, pixels)
+		# Hexadecimal chunks of 3 digits, bytes are split between chunks
+		decoder = PixelStreamDecoder(max_pixels=400*300, hex_input=True)
+		rows = list(decoder.rows((compressed[i:i+3] for i in range(0, len(compressed), 3)), 400))
+		self.assertEqual(300, len(rows))
+		self.assertEqual(expected, b''.join(rows))
+
+	def test_pixel_stream_decoder_limits(self):
+		decoder = PixelStreamDecoder(max_pixels=100)
+		with self.assertRaises(Exception):
+			decoder.feed(b'\x00\xFF\xFF')
+		# The last pixel pattern may be padded with non filled pixels past the end of the image
+		decoder = PixelStreamDecoder(max_pixels=10)
+		self.assertEqual([(0, 8), (1, 1), (0, 1)], decoder.feed(b'\x08\xC0'))
+		with self.assertRaises(Exception):
+			decoder.feed(b'\x02')
+		decoder = PixelStreamDecoder(max_pixels=10)
+		decoder.feed(b'\x01')
+		with self.assertRaises(Exception):
+			decoder.close()
@@ -13,10 +13,13 @@ setuptools.setup(
 	long_description_content_type="text/markdown",
 	url="https://github.com/TimGremalm/python-esllib",
 	packages=setuptools.find_packages(),
+	extras_require={
+		'numpy': ['numpy'],  # Vectorized image encoding
+	},
 	classifiers=[
 		"Programming Language :: Python :: 3",
 		'License :: OSI Approved :: GNU General Public License v3 or later (GPLv3+)',
 		"Operating System :: OS Independent",
 	],
-	python_requires='>=3.6',
-)
\ No newline at end of file
+	python_requires='>=3.8',
+)
\ No newline at end of file